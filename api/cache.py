@@ -0,0 +1,131 @@
+"""
+GET condicional e cache de respostas da API
+
+Cada resposta de leitura leva ETag/Last-Modified derivados dos contadores de
+alteração das tabelas envolvidas (`table_versions`). Clientes que repetem o
+ETag em `If-None-Match` recebem 304 sem consulta nem serialização; os demais
+recebem o corpo JSON guardado em um LRU em memória, chaveado por rota +
+parâmetros + versões, enquanto nada mudar no banco.
+Escritas fora do ORM (`text()`, conexão crua) não incrementam as versões:
+ver `_track_bulk_writes` em modules.database.database.
+
+Configuração:
+    API_RESPONSE_CACHE_SIZE  entradas do LRU (0 desativa; padrão 256)
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from modules.utils.metrics import CACHE_REQUESTS
+
+RESPONSE_CACHE_SIZE = int(os.getenv("API_RESPONSE_CACHE_SIZE", "256"))
+
+
+class ResponseCache:
+    """LRU thread-safe de corpos JSON já serializados"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="api_respostas", resultado="miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="api_respostas", resultado="hit")
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._entries),
+                "max_entradas": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def versoes_atuais(tabelas: Iterable[str]) -> tuple:
+    """(etag, last_modified) a partir dos contadores de alteração das tabelas"""
+    from modules.database.database import get_table_versions
+
+    versoes = get_table_versions(tuple(tabelas))
+    assinatura = ";".join(f"{t}={v}" for t, (v, _) in sorted(versoes.items()))
+    etag = 'W/"' + hashlib.sha1(assinatura.encode()).hexdigest()[:20] + '"'
+    datas = [dt for _, dt in versoes.values() if dt is not None]
+    last_modified = max(datas).astimezone() if datas else None
+    return etag, last_modified
+
+
+def _nao_modificado(request: Request, etag: str, last_modified) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidatos = {tag.strip() for tag in if_none_match.split(",")}
+        # Comparação fraca: W/"x" equivale a "x"
+        normalizados = {tag[2:] if tag.startswith("W/") else tag for tag in candidatos}
+        return "*" in candidatos or etag[2:] in normalizados
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= desde
+    return False
+
+
+def resposta_condicional(request: Request, tabelas: Iterable[str], gerar: Callable[[], Any]) -> Response:
+    """
+    Responde 304 se o cliente já tem a versão atual; senão devolve o JSON
+    de `gerar()` (do cache, se a mesma consulta já foi servida nesta versão).
+    """
+    etag, last_modified = versoes_atuais(tabelas)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+    if _nao_modificado(request, etag, last_modified):
+        CACHE_REQUESTS.inc(cache="api_condicional", resultado="hit")
+        return Response(status_code=304, headers=headers)
+
+    chave = (request.url.path, tuple(sorted(request.query_params.multi_items())), etag)
+    body = response_cache.get(chave)
+    if body is None:
+        body = JSONResponse(jsonable_encoder(gerar())).body
+        response_cache.put(chave, body)
+    return Response(content=body, media_type="application/json", headers=headers)
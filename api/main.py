@@ -2,9 +2,14 @@
 FastAPI Backend para o Sistema de Licitações
 Expõe endpoints REST para acesso externo
 """
+import os
 from datetime import datetime
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Query
+
+from dotenv import load_dotenv
+load_dotenv()  # antes dos módulos que leem o ambiente no import (ai_config, logging_config)
+
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -80,6 +85,27 @@ app.include_router(licitacoes.router, prefix="/licitacoes", tags=["Licitações"
 app.include_router(produtos.router, prefix="/produtos", tags=["Produtos"])
 
 
+# === STARTUP ===
+
+@app.on_event("startup")
+async def configure_threadpool():
+    """
+    Dimensiona o thread pool que executa os endpoints síncronos.
+    Padrão: pool de leitura + overflow, para nenhuma thread ficar esperando conexão.
+    """
+    import anyio.to_thread
+    from modules.database.database import READ_POOL_SIZE
+    tamanho = int(os.getenv("API_THREADPOOL_SIZE", str(2 * READ_POOL_SIZE)))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = tamanho
+
+
+@app.on_event("startup")
+async def warm_up_database():
+    """Aquece a engine do banco em background (o import não abre conexão)"""
+    from modules.database.database import warm_up
+    warm_up(background=True)
+
+
 # === ENDPOINTS RAIZ ===
 
 @app.get("/")
@@ -92,18 +118,42 @@ async def root():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas no formato Prometheus (coleta PNCP, caches, pipeline, banco,
+    LLM e alertas). Valores por processo: com API_WORKERS > 1 cada scrape
+    enxerga apenas o worker que atendeu, e o trabalho do scheduler aparece
+    na porta dele (SCHEDULER_METRICS_PORT), não aqui.
+    """
+    from modules.utils.metrics import CONTENT_TYPE_LATEST, registry
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health_check():
     """Health check para monitoramento"""
-    return {"status": "healthy"}
+    from modules.database.database_config import is_using_turso
+    health = {"status": "healthy"}
+    if is_using_turso():
+        from modules.database.sync_worker import turso_sync_worker
+        health["turso_sync"] = turso_sync_worker.get_stats()
+    return health
 
 
 # === EXECUÇÃO ===
 
 def start_api():
-    """Inicia o servidor FastAPI"""
+    """
+    Inicia o servidor FastAPI.
+    API_WORKERS > 1 sobe vários processos (escala CPU além do GIL).
+    """
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    workers = int(os.getenv("API_WORKERS", "1"))
+    if workers > 1:
+        uvicorn.run("api.main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
 
 if __name__ == "__main__":
     start_api()
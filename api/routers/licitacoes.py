@@ -1,13 +1,39 @@
 """
 Router de Licitações - Endpoints REST para gerenciamento de licitações
 """
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import func
+
+from api.cache import resposta_condicional, versoes_atuais
 
 router = APIRouter()
 
+# Tabelas cujas alterações mudam as respostas de leitura (ETag / cache).
+# O arquivamento apaga de `licitacoes`, então também invalida as arquivadas.
+TABELAS_LICITACOES = ("licitacoes", "itens_licitacao", "licitacao_features")
+
+STATUS_VALIDOS = ['Nova', 'Salva', 'Analisada', 'Descartada']
+
+# Tamanho máximo das requisições em lote e dos blocos lidos na exportação
+LOTE_MAX_IDS = 1000
+EXPORT_CHUNK = 500
+
+# Totais da listagem ficam em cache (COUNT varre a tabela); a chave inclui a
+# versão das tabelas e o TTL é só um limite superior
+TOTAL_CACHE_TTL = float(os.getenv("API_TOTAL_CACHE_TTL", "30"))
+_total_cache: dict = {}
+_total_lock = threading.Lock()
+
 
 # === MODELOS ===
 
@@ -26,6 +52,7 @@ class LicitacaoResponse(BaseModel):
     num_itens: int = 0
     has_matches: bool = False
     score_relevancia: Optional[float] = None
+    arquivada: bool = False
     
     class Config:
         from_attributes = True
@@ -33,10 +60,21 @@ class LicitacaoResponse(BaseModel):
 class LicitacaoListResponse(BaseModel):
     total: int
     licitacoes: List[LicitacaoResponse]
+    proximo_cursor: Optional[str] = None
 
 class StatusUpdate(BaseModel):
     status: str
 
+class IdsRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=LOTE_MAX_IDS)
+
+class StatusLoteUpdate(IdsRequest):
+    status: str
+
+class LicitacaoLoteResponse(BaseModel):
+    licitacoes: List[LicitacaoResponse]
+    nao_encontradas: List[int] = []
+
 
 # === DEPENDÊNCIAS ===
 
@@ -50,21 +88,166 @@ def get_db_session():
         session.close()
 
 
+def _encode_cursor(data_publicacao: Optional[datetime], licitacao_id: int, arquivo: bool = False) -> str:
+    """Cursor opaco com a última posição (data_publicacao, id) entregue"""
+    payload = {
+        "d": data_publicacao.isoformat() if data_publicacao else None,
+        "i": licitacao_id,
+        "a": arquivo,
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        data_publicacao = datetime.fromisoformat(payload["d"]) if payload.get("d") else None
+        return data_publicacao, int(payload["i"]), bool(payload.get("a"))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def _total_cacheado(chave: tuple, contar) -> int:
+    """Retorna o total em cache (TTL) ou executa `contar()` e guarda"""
+    agora = time.monotonic()
+    with _total_lock:
+        cached = _total_cache.get(chave)
+        if cached and agora - cached[0] < TOTAL_CACHE_TTL:
+            return cached[1]
+    total = contar()
+    with _total_lock:
+        _total_cache[chave] = (agora, total)
+        if len(_total_cache) > 256:
+            for k in [k for k, (t, _) in _total_cache.items() if agora - t >= TOTAL_CACHE_TTL]:
+                del _total_cache[k]
+    return total
+
+
+def _fontes_por_licitacao(session, ids: List[int]) -> dict:
+    """Fonte de coleta de cada licitação (registrada em licitacao_features)"""
+    from modules.database.database import LicitacaoFeature
+    
+    if not ids:
+        return {}
+    rows = session.query(LicitacaoFeature.licitacao_id, LicitacaoFeature.fonte).filter(
+        LicitacaoFeature.licitacao_id.in_(ids)
+    ).order_by(LicitacaoFeature.id)
+    fontes = {}
+    for licitacao_id, fonte in rows:
+        fontes.setdefault(licitacao_id, fonte)
+    return fontes
+
+
+def _montar_respostas(session, licitacoes) -> List[LicitacaoResponse]:
+    """Monta as respostas de várias licitações com contagens/fontes em consultas agregadas"""
+    from modules.database.database import ItemLicitacao
+    
+    ids = [lic.id for lic in licitacoes]
+    contagens = {}
+    if ids:
+        contagens = {
+            licitacao_id: (num_itens, num_matches)
+            for licitacao_id, num_itens, num_matches in session.query(
+                ItemLicitacao.licitacao_id,
+                func.count(ItemLicitacao.id),
+                func.count(ItemLicitacao.produto_match_id),
+            ).filter(ItemLicitacao.licitacao_id.in_(ids)).group_by(ItemLicitacao.licitacao_id)
+        }
+    fontes = _fontes_por_licitacao(session, ids)
+    
+    result = []
+    for lic in licitacoes:
+        num_itens, num_matches = contagens.get(lic.id, (0, 0))
+        result.append(LicitacaoResponse(
+            id=lic.id,
+            pncp_id=lic.pncp_id,
+            orgao=lic.orgao,
+            uf=lic.uf,
+            modalidade=lic.modalidade,
+            objeto=lic.objeto,
+            link=lic.link,
+            fonte=fontes.get(lic.id),
+            status=lic.status,
+            data_sessao=lic.data_sessao,
+            data_publicacao=lic.data_publicacao,
+            num_itens=num_itens,
+            has_matches=num_matches > 0,
+            score_relevancia=lic.score_relevancia,
+        ))
+    return result
+
+
+def _arquivada_to_response(arq: dict) -> LicitacaoResponse:
+    """Converte o dict de uma licitação arquivada (modules.database.archive)"""
+    return LicitacaoResponse(
+        id=arq["id"],
+        pncp_id=arq["pncp_id"],
+        orgao=arq["orgao"],
+        uf=arq["uf"],
+        modalidade=arq["modalidade"],
+        objeto=arq["objeto"],
+        link=arq["link"],
+        status=arq["status"],
+        data_sessao=arq["data_sessao"],
+        data_publicacao=arq["data_publicacao"],
+        num_itens=arq["num_itens"],
+        has_matches=arq["num_matches"] > 0,
+        arquivada=True,
+    )
+
+
 # === ENDPOINTS ===
+# Endpoints com acesso ao banco são `def` (síncronos): o FastAPI os executa no
+# thread pool (dimensionado em api/main.py), sem bloquear o event loop.
 
 @router.get("/", response_model=LicitacaoListResponse)
-async def listar_licitacoes(
+def listar_licitacoes(
+    request: Request,
     status: Optional[str] = Query(None, description="Filtrar por status: Nova, Salva, Analisada"),
     uf: Optional[str] = Query(None, description="Filtrar por UF"),
     fonte: Optional[str] = Query(None, description="Filtrar por fonte: PNCP, FEMURN, etc"),
     apenas_com_match: bool = Query(False, description="Apenas licitações com match de produtos"),
-    limit: int = Query(100, le=500, description="Limite de resultados"),
-    offset: int = Query(0, ge=0, description="Offset para paginação"),
+    score_minimo: Optional[float] = Query(None, ge=0, le=1, description="Score ML mínimo (relevância persistida)"),
+    limit: int = Query(100, ge=1, le=500, description="Limite de resultados"),
+    offset: int = Query(0, ge=0, description="Offset para paginação (prefira `cursor`)"),
+    cursor: Optional[str] = Query(None, description="Cursor `proximo_cursor` da página anterior"),
+    incluir_arquivadas: bool = Query(False, description="Inclui licitações arquivadas (após as ativas)"),
 ):
-    """Lista licitações com filtros opcionais"""
-    from modules.database.database import get_session, Licitacao
+    """
+    Lista licitações com filtros opcionais, da publicação mais recente para a mais antiga.
+    Paginação por cursor em (data_publicacao, id): custo constante em qualquer profundidade.
+    Suporta GET condicional (ETag / If-None-Match → 304).
+    """
+    return resposta_condicional(
+        request,
+        TABELAS_LICITACOES,
+        lambda: _listar_licitacoes(
+            status, uf, fonte, apenas_com_match, limit, offset, cursor, incluir_arquivadas, score_minimo,
+        ),
+    )
+
+
+def _listar_licitacoes(
+    status: Optional[str],
+    uf: Optional[str],
+    fonte: Optional[str],
+    apenas_com_match: bool,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    incluir_arquivadas: bool,
+    score_minimo: Optional[float] = None,
+) -> LicitacaoListResponse:
+    from modules.database.database import (
+        get_read_session, Licitacao, ItemLicitacao, LicitacaoFeature, keyset_filter,
+    )
     
-    session = get_session()
+    cursor_data, cursor_id, cursor_arquivo = _decode_cursor(cursor) if cursor else (None, None, False)
+    # Arquivo não guarda fonte nem score: com esses filtros só as ativas participam
+    usar_arquivo = incluir_arquivadas and not fonte and score_minimo is None
+    
+    session = get_read_session()
     try:
         query = session.query(Licitacao)
         
@@ -73,52 +256,279 @@ async def listar_licitacoes(
         if uf:
             query = query.filter(Licitacao.uf == uf.upper())
         if fonte:
-            query = query.filter(Licitacao.fonte == fonte)
-        
-        # Total antes do limit
-        total = query.count()
-        
-        # Ordenação e paginação
-        licitacoes = query.order_by(Licitacao.data_publicacao.desc()).offset(offset).limit(limit).all()
-        
-        # Formata resposta
-        result = []
-        for lic in licitacoes:
-            matches = sum(1 for item in lic.itens if item.produto_match_id is not None) if lic.itens else 0
-            result.append(LicitacaoResponse(
-                id=lic.id,
-                pncp_id=lic.pncp_id,
-                orgao=lic.orgao,
-                uf=lic.uf,
-                modalidade=lic.modalidade,
-                objeto=lic.objeto,
-                link=lic.link,
-                fonte=lic.fonte,
-                status=lic.status,
-                data_sessao=lic.data_sessao,
-                data_publicacao=lic.data_publicacao,
-                num_itens=len(lic.itens) if lic.itens else 0,
-                has_matches=matches > 0,
-            ))
-        
+            query = query.filter(
+                session.query(LicitacaoFeature.id).filter(
+                    LicitacaoFeature.licitacao_id == Licitacao.id,
+                    LicitacaoFeature.fonte == fonte,
+                ).exists()
+            )
         if apenas_com_match:
-            result = [r for r in result if r.has_matches]
-            total = len(result)
+            query = query.filter(
+                session.query(ItemLicitacao.id).filter(
+                    ItemLicitacao.licitacao_id == Licitacao.id,
+                    ItemLicitacao.produto_match_id.isnot(None),
+                ).exists()
+            )
+        if score_minimo is not None:
+            query = query.filter(Licitacao.score_relevancia >= score_minimo)
+        
+        # Versão das tabelas na chave: qualquer escrita invalida o total na hora
+        versao, _ = versoes_atuais(TABELAS_LICITACOES)
+        chave_total = (versao, status, uf.upper() if uf else None, fonte, apenas_com_match, score_minimo)
+        total_ativas = _total_cacheado(chave_total, query.count)
+        
+        licitacoes = []
+        if not cursor_arquivo:
+            pagina = query
+            if cursor:
+                pagina = pagina.filter(keyset_filter(Licitacao, cursor_data, cursor_id))
+            pagina = pagina.order_by(Licitacao.data_publicacao.desc(), Licitacao.id.desc())
+            if not cursor and offset:
+                pagina = pagina.offset(offset)
+            licitacoes = pagina.limit(limit).all()
+        
+        result = _montar_respostas(session, licitacoes)
         
-        return LicitacaoListResponse(total=total, licitacoes=result)
+        total = total_ativas
+        proximo_cursor = None
+        if len(licitacoes) == limit:
+            ultima = licitacoes[-1]
+            proximo_cursor = _encode_cursor(ultima.data_publicacao, ultima.id)
+        
+        # Arquivadas vêm depois das ativas, na mesma ordenação
+        if usar_arquivo:
+            from modules.database.archive import contar_arquivadas, listar_arquivadas
+            total += _total_cacheado(
+                ("arquivo",) + chave_total,
+                lambda: contar_arquivadas(status=status, uf=uf, apenas_com_match=apenas_com_match),
+            )
+            restante = limit - len(result)
+            if restante > 0:
+                arquivadas = listar_arquivadas(
+                    status=status,
+                    uf=uf,
+                    apenas_com_match=apenas_com_match,
+                    limit=restante,
+                    offset=0 if cursor else max(offset - total_ativas, 0),
+                    depois_de=(cursor_data, cursor_id) if cursor_arquivo else None,
+                )
+                result.extend(_arquivada_to_response(arq) for arq in arquivadas)
+                if arquivadas and len(arquivadas) == restante:
+                    ultima = arquivadas[-1]
+                    proximo_cursor = _encode_cursor(ultima["data_publicacao"], ultima["id"], arquivo=True)
+        
+        return LicitacaoListResponse(total=total, licitacoes=result, proximo_cursor=proximo_cursor)
     finally:
         session.close()
 
 
-@router.get("/{licitacao_id}", response_model=LicitacaoResponse)
-async def obter_licitacao(licitacao_id: int):
-    """Obtém detalhes de uma licitação específica"""
+# === LOTE E EXPORTAÇÃO ===
+# Declarados antes de /{licitacao_id} para "lote"/"exportar" não caírem no path param.
+
+@router.post("/lote", response_model=LicitacaoLoteResponse)
+def obter_licitacoes_lote(data: IdsRequest):
+    """Obtém várias licitações por id em uma única consulta"""
+    from modules.database.database import get_read_session, Licitacao
+    
+    ids = list(dict.fromkeys(data.ids))
+    session = get_read_session()
+    try:
+        licitacoes = session.query(Licitacao).filter(Licitacao.id.in_(ids)).all()
+        por_id = {r.id: r for r in _montar_respostas(session, licitacoes)}
+        return LicitacaoLoteResponse(
+            licitacoes=[por_id[i] for i in ids if i in por_id],
+            nao_encontradas=[i for i in ids if i not in por_id],
+        )
+    finally:
+        session.close()
+
+
+@router.patch("/lote/status")
+def atualizar_status_lote(data: StatusLoteUpdate):
+    """Atualiza o status de várias licitações em uma única transação"""
     from modules.database.database import get_session, Licitacao
     
+    if data.status not in STATUS_VALIDOS:
+        raise HTTPException(status_code=400, detail=f"Status inválido. Valores aceitos: {STATUS_VALIDOS}")
+    
+    ids = list(dict.fromkeys(data.ids))
     session = get_session()
+    try:
+        existentes = {row.id for row in session.query(Licitacao.id).filter(Licitacao.id.in_(ids))}
+        atualizadas = 0
+        if existentes:
+            atualizadas = session.query(Licitacao).filter(Licitacao.id.in_(existentes)).update(
+                {Licitacao.status: data.status}, synchronize_session=False
+            )
+        session.commit()
+        return {
+            "sucesso": True,
+            "atualizadas": atualizadas,
+            "nao_encontradas": [i for i in ids if i not in existentes],
+            "mensagem": f"Status atualizado para '{data.status}'",
+        }
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+@router.post("/lote/relevancia")
+def calcular_relevancia_lote(data: IdsRequest):
+    """Calcula o score de relevância (ML) de várias licitações em uma única predição"""
+    from modules.database.database import get_read_session, Licitacao, ItemLicitacao
+    from modules.ml import get_classifier
+    
+    ids = list(dict.fromkeys(data.ids))
+    session = get_read_session()
+    try:
+        licitacoes = session.query(Licitacao).filter(Licitacao.id.in_(ids)).all()
+        descricoes = {}
+        for licitacao_id, descricao in session.query(ItemLicitacao.licitacao_id, ItemLicitacao.descricao).filter(
+            ItemLicitacao.licitacao_id.in_([lic.id for lic in licitacoes])
+        ).order_by(ItemLicitacao.id):
+            descricoes.setdefault(licitacao_id, []).append({'descricao': descricao})
+        
+        dicts = [
+            {
+                'orgao': lic.orgao or '',
+                'uf': lic.uf or '',
+                'modalidade': lic.modalidade or '',
+                'objeto': lic.objeto or '',
+                'itens': descricoes.get(lic.id, []),
+            }
+            for lic in licitacoes
+        ]
+        scores = get_classifier().predict_proba_batch(dicts)
+        por_id = {lic.id: score for lic, score in zip(licitacoes, scores)}
+        
+        return {
+            "resultados": [
+                {
+                    "licitacao_id": i,
+                    "score_relevancia": round(por_id[i], 3),
+                    "classificacao": "Relevante" if por_id[i] >= 0.5 else "Não Relevante",
+                }
+                for i in ids if i in por_id
+            ],
+            "nao_encontradas": [i for i in ids if i not in por_id],
+        }
+    finally:
+        session.close()
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _exportar_ndjson(status: Optional[str], uf: Optional[str], incluir_itens: bool):
+    """
+    Gera a exportação em blocos de EXPORT_CHUNK licitações (keyset), então a
+    memória fica constante mesmo varrendo a tabela inteira.
+    """
+    from modules.database.database import get_read_session, Licitacao, ItemLicitacao, keyset_filter
+    
+    session = get_read_session()
+    try:
+        ultima = None
+        while True:
+            query = session.query(Licitacao)
+            if status:
+                query = query.filter(Licitacao.status == status)
+            if uf:
+                query = query.filter(Licitacao.uf == uf.upper())
+            if ultima is not None:
+                query = query.filter(keyset_filter(Licitacao, *ultima))
+            bloco = query.order_by(Licitacao.data_publicacao.desc(), Licitacao.id.desc()).limit(EXPORT_CHUNK).all()
+            if not bloco:
+                break
+            
+            itens = {}
+            if incluir_itens:
+                for row in session.query(
+                    ItemLicitacao.licitacao_id,
+                    ItemLicitacao.numero_item,
+                    ItemLicitacao.descricao,
+                    ItemLicitacao.quantidade,
+                    ItemLicitacao.unidade,
+                    ItemLicitacao.valor_estimado,
+                    ItemLicitacao.valor_unitario,
+                    ItemLicitacao.produto_match_id,
+                    ItemLicitacao.match_score,
+                ).filter(ItemLicitacao.licitacao_id.in_([lic.id for lic in bloco])).order_by(ItemLicitacao.id):
+                    item = row._asdict()
+                    itens.setdefault(item.pop("licitacao_id"), []).append(item)
+            
+            linhas = []
+            for lic in bloco:
+                registro = {
+                    "id": lic.id,
+                    "pncp_id": lic.pncp_id,
+                    "orgao": lic.orgao,
+                    "uf": lic.uf,
+                    "modalidade": lic.modalidade,
+                    "objeto": lic.objeto,
+                    "link": lic.link,
+                    "status": lic.status,
+                    "categoria": lic.categoria,
+                    "data_sessao": lic.data_sessao,
+                    "data_publicacao": lic.data_publicacao,
+                    "data_encerramento_proposta": lic.data_encerramento_proposta,
+                    "data_captura": lic.data_captura,
+                }
+                if incluir_itens:
+                    registro["itens"] = itens.get(lic.id, [])
+                linhas.append(json.dumps(registro, ensure_ascii=False, default=_json_default))
+            yield "\n".join(linhas) + "\n"
+            
+            ultima = (bloco[-1].data_publicacao, bloco[-1].id)
+            session.expunge_all()
+    finally:
+        session.close()
+
+
+@router.get("/exportar")
+def exportar_licitacoes(
+    status: Optional[str] = Query(None, description="Filtrar por status"),
+    uf: Optional[str] = Query(None, description="Filtrar por UF"),
+    incluir_itens: bool = Query(True, description="Inclui os itens de cada licitação"),
+):
+    """Exporta licitações (com itens) em NDJSON, transmitido em streaming"""
+    return StreamingResponse(
+        _exportar_ndjson(status, uf, incluir_itens),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="licitacoes.ndjson"'},
+    )
+
+
+@router.get("/{licitacao_id}", response_model=LicitacaoResponse)
+def obter_licitacao(
+    request: Request,
+    licitacao_id: int,
+    incluir_arquivadas: bool = Query(False, description="Procura também no arquivo"),
+):
+    """Obtém detalhes de uma licitação específica (com GET condicional)"""
+    return resposta_condicional(
+        request,
+        TABELAS_LICITACOES,
+        lambda: _obter_licitacao(licitacao_id, incluir_arquivadas),
+    )
+
+
+def _obter_licitacao(licitacao_id: int, incluir_arquivadas: bool = False) -> LicitacaoResponse:
+    from modules.database.database import get_read_session, Licitacao
+    
+    session = get_read_session()
     try:
         lic = session.query(Licitacao).filter(Licitacao.id == licitacao_id).first()
         
+        if not lic and incluir_arquivadas:
+            from modules.database.archive import obter_arquivada
+            arq = obter_arquivada(licitacao_id)
+            if arq:
+                return _arquivada_to_response(arq)
+        
         if not lic:
             raise HTTPException(status_code=404, detail="Licitação não encontrada")
         
@@ -132,25 +542,25 @@ async def obter_licitacao(licitacao_id: int):
             modalidade=lic.modalidade,
             objeto=lic.objeto,
             link=lic.link,
-            fonte=lic.fonte,
+            fonte=_fontes_por_licitacao(session, [lic.id]).get(lic.id),
             status=lic.status,
             data_sessao=lic.data_sessao,
             data_publicacao=lic.data_publicacao,
             num_itens=len(lic.itens) if lic.itens else 0,
             has_matches=matches > 0,
+            score_relevancia=lic.score_relevancia,
         )
     finally:
         session.close()
 
 
 @router.patch("/{licitacao_id}/status")
-async def atualizar_status(licitacao_id: int, data: StatusUpdate):
+def atualizar_status(licitacao_id: int, data: StatusUpdate):
     """Atualiza o status de uma licitação"""
     from modules.database.database import get_session, Licitacao
     
-    status_validos = ['Nova', 'Salva', 'Analisada', 'Descartada']
-    if data.status not in status_validos:
-        raise HTTPException(status_code=400, detail=f"Status inválido. Valores aceitos: {status_validos}")
+    if data.status not in STATUS_VALIDOS:
+        raise HTTPException(status_code=400, detail=f"Status inválido. Valores aceitos: {STATUS_VALIDOS}")
     
     session = get_session()
     try:
@@ -168,7 +578,7 @@ async def atualizar_status(licitacao_id: int, data: StatusUpdate):
 
 
 @router.post("/buscar")
-async def iniciar_busca(
+def iniciar_busca(
     dias: int = Query(30, ge=1, le=90, description="Dias de histórico"),
     estados: str = Query("RN,PB,PE,AL", description="Estados separados por vírgula"),
 ):
@@ -186,7 +596,7 @@ async def iniciar_busca(
 
 
 @router.get("/busca/status")
-async def status_busca():
+def status_busca():
     """Obtém o status da busca em andamento"""
     from modules.core.background_search import background_manager
     
@@ -194,20 +604,63 @@ async def status_busca():
     return status
 
 
+# Intervalo de checagem dos contadores e de envio de keep-alive do stream
+PROGRESSO_INTERVALO = float(os.getenv("API_PROGRESSO_INTERVALO", "0.5"))
+PROGRESSO_KEEPALIVE = 15.0
+
+
+@router.get("/busca/stream")
+async def stream_busca(request: Request):
+    """
+    Progresso da busca via Server-Sent Events (`text/event-stream`).
+    Emite um evento `progresso` a cada mudança dos contadores em memória
+    (páginas, aprovadas, itens, persistidas, matches, alertas) e encerra com
+    o evento `fim` quando a execução termina. Não acessa o banco.
+    """
+    from modules.utils.search_progress import search_progress
+
+    def _evento(nome: str, dados: dict) -> str:
+        return f"event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+    async def _gerar():
+        ultima_versao = None
+        ultimo_envio = time.monotonic()
+        while not await request.is_disconnected():
+            versao = search_progress.versao
+            if versao != ultima_versao:
+                ultima_versao = versao
+                snapshot = search_progress.snapshot()
+                if not search_progress.is_running():
+                    yield _evento("fim", snapshot)
+                    return
+                yield _evento("progresso", snapshot)
+                ultimo_envio = time.monotonic()
+            elif time.monotonic() - ultimo_envio >= PROGRESSO_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                ultimo_envio = time.monotonic()
+            await asyncio.sleep(PROGRESSO_INTERVALO)
+
+    return StreamingResponse(
+        _gerar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{licitacao_id}/relevancia")
-async def calcular_relevancia(licitacao_id: int):
+def calcular_relevancia(licitacao_id: int):
     """Calcula score de relevância usando ML"""
-    from modules.database.database import get_session, Licitacao
-    from modules.ml import LicitacaoClassifier
+    from modules.database.database import get_read_session, Licitacao
+    from modules.ml import get_classifier
     
-    session = get_session()
+    session = get_read_session()
     try:
         lic = session.query(Licitacao).filter(Licitacao.id == licitacao_id).first()
         
         if not lic:
             raise HTTPException(status_code=404, detail="Licitação não encontrada")
         
-        classifier = LicitacaoClassifier()
+        classifier = get_classifier()
         
         licitacao_dict = {
             'orgao': lic.orgao,
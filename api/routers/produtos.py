@@ -2,11 +2,16 @@
 Router de Produtos - Endpoints REST para gerenciamento do catálogo de produtos
 """
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
 
+from api.cache import resposta_condicional
+
 router = APIRouter()
 
+# Tabelas cujas alterações mudam as respostas de leitura (ETag / cache)
+TABELAS_PRODUTOS = ("produtos",)
+
 
 # === MODELOS ===
 
@@ -41,17 +46,28 @@ class ProdutoListResponse(BaseModel):
 
 
 # === ENDPOINTS ===
+# Endpoints com acesso ao banco são `def` (síncronos): o FastAPI os executa no
+# thread pool (dimensionado em api/main.py), sem bloquear o event loop.
 
 @router.get("/", response_model=ProdutoListResponse)
-async def listar_produtos(
+def listar_produtos(
+    request: Request,
     busca: Optional[str] = Query(None, description="Buscar por nome ou palavras-chave"),
     limit: int = Query(100, le=500),
     offset: int = Query(0, ge=0),
 ):
-    """Lista todos os produtos do catálogo"""
-    from modules.database.database import get_session, Produto
+    """Lista todos os produtos do catálogo (com GET condicional)"""
+    return resposta_condicional(
+        request,
+        TABELAS_PRODUTOS,
+        lambda: _listar_produtos(busca, limit, offset),
+    )
+
+
+def _listar_produtos(busca: Optional[str], limit: int, offset: int) -> ProdutoListResponse:
+    from modules.database.database import get_read_session, Produto
     
-    session = get_session()
+    session = get_read_session()
     try:
         query = session.query(Produto)
         
@@ -84,11 +100,15 @@ async def listar_produtos(
 
 
 @router.get("/{produto_id}", response_model=ProdutoResponse)
-async def obter_produto(produto_id: int):
-    """Obtém detalhes de um produto específico"""
-    from modules.database.database import get_session, Produto
+def obter_produto(request: Request, produto_id: int):
+    """Obtém detalhes de um produto específico (com GET condicional)"""
+    return resposta_condicional(request, TABELAS_PRODUTOS, lambda: _obter_produto(produto_id))
+
+
+def _obter_produto(produto_id: int) -> ProdutoResponse:
+    from modules.database.database import get_read_session, Produto
     
-    session = get_session()
+    session = get_read_session()
     try:
         produto = session.query(Produto).filter(Produto.id == produto_id).first()
         
@@ -109,7 +129,7 @@ async def obter_produto(produto_id: int):
 
 
 @router.post("/", response_model=ProdutoResponse)
-async def criar_produto(produto: ProdutoCreate):
+def criar_produto(produto: ProdutoCreate):
     """Cria um novo produto no catálogo"""
     from modules.database.database import get_session, Produto
     
@@ -141,7 +161,7 @@ async def criar_produto(produto: ProdutoCreate):
 
 
 @router.put("/{produto_id}", response_model=ProdutoResponse)
-async def atualizar_produto(produto_id: int, data: ProdutoUpdate):
+def atualizar_produto(produto_id: int, data: ProdutoUpdate):
     """Atualiza um produto existente"""
     from modules.database.database import get_session, Produto
     
@@ -182,7 +202,7 @@ async def atualizar_produto(produto_id: int, data: ProdutoUpdate):
 
 
 @router.delete("/{produto_id}")
-async def deletar_produto(produto_id: int):
+def deletar_produto(produto_id: int):
     """Remove um produto do catálogo"""
     from modules.database.database import get_session, Produto
     
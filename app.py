@@ -1,3 +1,6 @@
+from dotenv import load_dotenv
+load_dotenv()  # antes dos módulos que leem o ambiente no import (ai_config, logging_config)
+
 import streamlit as st
 from components.config import init_page_config
 from components.sidebar import render_sidebar
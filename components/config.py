@@ -1,3 +1,6 @@
+from dotenv import load_dotenv
+load_dotenv()  # páginas abertas direto (sem passar pelo app.py) também leem o .env
+
 import streamlit as st
 import os
 
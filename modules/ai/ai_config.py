@@ -1,7 +1,9 @@
 import os
+import time
 import requests
 
 from modules.database.database import get_session, Configuracao
+from modules.utils.metrics import LLM_REQUEST_SECONDS, LLM_REQUESTS
 
 # ============================================================================
 # CONFIGURAÇÃO CENTRALIZADA DE IA (OpenRouter-only)
@@ -65,6 +67,8 @@ class OpenRouterClient:
 
         last_error = None
         for model in OPENROUTER_FREE_MODELS:
+            resultado = "excecao"
+            inicio = time.perf_counter()
             try:
                 response = requests.post(
                     self.base_url,
@@ -79,12 +83,19 @@ class OpenRouterClient:
                 )
                 if response.status_code == 200:
                     data = response.json()
-                    return OpenRouterResponse(data["choices"][0]["message"]["content"])
+                    texto = data["choices"][0]["message"]["content"]
+                    resultado = "ok"
+                    return OpenRouterResponse(texto)
                 if response.status_code == 429:
+                    resultado = "rate_limit"
                     continue
+                resultado = "erro_http"
                 last_error = f"Status {response.status_code}: {response.text[:200]}"
             except Exception as exc:
                 last_error = str(exc)
+            finally:
+                LLM_REQUEST_SECONDS.observe(time.perf_counter() - inicio, modelo=model)
+                LLM_REQUESTS.inc(modelo=model, resultado=resultado)
 
         raise Exception(f"OpenRouter falhou. Último erro: {last_error}")
 
@@ -0,0 +1,84 @@
+"""
+Busca local (CPU, sem rede) por n-gramas de caracteres para o casamento catálogo x itens
+Cada produto vira várias frases: o nome e cada palavra-chave separadamente.
+Um texto único "nome + todas as keywords" diluía o sinal: "HEMOGRAMA" ficava
+mais perto de Ionograma do que do Analisador Hematológico, e frases genéricas
+("DESCARTAVEL", "MANUTENCAO") dominavam o cosseno.
+
+Score de um item x produto = maior fração dos n-gramas (3 a 5, dentro das
+palavras) de uma frase do produto que aparecem no item (containment, 0 a 1).
+"HEMOGRAMA COMPLETO" contém a keyword "hemograma" inteira (1.0); "SERINGA
+DESCARTAVEL" só compartilha "descartável" com "máscara descartável" (~0.67).
+
+Os n-gramas são hashed (sem ajuste ao catálogo) e a pontuação é um produto de
+matrizes esparsas: com algumas centenas de produtos não há necessidade de índice ANN.
+"""
+from typing import List, Sequence
+
+import numpy as np
+from scipy.sparse import diags
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CatalogIndex:
+    """Frases do catálogo (n-gramas binários) e pontuação por containment"""
+
+    def __init__(self, frases_por_produto: Sequence[Sequence[str]]):
+        """
+        Args:
+            frases_por_produto: Para cada produto, suas frases (nome, keywords);
+                produto sem frases nunca pontua
+        """
+        self._hashing = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=(3, 5),
+            n_features=2 ** 20,
+            alternate_sign=False,
+            norm=None,
+            binary=True,
+        )
+        frases: List[str] = []
+        self._inicio = []
+        for frases_produto in frases_por_produto:
+            self._inicio.append(len(frases))
+            frases.extend([f for f in frases_produto if f and f.strip()] or [""])
+        self.n_produtos = len(self._inicio)
+        self.n_frases = len(frases)
+
+        if frases:
+            F = self._hashing.transform(frases)
+            tamanhos = np.asarray(F.sum(axis=1)).ravel()
+            # Linha dividida pelo nº de n-gramas da frase: item binário x frase = fração contida
+            pesos = np.divide(1.0, tamanhos, out=np.zeros_like(tamanhos, dtype=float), where=tamanhos > 0)
+            self._frases_T = (diags(pesos) @ F).T.tocsr()
+        else:
+            self._frases_T = None
+
+    def similaridades(self, textos: List[str]) -> np.ndarray:
+        """Matriz (len(textos) x n_produtos) float32: maior containment entre as frases de cada produto"""
+        if not textos or self._frases_T is None:
+            return np.zeros((len(textos), self.n_produtos), dtype=np.float32)
+        itens = self._hashing.transform(textos)
+        por_frase = (itens @ self._frases_T).toarray()
+        return np.maximum.reduceat(por_frase, self._inicio, axis=1).astype(np.float32)
+
+
+def frases_produto(nome: str, palavras_chave: str) -> List[str]:
+    """Nome + cada palavra-chave (separadas por vírgula) como frases independentes"""
+    frases = [nome or ""]
+    frases.extend(k.strip() for k in (palavras_chave or "").split(","))
+    return [f for f in frases if f.strip()]
+
+
+def top_k(similaridades: np.ndarray, k: int) -> np.ndarray:
+    """Índices das k maiores similaridades de cada linha, em ordem decrescente"""
+    k = min(k, similaridades.shape[1])
+    if k <= 0:
+        return np.zeros((similaridades.shape[0], 0), dtype=int)
+    idx = np.argpartition(-similaridades, k - 1, axis=1)[:, :k]
+    ordem = np.argsort(-np.take_along_axis(similaridades, idx, axis=1), axis=1)
+    return np.take_along_axis(idx, ordem, axis=1)
@@ -1,15 +1,20 @@
+import os
 import random
 import time
 import unicodedata
-
 from rapidfuzz import fuzz
 
 from .ai_config import get_model
 from modules.database.database import Produto, get_session
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 # Termos que indicam contexto LABORATORIAL/HOSPITALAR
 CONTEXTO_LABORATORIAL = [
     "HEMATOLOGIA",
+    "HEMATOLOGICO",
+    "HEMATOLOGICA",
     "BIOQUIMICA",
     "COAGULACAO",
     "COAGULAÇÃO",
@@ -102,6 +107,13 @@ CONTEXTO_LABORATORIAL = [
 ]
 
 
+# Containment mínimo (fração dos n-gramas de uma keyword presentes no item)
+# para um candidato da busca por n-gramas
+VETOR_LIMIAR = float(os.getenv("MATCH_VETOR_LIMIAR", "0.80"))
+# Candidatos por n-gramas por item (os melhores scores acima do limiar)
+VETOR_TOP_K = 3
+
+
 def normalize_text(texto: str) -> str:
     if not texto:
         return ""
@@ -115,8 +127,10 @@ def tem_contexto_laboratorial(texto: str) -> bool:
 
 class SemanticMatcher:
     """
-    Matcher de catálogo sem dependência de embeddings (Gemini removido).
-    - `find_matches`: fuzzy match (token_set_ratio) entre objeto e (nome+keywords).
+    Matcher de catálogo com embeddings locais (sem rede; Gemini removido).
+    - `find_matches`: fuzzy match (token_set_ratio) entre objeto e (nome+keywords);
+      sem hit fuzzy, os produtos com alguma keyword contida no objeto por
+      n-gramas de caracteres (catalog_vectors).
     - `verify_match`: validação LLM (OpenRouter) para reduzir falsos positivos.
     """
 
@@ -132,6 +146,8 @@ class SemanticMatcher:
         if SemanticMatcher._initialized:
             return
         self.products = []
+        self._product_texts = []
+        self._indice = None
         self._products_loaded = False
         SemanticMatcher._initialized = True
 
@@ -143,24 +159,75 @@ class SemanticMatcher:
             self.products = session.query(Produto).all()
         finally:
             session.close()
+        self._product_texts = [normalize_text(f"{p.nome} {p.palavras_chave}") for p in self.products]
+        try:
+            from modules.ai.catalog_vectors import CatalogIndex, frases_produto
+
+            self._indice = CatalogIndex([
+                [normalize_text(f) for f in frases_produto(p.nome, p.palavras_chave)] for p in self.products
+            ])
+        except Exception as exc:
+            # Sem índice, find_matches segue só com o fuzzy
+            logger.warning(f"Busca por n-gramas do catálogo indisponível: {exc}")
+            self._indice = None
         self._products_loaded = True
 
     def find_matches(self, text_objeto: str, threshold: float = 0.75):
+        return self.find_matches_batch([text_objeto], threshold=threshold)[0]
+
+    def find_matches_batch(self, textos, threshold: float = 0.75):
+        """
+        Candidatos do catálogo para vários textos de uma vez (um produto de
+        matrizes esparsas para todos).
+
+        Para cada texto, retorna [(produto, score)] em ordem decrescente. Só
+        textos com contexto laboratorial têm candidatos. Os hits do fuzzy
+        (score = token_set_ratio >= threshold, como antes) têm prioridade; só
+        quando não há nenhum entram os da busca por n-gramas (score = containment
+        >= VETOR_LIMIAR, top VETOR_TOP_K). As duas escalas nunca se misturam
+        na mesma lista.
+        """
         self._ensure_products_loaded()
+        resultados = [[] for _ in textos]
         if not self.products:
-            return []
-        if not tem_contexto_laboratorial(text_objeto):
-            return []
-
-        text_norm = normalize_text(text_objeto)
-        matches = []
-        for produto in self.products:
-            rep = normalize_text(f"{produto.nome} {produto.palavras_chave}")
-            score = fuzz.token_set_ratio(text_norm, rep) / 100.0
-            if score >= threshold:
-                matches.append((produto, float(score)))
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches
+            return resultados
+
+        normalizados = [normalize_text(t) for t in textos]
+        com_contexto = [tem_contexto_laboratorial(t) for t in textos]
+
+        similaridades = None
+        linhas_vetor = [i for i, ok in enumerate(com_contexto) if ok]
+        if self._indice is not None and linhas_vetor:
+            try:
+                from modules.ai.catalog_vectors import top_k
+
+                similaridades = self._indice.similaridades([normalizados[i] for i in linhas_vetor])
+                vizinhos = top_k(similaridades, VETOR_TOP_K)
+            except Exception as exc:
+                logger.warning(f"Falha na busca por n-gramas: {exc}")
+                similaridades = None
+
+        for linha, text_norm in enumerate(normalizados):
+            if not com_contexto[linha]:
+                continue
+            matches = []
+            for produto, rep in zip(self.products, self._product_texts):
+                score = fuzz.token_set_ratio(text_norm, rep) / 100.0
+                if score >= threshold:
+                    matches.append((produto, float(score)))
+            matches.sort(key=lambda x: x[1], reverse=True)
+            resultados[linha] = matches
+
+        if similaridades is not None:
+            for posicao, linha in enumerate(linhas_vetor):
+                if resultados[linha]:
+                    continue
+                resultados[linha] = [
+                    (self.products[j], float(similaridades[posicao, j]))
+                    for j in vizinhos[posicao]
+                    if similaridades[posicao, j] >= VETOR_LIMIAR
+                ]
+        return resultados
 
     def verify_match(self, item_licitacao: str, produto_catalogo: str) -> bool:
         max_retries = 3
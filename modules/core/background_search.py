@@ -9,6 +9,7 @@ from datetime import datetime
 from modules.database.database import get_session, AgentRun
 from modules.core.search_engine import SearchEngine
 from modules.utils.logging_config import get_logger
+from modules.utils.search_progress import search_progress
 
 logger = get_logger(__name__)
 
@@ -34,6 +35,8 @@ class BackgroundSearchManager:
         self._initialized = True
         self._current_thread = None
         self._current_run_id = None
+        # Sinal de cancelamento da busca corrente (interrompe os scrapers)
+        self._cancelamento = threading.Event()
         
         # Limpa execuções órfãs (ficaram "running" após restart)
         self._cleanup_orphan_runs()
@@ -75,6 +78,17 @@ class BackgroundSearchManager:
     
     def get_current_status(self) -> dict:
         """Retorna o status atual da busca"""
+        # Busca rodando neste processo: contadores em memória, sem consultar o banco
+        if search_progress.is_running():
+            progresso = search_progress.snapshot()
+            elapsed = int(progresso["elapsed_seconds"] or 0)
+            progresso["elapsed_seconds"] = elapsed
+            progresso["message"] = (
+                f"Busca em andamento... ({elapsed}s) - "
+                f"{progresso['aprovados']} aprovadas, {progresso['persistidos']} importadas"
+            )
+            return progresso
+        
         try:
             session = get_session()
             
@@ -142,11 +156,12 @@ class BackgroundSearchManager:
         session.close()
         
         self._current_run_id = run_id
+        self._cancelamento = threading.Event()
         
         # Inicia thread de busca
         self._current_thread = threading.Thread(
             target=self._execute_search,
-            args=(run_id, dias, estados, fontes),
+            args=(run_id, dias, estados, fontes, self._cancelamento),
             daemon=True
         )
         self._current_thread.start()
@@ -157,10 +172,12 @@ class BackgroundSearchManager:
             "message": "Busca iniciada em background. Você pode navegar pelo sistema."
         }
     
-    def _execute_search(self, run_id: int, dias: int, estados: list, fontes: list = None):
+    def _execute_search(self, run_id: int, dias: int, estados: list, fontes: list = None,
+                        cancelamento: threading.Event = None):
         """Executa a busca (roda em thread separada)"""
         session = get_session()
         run = session.query(AgentRun).get(run_id)
+        search_progress.start(run_id)
         
         try:
             engine = SearchEngine()
@@ -170,7 +187,12 @@ class BackgroundSearchManager:
             session.commit()
             
             # Executa busca (passa fontes selecionadas)
-            novos = engine.execute_full_search(dias=dias, estados=estados, fontes=fontes)
+            novos = engine.execute_full_search(dias=dias, estados=estados, fontes=fontes,
+                                               cancelamento=cancelamento)
+            if cancelamento is not None and cancelamento.is_set():
+                # cancel_search já marcou a execução como cancelada
+                logger.info("Busca %s cancelada", run_id)
+                return
             
             # Atualiza resultado
             run.status = 'completed'
@@ -178,6 +200,7 @@ class BackgroundSearchManager:
             run.total_novos = novos
             run.resumo = f"✅ Concluído! {novos} novas licitações importadas."
             session.commit()
+            search_progress.finish("completed", run.resumo)
             
             # Envia notificação de conclusão via WhatsApp
             # self._notify_completion(session, novos) # Desabilitado para economizar quota
@@ -186,6 +209,7 @@ class BackgroundSearchManager:
             logger.info("Busca %s concluida: %s novos", run_id, novos)
             
         except Exception as e:
+            search_progress.finish("error", f"❌ Erro: {str(e)[:200]}")
             run.status = 'error'
             run.finished_at = datetime.now()
             run.resumo = f"❌ Erro: {str(e)[:200]}"
@@ -241,6 +265,9 @@ class BackgroundSearchManager:
         """Tenta cancelar a busca atual (marca como cancelada no banco)"""
         if not self.is_running():
             return {"success": False, "message": "Nenhuma busca em andamento"}
+
+        # Interrompe os scrapers na próxima requisição
+        self._cancelamento.set()
         
         session = get_session()
         run = session.query(AgentRun).filter_by(status='running').first()
@@ -250,6 +277,7 @@ class BackgroundSearchManager:
             run.finished_at = datetime.now()
             run.resumo = "Busca cancelada pelo usuário"
             session.commit()
+            search_progress.finish("cancelled", run.resumo)
         
         session.close()
         
@@ -103,8 +103,8 @@ class DeepAnalyzer:
                     except:
                         pass
             
-            # 1. Coleta todos os PDFs do edital
-            texto_completo = ""
+            # 1. Coleta todos os PDFs do edital (cada um extraído em paralelo por páginas)
+            partes_texto = []
             pdfs_analisados = []
             
             if lic.pncp_id and '-' in lic.pncp_id:
@@ -123,10 +123,11 @@ class DeepAnalyzer:
                                 if pdf_content:
                                     texto = self.pdf_extractor.extract_text(pdf_content)
                                     if texto:
-                                        texto_completo += f"\n\n=== {nome} ===\n{texto}"
+                                        partes_texto.append(f"\n\n=== {nome} ===\n{texto}")
                                         pdfs_analisados.append(nome)
                             except Exception as e:
                                 print(f"Erro ao baixar {nome}: {e}")
+            texto_completo = "".join(partes_texto)
             
             # 2. Busca itens da API (se ainda não tiver)
             itens_db = list(lic.itens)
@@ -0,0 +1,314 @@
+"""
+Backfill histórico dos diários oficiais
+Os scrapers de diário leem só a edição do dia: um dia perdido não volta, e uma
+instalação nova começa sem histórico. Aqui:
+  - as edições de um intervalo de datas (fonte x dia) são enumeradas pela
+    página de cada edição (DiarioMunicipalScraper.url_edicao), cujo padrão
+    precisa estar configurado por fonte (sem ele a fonte é recusada);
+  - download e extração rodam em paralelo, limitados por BACKFILL_CONEXOES
+    requisições simultâneas e por um orçamento de bytes baixados na execução;
+  - cada edição concluída é gravada no checkpoint logo depois dos avisos irem
+    para o banco: uma execução interrompida (Ctrl+C, queda, orçamento esgotado)
+    recomeça pelas edições que faltam.
+
+Estados no checkpoint (data/cache/diarios/backfill.json):
+    ok          edição processada, avisos gravados
+    sem_edicao  página do dia sem PDF (fim de semana, feriado)
+    repetida    mesmo PDF de outro dia (o portal ignorou a data)
+Falhas de rede/PDF não são gravadas: a edição é tentada de novo na próxima execução.
+
+Um dia cuja página devolve o mesmo PDF da página inicial (edição atual) também
+não é gravado ("atual"): ou é a edição de hoje, que o scraper diário já coleta,
+ou o portal ignorou a data (DIARIO_EDICAO_URL errado) e o PDF ficaria
+registrado com a data de um dia passado. Na próxima execução, com outra edição
+na página inicial, o dia é tentado de novo.
+
+Uso:
+    from modules.core.diario_backfill import executar_backfill
+    resumo = executar_backfill(["femurn", "famup"], date(2025, 1, 1), date(2025, 1, 31))
+"""
+import concurrent.futures
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.core.opportunity_collector import SCRAPERS_MAP
+from modules.scrapers.diario_cache import DIARIOS_CACHE_DIR
+from modules.scrapers.diario_enrichment import diario_enriquecedor
+from modules.scrapers.external_scrapers import DiarioMunicipalScraper
+from modules.scrapers.runtime import sufixo_env
+from modules.scrapers.pncp_client import PNCPClient
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Requisições simultâneas (página + PDF) contra os portais
+BACKFILL_CONEXOES = int(os.getenv("BACKFILL_CONEXOES", "4"))
+# Bytes de PDF baixados por execução
+BACKFILL_MAX_MB = int(os.getenv("BACKFILL_MAX_MB", "500"))
+
+CHECKPOINT_PATH = DIARIOS_CACHE_DIR / 'backfill.json'
+
+ESTADOS_CONCLUIDOS = ("ok", "sem_edicao", "repetida")
+
+
+def fontes_diario() -> List[str]:
+    """Chaves do SCRAPERS_MAP que são diários (aceitam backfill)"""
+    return [chave for chave, (cls, _) in SCRAPERS_MAP.items() if issubclass(cls, DiarioMunicipalScraper)]
+
+
+class OrcamentoBytes:
+    """Bytes baixados na execução (thread-safe)"""
+
+    def __init__(self, limite: int):
+        self.limite = limite
+        self.usados = 0
+        self._lock = threading.Lock()
+
+    def consumir(self, n: int):
+        with self._lock:
+            self.usados += n
+
+    def esgotado(self) -> bool:
+        with self._lock:
+            return self.usados >= self.limite
+
+
+class CheckpointBackfill:
+    """Edições concluídas por fonte, gravadas de forma atômica a cada edição"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or CHECKPOINT_PATH)
+        self._lock = threading.Lock()
+        self.dados = self._carregar()
+        # URL do PDF -> dia que a processou (detecta portal ignorando a data)
+        self._pdfs: Dict[str, Dict[str, str]] = {}
+        for origem, edicoes in self.dados['edicoes'].items():
+            for dia, edicao in edicoes.items():
+                if edicao.get('pdf') and edicao.get('status') == 'ok':
+                    self._pdfs.setdefault(origem, {})[edicao['pdf']] = dia
+
+    def _carregar(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (FileNotFoundError, ValueError):
+            dados = {}
+        dados.setdefault('edicoes', {})
+        dados.setdefault('bytes', 0)
+        return dados
+
+    def _salvar(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.dados, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def concluida(self, origem: str, dia: date) -> bool:
+        edicao = self.dados['edicoes'].get(origem, {}).get(dia.isoformat())
+        return bool(edicao) and edicao.get('status') in ESTADOS_CONCLUIDOS
+
+    def reservar_pdf(self, origem: str, pdf_url: str, dia: date) -> Optional[str]:
+        """Marca o PDF como do `dia`; devolve o outro dia se ele já tinha dono"""
+        with self._lock:
+            pdfs = self._pdfs.setdefault(origem, {})
+            dono = pdfs.get(pdf_url)
+            if dono and dono != dia.isoformat():
+                return dono
+            pdfs[pdf_url] = dia.isoformat()
+            return None
+
+    def liberar_pdf(self, origem: str, pdf_url: str):
+        with self._lock:
+            self._pdfs.get(origem, {}).pop(pdf_url, None)
+
+    def registrar(self, origem: str, dia: date, edicao: Dict[str, Any]):
+        with self._lock:
+            edicao = dict(edicao, concluida_em=datetime.now().isoformat())
+            self.dados['edicoes'].setdefault(origem, {})[dia.isoformat()] = edicao
+            self.dados['bytes'] += edicao.get('bytes', 0)
+            self._salvar()
+
+    def reiniciar(self, origens: List[str]):
+        """Esquece as edições concluídas das fontes (reprocessa o intervalo)"""
+        with self._lock:
+            for origem in origens:
+                self.dados['edicoes'].pop(origem, None)
+                self._pdfs.pop(origem, None)
+            self._salvar()
+
+
+def _salvar_no_banco(resultados: List[Dict[str, Any]]):
+    from modules.core.search_engine import SearchEngine
+
+    # Histórico não dispara alertas imediatos
+    SearchEngine().run_search_pipeline(resultados, send_immediate_alerts=False)
+
+
+def executar_backfill(
+    fontes: List[str],
+    inicio: date,
+    fim: date,
+    *,
+    max_bytes: int = BACKFILL_MAX_MB * 1024 * 1024,
+    conexoes: int = BACKFILL_CONEXOES,
+    enriquecer: bool = True,
+    reiniciar: bool = False,
+    checkpoint: Optional[CheckpointBackfill] = None,
+    salvar: Callable[[List[Dict[str, Any]]], Any] = _salvar_no_banco,
+) -> Dict[str, int]:
+    """
+    Processa as edições de `inicio` a `fim` (inclusive) das fontes de diário.
+
+    Args:
+        fontes: Chaves do SCRAPERS_MAP (ver fontes_diario()); cada uma precisa de
+            padrão de página de edição (DIARIO_EDICAO_URL_<FONTE> ou DIARIO_EDICAO_URL)
+        inicio / fim: Intervalo de datas das edições
+        max_bytes: Orçamento de download da execução; ao esgotar, as edições
+            restantes ficam para a próxima execução
+        conexoes: Edições processadas ao mesmo tempo
+        enriquecer: IA nos avisos aprovados (o que passar do orçamento de IA fica pendente)
+        reiniciar: Ignora o checkpoint das fontes e reprocessa o intervalo
+        checkpoint: Checkpoint (padrão: data/cache/diarios/backfill.json)
+        salvar: Grava os avisos de uma edição (padrão: pipeline de busca, sem alertas)
+
+    Returns:
+        Contagem por estado ("ok", "sem_edicao", "repetida", "atual", "falha",
+        "adiada", "ja_concluida") + "avisos" e "bytes" baixados
+
+    Raises:
+        ValueError: fonte desconhecida ou sem padrão de edição, intervalo invertido
+    """
+    desconhecidas = [f for f in fontes if f not in fontes_diario()]
+    if desconhecidas:
+        raise ValueError(f"Fontes sem backfill: {', '.join(desconhecidas)} (disponíveis: {', '.join(fontes_diario())})")
+    if fim < inicio:
+        raise ValueError("Data final anterior à inicial")
+
+    checkpoint = checkpoint or CheckpointBackfill()
+    scrapers: Dict[str, DiarioMunicipalScraper] = {}
+    for fonte in fontes:
+        scraper = SCRAPERS_MAP[fonte][0]()
+        scraper.enrich_enabled = enriquecer
+        scrapers[scraper.ORIGEM] = scraper
+    # Sem padrão de edição conferido a data seria adivinhada: recusa antes de baixar algo
+    sem_padrao = [origem for origem, scraper in scrapers.items() if scraper.url_edicao(inicio) is None]
+    if sem_padrao:
+        raise ValueError(
+            "Fontes sem página de edição configurada: "
+            + ", ".join(f"{o} (DIARIO_EDICAO_URL_{sufixo_env(o)})" for o in sem_padrao)
+            + "; defina o padrão conferido no portal (ou DIARIO_EDICAO_URL para todas)"
+        )
+    if reiniciar:
+        checkpoint.reiniciar(list(scrapers))
+
+    orcamento = OrcamentoBytes(max_bytes)
+    termos_negativos = PNCPClient.TERMOS_NEGATIVOS_PADRAO
+    resumo = {"ok": 0, "sem_edicao": 0, "repetida": 0, "atual": 0, "falha": 0, "adiada": 0,
+              "ja_concluida": 0, "avisos": 0, "bytes": 0}
+    if enriquecer:
+        diario_enriquecedor.nova_execucao()
+
+    # Dia a dia, intercalando as fontes: uma interrupção deixa o intervalo
+    # coberto de forma contínua em todas elas
+    edicoes = []
+    for n in range((fim - inicio).days + 1):
+        dia = inicio + timedelta(days=n)
+        for origem, scraper in scrapers.items():
+            if checkpoint.concluida(origem, dia):
+                resumo["ja_concluida"] += 1
+            else:
+                edicoes.append((scraper, dia))
+
+    # PDF da edição atual (página inicial) de cada fonte
+    atuais: Dict[str, Optional[str]] = {}
+    for origem, scraper in scrapers.items():
+        try:
+            atuais[origem] = scraper.pdf_da_pagina(scraper.BASE_URL)
+        except Exception as e:
+            logger.warning(f"Backfill {origem}: sem a edição atual para comparar ({e})")
+            atuais[origem] = None
+
+    def processar(scraper: DiarioMunicipalScraper, dia: date):
+        if orcamento.esgotado():
+            return {"status": "adiada"}, []
+        pdf_url = scraper.pdf_da_pagina(scraper.url_edicao(dia))
+        if not pdf_url:
+            return {"status": "sem_edicao"}, []
+        if pdf_url == atuais[scraper.ORIGEM]:
+            return {"status": "atual", "pdf": pdf_url}, []
+        dono = checkpoint.reservar_pdf(scraper.ORIGEM, pdf_url, dia)
+        if dono:
+            return {"status": "repetida", "pdf": pdf_url, "igual_a": dono}, []
+        try:
+            resultados, info = scraper.processar_edicao(
+                pdf_url, termos_negativos=termos_negativos, publicado_em=datetime.combine(dia, time())
+            )
+        except Exception:
+            checkpoint.liberar_pdf(scraper.ORIGEM, pdf_url)
+            raise
+        orcamento.consumir(info["bytes"])
+        edicao = {"status": "ok", "pdf": pdf_url, "sha256": info["sha256"],
+                  "bytes": info["bytes"], "avisos": len(resultados)}
+        return edicao, resultados
+
+    logger.info(f"Backfill de diários: {len(edicoes)} edições pendentes ({inicio} a {fim}, "
+                f"{', '.join(scrapers)}), {conexoes} conexões, orçamento {max_bytes // (1024 * 1024)} MB")
+
+    # Edições respondidas (não adiadas/falhas) e quantas eram a atual, por fonte
+    respondidas: Dict[str, int] = {}
+    iguais_atual: Dict[str, int] = {}
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, conexoes))
+    try:
+        futuros = {executor.submit(processar, scraper, dia): (scraper.ORIGEM, dia) for scraper, dia in edicoes}
+        for futuro in concurrent.futures.as_completed(futuros):
+            origem, dia = futuros[futuro]
+            try:
+                edicao, resultados = futuro.result()
+            except Exception as e:
+                resumo["falha"] += 1
+                logger.warning(f"Backfill {origem} {dia}: {e}")
+                continue
+
+            status = edicao["status"]
+            resumo[status] += 1
+            if status == "adiada":
+                continue
+            respondidas[origem] = respondidas.get(origem, 0) + 1
+            if status == "atual":
+                iguais_atual[origem] = iguais_atual.get(origem, 0) + 1
+                continue
+            if resultados:
+                for r in resultados:
+                    r.setdefault("fonte", origem)
+                    r.setdefault("origem", origem)
+                try:
+                    salvar(resultados)
+                except Exception as e:
+                    # Sem gravar no banco a edição não conta como concluída
+                    resumo["ok"] -= 1
+                    resumo["falha"] += 1
+                    checkpoint.liberar_pdf(origem, edicao["pdf"])
+                    logger.warning(f"Backfill {origem} {dia}: falha ao gravar avisos: {e}")
+                    continue
+            resumo["avisos"] += len(resultados)
+            resumo["bytes"] += edicao.get("bytes", 0)
+            checkpoint.registrar(origem, dia, edicao)
+    finally:
+        # Ctrl+C: edições ainda não iniciadas são descartadas (ficam para a próxima execução)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    for origem, n in iguais_atual.items():
+        if n > 1 and n == respondidas.get(origem):
+            logger.warning(f"Backfill {origem}: todas as {n} datas devolveram a edição atual; o portal "
+                           f"parece ignorar a data (ajuste DIARIO_EDICAO_URL)")
+
+    if resumo["adiada"]:
+        logger.info(f"Backfill: orçamento de {max_bytes // (1024 * 1024)} MB esgotado; "
+                    f"{resumo['adiada']} edições ficam para a próxima execução")
+    return resumo
@@ -1,5 +1,6 @@
 import concurrent.futures
 import hashlib
+import threading
 from typing import Any, Dict, Iterable, List, Tuple
 
 from modules.scrapers.pncp_client import PNCPClient
@@ -13,7 +14,11 @@ from modules.scrapers.external_scrapers import (
     MaceioSaudeScraper,
     BncScraper,
 )
+from modules.scrapers.diario_enrichment import diario_enriquecedor
+from modules.scrapers.runtime import ExecucaoFonte
 from modules.utils.logging_config import get_logger
+from modules.utils.scraper_metrics import scraper_metrics
+from modules.utils.search_progress import search_progress
 
 logger = get_logger(__name__)
 
@@ -68,15 +73,20 @@ def collect_opportunities(
     termos_positivos: List[str] | None = None,
     termos_negativos: List[str] | None = None,
     apenas_abertas: bool = True,
+    cancelamento: threading.Event | None = None,
 ) -> List[Dict[str, Any]]:
     """
     Coleta oportunidades (PNCP + fontes externas) em um formato compatível com o pipeline do sistema.
 
     - Gera `pncp_id` estável para entradas externas sem ID, evitando dedupe incorreto.
     - Remove entradas de erro dos scrapers (ex.: PDF indisponível).
+    - Cada fonte roda no runtime comum (modules/scrapers/runtime.py): transporte
+      compartilhado, orçamentos de tempo/bytes e métricas em ScraperMetricsCollector.
+    - `cancelamento.set()` interrompe as fontes na próxima requisição.
     """
     estados = estados or ["RN", "PB", "PE", "AL"]
     resultados_raw: List[Dict[str, Any]] = []
+    cancelamento = cancelamento or threading.Event()
 
     client = PNCPClient()
 
@@ -89,8 +99,16 @@ def collect_opportunities(
             if key in fontes:
                 scrapers_ativos.append(value)
 
+    # Uma execução (run de métricas + orçamentos) por fonte, criadas antes das threads
+    execucoes: Dict[str, ExecucaoFonte] = {}
+    if usar_pncp:
+        execucoes["PNCP"] = ExecucaoFonte.com_orcamento("PNCP", cancelamento=cancelamento, metricas=scraper_metrics)
+    for _, name in scrapers_ativos:
+        execucoes[name] = ExecucaoFonte.com_orcamento(name, cancelamento=cancelamento, metricas=scraper_metrics)
+
     def fetch_pncp():
-        try:
+        def buscar(execucao: ExecucaoFonte):
+            client.execucao = execucao
             res = client.buscar_oportunidades(
                 dias_busca=dias,
                 estados=estados,
@@ -100,14 +118,13 @@ def collect_opportunities(
             )
             for r in res or []:
                 r.setdefault("fonte", "PNCP")
-            return res or []
-        except Exception as exc:
-            logger.warning("Erro PNCP: %s", exc, exc_info=True)
-            return []
+            return res
+
+        return execucoes["PNCP"].rodar(buscar)
 
     def fetch_external(ScraperCls: type, name: str):
-        try:
-            scraper = ScraperCls()
+        def buscar(execucao: ExecucaoFonte):
+            scraper = ScraperCls().vincular(execucao)
             termos_pos_externos = termos_positivos or getattr(client, "TERMOS_PRIORITARIOS", None) or client.TERMOS_POSITIVOS_PADRAO
             termos_neg_externos = termos_negativos or client.TERMOS_NEGATIVOS_PADRAO
             if name == "BNC":
@@ -124,10 +141,14 @@ def collect_opportunities(
             for r in res or []:
                 r.setdefault("fonte", name)
                 r.setdefault("origem", name)
-            return res or []
-        except Exception as exc:
-            logger.warning("Erro %s: %s", name, exc, exc_info=True)
-            return []
+            return res
+
+        res = execucoes[name].rodar(buscar, eh_erro=_is_error_entry)
+        search_progress.incr("aprovados", len(res))
+        return res
+
+    # Orçamento de IA da coleta, dividido entre os diários
+    diario_enriquecedor.nova_execucao()
 
     total_fontes = (1 if usar_pncp else 0) + len(scrapers_ativos)
     logger.info("Disparando coleta em %s fonte(s) (dias=%s, estados=%s, fontes=%s)", total_fontes, dias, estados, fontes or "TODAS")
@@ -149,15 +170,23 @@ def collect_opportunities(
     # Dedup e saneamento mínimo (IDs estáveis)
     vistos = set()
     consolidados: List[Dict[str, Any]] = []
-    for res in resultados_raw:
-        if not isinstance(res, dict) or _is_error_entry(res):
-            continue
-        _ensure_stable_id(res)
-        key = _compute_source_key(res)
-        if key in vistos:
-            continue
-        vistos.add(key)
-        consolidados.append(res)
+    duplicados: Dict[str, int] = {}
+    try:
+        for res in resultados_raw:
+            if not isinstance(res, dict) or _is_error_entry(res):
+                continue
+            _ensure_stable_id(res)
+            key = _compute_source_key(res)
+            if key in vistos:
+                fonte = res.get("fonte")
+                duplicados[fonte] = duplicados.get(fonte, 0) + 1
+                continue
+            vistos.add(key)
+            consolidados.append(res)
+    finally:
+        for name, execucao in execucoes.items():
+            execucao.registrar_duplicados(duplicados.get(name, 0))
+            execucao.finalizar()
 
     return consolidados
 
@@ -2,12 +2,15 @@ import concurrent.futures
 from datetime import datetime
 import unicodedata
 import json
+import time
 
 from modules.database.database import get_session, Licitacao, ItemLicitacao, Produto, Configuracao, LicitacaoFeature
 from modules.scrapers.pncp_client import PNCPClient
 from modules.ai.improved_matcher import SemanticMatcher
 from modules.utils.notifications import WhatsAppNotifier
 from modules.utils.notification_cache import notification_cache
+from modules.utils.metrics import ALERT_DISPATCH, PIPELINE_STAGE_SECONDS
+from modules.utils.search_progress import search_progress
 from modules.core.opportunity_collector import collect_opportunities
 from modules.utils.logging_config import get_logger
 
@@ -48,7 +51,12 @@ class SearchEngine:
         produtos = session.query(Produto).all()
         
         count = 0
-        for item in licitacao.itens:
+        itens = list(licitacao.itens)
+        # Candidatos de todos os itens de uma vez (fuzzy ou, sem hit fuzzy, n-gramas por keyword)
+        candidatos_por_item = self.semantic_matcher.find_matches_batch(
+            [item.descricao or "" for item in itens], threshold=0.70
+        )
+        for item, candidates in zip(itens, candidatos_por_item):
             item_desc = item.descricao or ""
             melhor_match = None
             melhor_score = 0
@@ -63,23 +71,20 @@ class SearchEngine:
             # vamos usar o SemanticMatcher que já tem cache e é "Improved")
             
             # Vamos usar uma abordagem híbrida poderosa:
-            # Busca candidatos pelo SemanticMatcher (Embeddings)
-            candidates = self.semantic_matcher.find_matches(item_desc, threshold=0.70)
-            
+            # Candidatos do SemanticMatcher (fuzzy >= 0.70 ou keyword contida >= VETOR_LIMIAR)
             if candidates:
-                top_prod, score_emb = candidates[0]
+                top_prod, _score = candidates[0]
                 
                 # 2. Fase Impecável: Validação LLM
-                # Se o score é bom mas não perfeito, pergunta pra IA
-                if score_emb >= 0.70:
-                    is_compatible = self.semantic_matcher.verify_match(item_desc, top_prod.nome)
-                    
-                    if is_compatible:
-                        melhor_match = top_prod
-                        melhor_score = 95 # Confiança IA
-                    else:
-                        # IA disse que não é compatível (ex: Limpeza chão vs Limpeza Lab)
-                        melhor_score = 0
+                # O melhor candidato (fuzzy ou n-gramas, já filtrado por contexto) passa pela IA
+                is_compatible = self.semantic_matcher.verify_match(item_desc, top_prod.nome)
+                
+                if is_compatible:
+                    melhor_match = top_prod
+                    melhor_score = 95 # Confiança IA
+                else:
+                    # IA disse que não é compatível (ex: Limpeza chão vs Limpeza Lab)
+                    melhor_score = 0
             
             if melhor_match:
                 item.produto_match_id = melhor_match.id
@@ -144,7 +149,8 @@ class SearchEngine:
         
         return True
 
-    def execute_full_search(self, dias=60, estados=['RN', 'PB', 'PE', 'AL'], fontes=None, callback=None):
+    def execute_full_search(self, dias=60, estados=['RN', 'PB', 'PE', 'AL'], fontes=None, callback=None,
+                            cancelamento=None):
         """
         Executa busca completa.
         
@@ -153,16 +159,22 @@ class SearchEngine:
             estados: Lista de UFs
             fontes: Lista de fontes a usar. Se None, usa todas. Ex: ['pncp', 'femurn', 'famup']
             callback: Função de callback para logs
+            cancelamento: threading.Event; quando setado, interrompe a coleta e não grava nada
         """
         self.log(f"Iniciando varredura. Dias={dias}, Estados={estados}, Fontes={fontes or 'TODAS'}...", callback)
-        resultados_raw = collect_opportunities(
-            dias=dias,
-            estados=estados,
-            fontes=fontes,
-            termos_positivos=self.client.TERMOS_POSITIVOS_PADRAO,
-            termos_negativos=self.client.TERMOS_NEGATIVOS_PADRAO,
-            apenas_abertas=True,
-        )
+        with PIPELINE_STAGE_SECONDS.time(etapa="coleta"):
+            resultados_raw = collect_opportunities(
+                dias=dias,
+                estados=estados,
+                fontes=fontes,
+                termos_positivos=self.client.TERMOS_POSITIVOS_PADRAO,
+                termos_negativos=self.client.TERMOS_NEGATIVOS_PADRAO,
+                apenas_abertas=True,
+                cancelamento=cancelamento,
+            )
+        if cancelamento is not None and cancelamento.is_set():
+            self.log("Busca cancelada: resultados da coleta descartados", callback)
+            return 0
         self.log(f"Total de oportunidades encontradas (dedupe aplicado): {len(resultados_raw)}", callback)
         return self.run_search_pipeline(resultados_raw, callback)
 
@@ -171,8 +183,10 @@ class SearchEngine:
         Executa o pipeline completo: Filtro -> Async Fetch -> Save -> Match -> Alert
         """
         self.log("Iniciando pipeline de processamento...", callback)
+        search_progress.set_stage("filtro")
         session = get_session()
         high_priority_alerts = []
+        inicio_etapa = time.perf_counter()
         
         # 1. Filtro Data
         resultados = []
@@ -193,7 +207,10 @@ class SearchEngine:
             res['match_score'] = score
             resultados.append(res)
 
+        PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - inicio_etapa, etapa="filtro")
+
         # 2. Identifica Novos
+        inicio_etapa = time.perf_counter()
         candidatos_novos = []
         for res in resultados:
             pncp_id = res.get("pncp_id")
@@ -203,9 +220,12 @@ class SearchEngine:
             if not exists:
                 candidatos_novos.append(res)
 
+        PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - inicio_etapa, etapa="novos")
         self.log(f"Novas licitações para processar: {len(candidatos_novos)}", callback)
+        search_progress.set_stage("itens", f"{len(candidatos_novos)} novas licitações")
 
         # 3. Async Fetch
+        inicio_etapa = time.perf_counter()
         if candidatos_novos:
             with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
                 pncp_candidates = [
@@ -221,12 +241,18 @@ class SearchEngine:
                     res = future_to_res[future]
                     try:
                         res['_itens_preloaded'] = future.result()
+                        search_progress.incr("itens_buscados", len(res['_itens_preloaded'] or []))
                     except Exception as exc:
                         logger.warning("Erro ao pré-carregar itens para %s: %s", res.get('pncp_id'), exc, exc_info=True)
                         res['_itens_preloaded'] = []
 
+        PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - inicio_etapa, etapa="itens")
+
         # 4. Salvar e Match
+        search_progress.set_stage("persistencia")
+        inicio_etapa = time.perf_counter()
         novos = 0
+        licitacoes_novas = []
         for res in candidatos_novos:
             lic = Licitacao(
                 pncp_id=res['pncp_id'],
@@ -242,6 +268,7 @@ class SearchEngine:
             )
             session.add(lic)
             session.flush() # Get ID
+            licitacoes_novas.append(lic)
 
             # Registra sinais para treino futuro (NLP/classificador)
             termos_hit = res.get('termos_encontrados') or []
@@ -257,6 +284,7 @@ class SearchEngine:
             itens_api = res.get("itens") or res.get("_itens_preloaded", [])
             if not itens_api and res.get("cnpj") and res.get("ano") and res.get("seq"):
                 itens_api = self.client.buscar_itens(res)
+                search_progress.incr("itens_buscados", len(itens_api or []))
             
             # --- DEEP SCAN DESABILITADO (causa lentidão extrema) ---
             # O Deep Scan baixa PDFs e usa IA para extrair itens, mas:
@@ -311,6 +339,7 @@ class SearchEngine:
                     "link": res.get('link')
                 }
                 high_priority_alerts.append(alert_data)
+                search_progress.incr("matches")
                 
                 if send_immediate_alerts:
                     # Verifica cache para não re-enviar (Fluxo Contínuo)
@@ -318,10 +347,27 @@ class SearchEngine:
                         # Envia alerta IMEDIATAMENTE
                         if self.enviar_relatorio_whatsapp([alert_data], session):
                             notification_cache.mark_as_sent(res.get("pncp_id"))
+                            search_progress.incr("alertas")
+                    else:
+                        ALERT_DISPATCH.inc(canal="whatsapp", resultado="duplicado")
             
             # Salva no banco IMEDIATAMENTE para aparecer no Dashboard
             session.commit()
             novos += 1
+            search_progress.incr("persistidos")
+
+        PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - inicio_etapa, etapa="persistencia")
+
+        # 5. Score ML das novas (uma predição em lote; o Dashboard ordena por ele no SQL)
+        if licitacoes_novas:
+            try:
+                from modules.ml.scoring import pontuar_licitacoes
+                with PIPELINE_STAGE_SECONDS.time(etapa="score_ml"):
+                    pontuar_licitacoes(session, licitacoes_novas)
+                    session.commit()
+            except Exception as exc:
+                session.rollback()
+                logger.warning("Falha ao calcular score ML das novas licitações: %s", exc, exc_info=True)
 
         session.close()
         
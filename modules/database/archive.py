@@ -0,0 +1,390 @@
+"""
+Arquivamento de licitações expiradas (hot/archive split).
+
+Licitações com prazo encerrado há mais de N dias saem das tabelas quentes
+(`licitacoes`, `itens_licitacao`, `licitacao_features` e os `alerts_sent` que
+apontam para elas) e vão para um banco
+SQLite separado (`data/medcal_archive.db`). No arquivo cada licitação vira
+uma única linha: colunas de filtro em claro + itens/features/alertas em JSON
+comprimido (zlib), o que mantém o arquivo compacto.
+
+Com Turso, a tabela de arquivo fica no próprio banco sincronizado (as
+licitações saem da nuvem, então o arquivo também precisa estar lá): cada lote
+é gravado e sincronizado antes de ser removido das tabelas quentes. Sem Turso,
+o arquivo é o SQLite local `data/medcal_archive.db`.
+
+Uso:
+    from modules.database.archive import arquivar_licitacoes_expiradas
+
+    arquivar_licitacoes_expiradas(dias_apos_prazo=30)
+
+    python -m modules.database.archive --dias 30
+"""
+import json
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, LargeBinary, String, func
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from modules.utils.logging_config import get_logger
+from .database import (
+    AlertSent,
+    ItemLicitacao,
+    Licitacao,
+    LicitacaoFeature,
+    _add_missing_columns,
+    create_db_engine,
+    get_engine,
+    get_session,
+    keyset_filter,
+)
+from .database_config import get_sqlite_path, is_using_turso, sync_with_turso
+
+logger = get_logger(__name__)
+
+ArchiveBase = declarative_base()
+
+# Status que nunca são arquivados automaticamente (fixadas pelo usuário)
+STATUS_PROTEGIDOS = ("Salva",)
+
+
+class LicitacaoArquivada(ArchiveBase):
+    """Licitação arquivada: mesmas colunas de filtro + itens/features comprimidos"""
+    __tablename__ = 'licitacoes_arquivadas'
+
+    id = Column(Integer, primary_key=True)  # Mesmo id da tabela quente
+    pncp_id = Column(String, unique=True, index=True)
+    orgao = Column(String)
+    uf = Column(String, index=True)
+    modalidade = Column(String)
+    data_sessao = Column(DateTime)
+    data_publicacao = Column(DateTime)
+    data_inicio_proposta = Column(DateTime)
+    data_encerramento_proposta = Column(DateTime)
+    objeto = Column(String)
+    link = Column(String)
+    status = Column(String, index=True)
+    categoria = Column(String, nullable=True)
+    comentarios = Column(String)
+    data_captura = Column(DateTime)
+    score_relevancia = Column(Float, nullable=True)
+    score_modelo = Column(String, nullable=True)
+    status_atualizado_em = Column(DateTime, nullable=True)
+    num_itens = Column(Integer, default=0)
+    num_matches = Column(Integer, default=0)
+    payload = Column(LargeBinary)  # zlib(JSON): itens, features, alertas, analise_profunda_json
+    arquivado_em = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index('idx_arquivadas_publicacao_id', 'data_publicacao', 'id'),
+    )
+
+    def load_payload(self) -> Dict[str, Any]:
+        if not self.payload:
+            return {}
+        return json.loads(zlib.decompress(self.payload).decode("utf-8"))
+
+    def to_dict(self, incluir_itens: bool = True) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "pncp_id": self.pncp_id,
+            "orgao": self.orgao,
+            "uf": self.uf,
+            "modalidade": self.modalidade,
+            "data_sessao": self.data_sessao,
+            "data_publicacao": self.data_publicacao,
+            "data_inicio_proposta": self.data_inicio_proposta,
+            "data_encerramento_proposta": self.data_encerramento_proposta,
+            "objeto": self.objeto,
+            "link": self.link,
+            "status": self.status,
+            "categoria": self.categoria,
+            "comentarios": self.comentarios,
+            "data_captura": self.data_captura,
+            "score_relevancia": self.score_relevancia,
+            "score_modelo": self.score_modelo,
+            "status_atualizado_em": self.status_atualizado_em,
+            "num_itens": self.num_itens or 0,
+            "num_matches": self.num_matches or 0,
+            "arquivada": True,
+        }
+        if incluir_itens:
+            payload = self.load_payload()
+            data["itens"] = payload.get("itens", [])
+            data["features"] = payload.get("features", [])
+            data["alertas"] = payload.get("alertas", [])
+            data["analise_profunda_json"] = payload.get("analise_profunda_json")
+        return data
+
+
+# === ENGINE DO ARQUIVO (sob demanda) ===
+
+_archive_engine = None
+_archive_lock = threading.Lock()
+ArchiveSession = sessionmaker()
+
+
+def get_archive_engine():
+    global _archive_engine
+    if _archive_engine is not None:
+        return _archive_engine
+    with _archive_lock:
+        if _archive_engine is None:
+            if is_using_turso():
+                # Mesmo banco (replica) das tabelas quentes: vai para a nuvem no sync
+                engine = get_engine()
+            else:
+                engine = create_db_engine(f"sqlite:///{get_sqlite_path('medcal_archive')}")
+            ArchiveBase.metadata.create_all(engine)
+            # Arquivos anteriores às colunas de score/status_atualizado_em
+            _add_missing_columns(engine, ArchiveBase.metadata)
+            ArchiveSession.configure(bind=engine)
+            _archive_engine = engine
+    return _archive_engine
+
+
+def get_archive_session():
+    get_archive_engine()
+    return ArchiveSession()
+
+
+# === ARQUIVAMENTO ===
+
+def _serialize_dt(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _to_archive_row(
+    lic: Licitacao,
+    itens: List[ItemLicitacao],
+    features: List[LicitacaoFeature],
+    alertas: List[AlertSent],
+) -> LicitacaoArquivada:
+    payload = {
+        "itens": [
+            {
+                "id": i.id,
+                "numero_item": i.numero_item,
+                "descricao": i.descricao,
+                "quantidade": i.quantidade,
+                "unidade": i.unidade,
+                "valor_estimado": i.valor_estimado,
+                "valor_unitario": i.valor_unitario,
+                "produto_match_id": i.produto_match_id,
+                "match_score": i.match_score,
+            }
+            for i in itens
+        ],
+        "features": [
+            {
+                "fonte": f.fonte,
+                "motivo_aprovacao": f.motivo_aprovacao,
+                "termos_encontrados": f.termos_encontrados,
+                "objeto_resumido": f.objeto_resumido,
+                "criado_em": _serialize_dt(f.criado_em),
+            }
+            for f in features
+        ],
+        "alertas": [
+            {
+                "run_id": a.run_id,
+                "destino": a.destino,
+                "mensagem": a.mensagem,
+                "enviado_em": _serialize_dt(a.enviado_em),
+                "sucesso": a.sucesso,
+            }
+            for a in alertas
+        ],
+        "analise_profunda_json": lic.analise_profunda_json,
+    }
+    blob = zlib.compress(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"), 9)
+
+    return LicitacaoArquivada(
+        id=lic.id,
+        pncp_id=lic.pncp_id,
+        orgao=lic.orgao,
+        uf=lic.uf,
+        modalidade=lic.modalidade,
+        data_sessao=lic.data_sessao,
+        data_publicacao=lic.data_publicacao,
+        data_inicio_proposta=lic.data_inicio_proposta,
+        data_encerramento_proposta=lic.data_encerramento_proposta,
+        objeto=lic.objeto,
+        link=lic.link,
+        status=lic.status,
+        categoria=lic.categoria,
+        comentarios=lic.comentarios,
+        data_captura=lic.data_captura,
+        score_relevancia=lic.score_relevancia,
+        score_modelo=lic.score_modelo,
+        status_atualizado_em=lic.status_atualizado_em,
+        num_itens=len(itens),
+        num_matches=sum(1 for i in itens if i.produto_match_id is not None),
+        payload=blob,
+        arquivado_em=datetime.now(),
+    )
+
+
+def arquivar_licitacoes_expiradas(
+    dias_apos_prazo: int = 30,
+    status_protegidos=STATUS_PROTEGIDOS,
+    lote: int = 200,
+) -> Dict[str, Any]:
+    """
+    Move licitações com `data_encerramento_proposta` anterior a hoje - N dias
+    (e seus itens/features/alertas enviados) para o banco de arquivo.
+
+    Cada lote é gravado no arquivo (e, com Turso, sincronizado) antes de ser
+    removido das tabelas quentes; se o processo cair no meio, o próximo run
+    regrava o lote. Uma licitação recoletada depois de arquivada (novo id, mesmo
+    pncp_id) substitui a versão arquivada.
+
+    Returns:
+        dict com total arquivado, itens movidos e data de corte
+    """
+    corte = datetime.now() - timedelta(days=max(int(dias_apos_prazo), 0))
+    total = 0
+    total_itens = 0
+
+    session = get_session()
+    archive = get_archive_session()
+    try:
+        query = session.query(Licitacao.id).filter(
+            Licitacao.data_encerramento_proposta.isnot(None),
+            Licitacao.data_encerramento_proposta < corte,
+        )
+        if status_protegidos:
+            query = query.filter(
+                (Licitacao.status.is_(None)) | (~Licitacao.status.in_(list(status_protegidos)))
+            )
+        ids = [row.id for row in query.order_by(Licitacao.id)]
+
+        for inicio in range(0, len(ids), lote):
+            ids_lote = ids[inicio:inicio + lote]
+
+            licitacoes = session.query(Licitacao).filter(Licitacao.id.in_(ids_lote)).all()
+            itens_por_lic: Dict[int, List[ItemLicitacao]] = {}
+            for item in session.query(ItemLicitacao).filter(ItemLicitacao.licitacao_id.in_(ids_lote)):
+                itens_por_lic.setdefault(item.licitacao_id, []).append(item)
+            features_por_lic: Dict[int, List[LicitacaoFeature]] = {}
+            for feat in session.query(LicitacaoFeature).filter(LicitacaoFeature.licitacao_id.in_(ids_lote)):
+                features_por_lic.setdefault(feat.licitacao_id, []).append(feat)
+            alertas_por_lic: Dict[int, List[AlertSent]] = {}
+            for alerta in session.query(AlertSent).filter(AlertSent.licitacao_id.in_(ids_lote)):
+                alertas_por_lic.setdefault(alerta.licitacao_id, []).append(alerta)
+
+            # 1) Grava no arquivo: substitui as versões anteriores (mesmo id de uma
+            #    regravação ou mesmo pncp_id de uma licitação recoletada, que é único)
+            pncp_ids = [lic.pncp_id for lic in licitacoes if lic.pncp_id]
+            anteriores = LicitacaoArquivada.id.in_(ids_lote)
+            if pncp_ids:
+                anteriores = anteriores | LicitacaoArquivada.pncp_id.in_(pncp_ids)
+            archive.query(LicitacaoArquivada).filter(anteriores).delete(synchronize_session=False)
+            archive.add_all([
+                _to_archive_row(
+                    lic, itens_por_lic.get(lic.id, []), features_por_lic.get(lic.id, []), alertas_por_lic.get(lic.id, [])
+                )
+                for lic in licitacoes
+            ])
+            archive.commit()
+            # Com Turso, o lote só sai das tabelas quentes depois de estar na nuvem
+            if is_using_turso() and not sync_with_turso(wait=True):
+                raise RuntimeError("Falha ao sincronizar o arquivo com o Turso; lote mantido nas tabelas quentes")
+
+            # 2) Remove das tabelas quentes (alertas inclusive: o id da licitação não existe mais)
+            session.query(AlertSent).filter(AlertSent.licitacao_id.in_(ids_lote)).delete(synchronize_session=False)
+            session.query(LicitacaoFeature).filter(LicitacaoFeature.licitacao_id.in_(ids_lote)).delete(synchronize_session=False)
+            session.query(ItemLicitacao).filter(ItemLicitacao.licitacao_id.in_(ids_lote)).delete(synchronize_session=False)
+            session.query(Licitacao).filter(Licitacao.id.in_(ids_lote)).delete(synchronize_session=False)
+            session.commit()
+            session.expunge_all()
+
+            total += len(licitacoes)
+            total_itens += sum(len(v) for v in itens_por_lic.values())
+
+        logger.info("Arquivamento: %s licitações e %s itens movidos (corte %s)", total, total_itens, corte.date())
+        return {"arquivadas": total, "itens": total_itens, "corte": corte.isoformat()}
+    except Exception:
+        session.rollback()
+        archive.rollback()
+        raise
+    finally:
+        session.close()
+        archive.close()
+
+
+# === LEITURA (apenas quando solicitado explicitamente) ===
+
+def obter_arquivada(licitacao_id: int) -> Optional[Dict[str, Any]]:
+    """Retorna a licitação arquivada (com itens) ou None."""
+    archive = get_archive_session()
+    try:
+        row = archive.query(LicitacaoArquivada).filter(LicitacaoArquivada.id == licitacao_id).first()
+        return row.to_dict() if row else None
+    finally:
+        archive.close()
+
+
+def _filtrar_arquivadas(query, status=None, uf=None, apenas_com_match=False):
+    if status:
+        query = query.filter(LicitacaoArquivada.status == status)
+    if uf:
+        query = query.filter(LicitacaoArquivada.uf == uf.upper())
+    if apenas_com_match:
+        query = query.filter(LicitacaoArquivada.num_matches > 0)
+    return query
+
+
+def contar_arquivadas(
+    status: Optional[str] = None,
+    uf: Optional[str] = None,
+    apenas_com_match: bool = False,
+) -> int:
+    archive = get_archive_session()
+    try:
+        query = _filtrar_arquivadas(
+            archive.query(func.count(LicitacaoArquivada.id)), status, uf, apenas_com_match
+        )
+        return query.scalar() or 0
+    finally:
+        archive.close()
+
+
+def listar_arquivadas(
+    status: Optional[str] = None,
+    uf: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    incluir_itens: bool = False,
+    apenas_com_match: bool = False,
+    depois_de: Optional[tuple] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Lista licitações arquivadas (mais recentes primeiro).
+    `depois_de=(data_publicacao, id)` pagina por cursor em vez de offset.
+    """
+    archive = get_archive_session()
+    try:
+        query = _filtrar_arquivadas(archive.query(LicitacaoArquivada), status, uf, apenas_com_match)
+        if depois_de is not None:
+            query = query.filter(keyset_filter(LicitacaoArquivada, *depois_de))
+        query = query.order_by(LicitacaoArquivada.data_publicacao.desc(), LicitacaoArquivada.id.desc())
+        if depois_de is None and offset:
+            query = query.offset(offset)
+        rows = query.limit(limit).all()
+        return [r.to_dict(incluir_itens=incluir_itens) for r in rows]
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Arquiva licitações com prazo encerrado")
+    parser.add_argument("--dias", type=int, default=30, help="Dias após o encerramento do prazo")
+    args = parser.parse_args()
+
+    print(arquivar_licitacoes_expiradas(dias_apos_prazo=args.dias))
@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Date, event
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Date, Index, event, and_, or_, text, inspect
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.orm.attributes import get_history
 from datetime import datetime
 import os
+import threading
+from modules.utils.metrics import DB_WRITE_BATCH_ROWS
 
 Base = declarative_base()
 
@@ -39,9 +43,23 @@ class Licitacao(Base):
     comentarios = Column(String)  # Comentários de texto do usuário
     analise_profunda_json = Column(Text, nullable=True)  # Cache JSON da análise profunda (IA)
     data_captura = Column(DateTime, default=datetime.now)
+    # Relevância (ML) calculada na busca / pelo job modules/ml/scoring.py
+    score_relevancia = Column(Float, nullable=True)
+    score_modelo = Column(String, nullable=True)  # Versão do modelo que gerou o score
+    # Última mudança de status (rótulo para o aprendizado online: modules/ml/online.py)
+    status_atualizado_em = Column(DateTime, nullable=True)
 
     itens = relationship("ItemLicitacao", back_populates="licitacao", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Paginação por cursor (keyset) em ORDER BY data_publicacao DESC, id DESC
+        Index('idx_licitacoes_publicacao_id', 'data_publicacao', 'id'),
+        # Filtro/ordenação do Dashboard por relevância
+        Index('idx_licitacoes_score', 'score_relevancia'),
+        # Eventos de rótulo desde o último checkpoint do aprendizado online
+        Index('idx_licitacoes_status_atualizado', 'status_atualizado_em', 'id'),
+    )
+
 class ItemLicitacao(Base):
     __tablename__ = 'itens_licitacao'
     
@@ -61,6 +79,11 @@ class ItemLicitacao(Base):
     # Eager load do produto para evitar DetachedInstanceError em views/Streamlit
     produto_match = relationship("Produto", lazy="joined")
 
+    __table_args__ = (
+        # EXISTS de "tem match" e contagem de itens por licitação
+        Index('idx_itens_licitacao_match', 'licitacao_id', 'produto_match_id'),
+    )
+
 class Configuracao(Base):
     __tablename__ = 'configuracoes'
 
@@ -119,36 +142,43 @@ class LicitacaoFeature(Base):
 
     licitacao = relationship("Licitacao")
 
+class TableVersion(Base):
+    """
+    Contador de alterações por tabela (incrementado a cada flush/bulk que a altera).
+    Fica no próprio banco, então escritas de qualquer processo (Streamlit,
+    scheduler, API) invalidam ETags e caches de resposta da API.
+    """
+    __tablename__ = 'table_versions'
+
+    tabela = Column(String, primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime, default=datetime.now)
+
+
 # Configuracao do Banco
 from .database_config import (
     get_database_url, is_using_turso, get_connection_args, 
     get_turso_connection, sync_with_turso
 )
 
-DATABASE_URL = get_database_url("medcal")
+# Engines criadas sob demanda (primeira sessão), para não pagar .env + sync
+# com Turso no import de cada página, worker da API, script ou teste.
+# - Escrita (`get_engine`/`get_session`): pipeline, importações, alterações de status.
+# - Leitura (`get_read_engine`/`get_read_session`): páginas e GETs da API, com
+#   `query_only`, cache maior, mmap e pool próprio para não disputar com a escrita.
+_engine = None
+_read_engine = None
+_engine_lock = threading.Lock()
 
-# Se usando Turso, sincroniza o cache local antes de criar engine
-if is_using_turso():
-    try:
-        # Sincroniza cache local com Turso remoto
-        conn = get_turso_connection()
-        conn.sync()
-        print("✅ Conectado ao Turso (banco online)")
-    except Exception as e:
-        print(f"⚠️ Erro ao conectar ao Turso: {e}")
-
-# Cria engine SQLAlchemy usando cache local (sincronizado com Turso)
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    connect_args=get_connection_args(),
-    pool_pre_ping=True,
-)
+Session = sessionmaker()
+ReadSession = sessionmaker()
 
-Session = sessionmaker(bind=engine)
+# Ajustes do pool/cache de leitura (variáveis de ambiente opcionais)
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+READ_CACHE_SIZE_KB = int(os.getenv("DB_READ_CACHE_SIZE_KB", "65536"))  # 64 MiB por conexão
+READ_MMAP_SIZE = int(os.getenv("DB_READ_MMAP_SIZE", str(256 * 1024 * 1024)))
 
 
-@event.listens_for(engine, "connect")
 def _set_sqlite_pragma(dbapi_connection, connection_record):
     """Configura pragmas para performance."""
     try:
@@ -161,17 +191,299 @@ def _set_sqlite_pragma(dbapi_connection, connection_record):
         pass
 
 
+def _set_sqlite_read_pragma(dbapi_connection, connection_record):
+    """Pragmas das conexões de leitura: somente leitura, cache grande e mmap."""
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA busy_timeout=5000;")
+        cursor.execute(f"PRAGMA cache_size=-{READ_CACHE_SIZE_KB};")
+        cursor.execute(f"PRAGMA mmap_size={READ_MMAP_SIZE};")
+        cursor.execute("PRAGMA temp_store=MEMORY;")
+        cursor.execute("PRAGMA query_only=ON;")
+        cursor.close()
+    except Exception:
+        pass
+
+
+def create_db_engine(url: str, read_only: bool = False):
+    """
+    Cria uma engine SQLite com os pragmas do sistema.
+    Com `read_only=True` usa os pragmas e o pool das conexões de leitura.
+    """
+    if read_only:
+        engine = create_engine(
+            url,
+            echo=False,
+            connect_args=get_connection_args(),
+            pool_pre_ping=True,
+            pool_size=READ_POOL_SIZE,
+            max_overflow=READ_POOL_SIZE,
+        )
+        event.listen(engine, "connect", _set_sqlite_read_pragma)
+    else:
+        engine = create_engine(
+            url,
+            echo=False,
+            connect_args=get_connection_args(),
+            pool_pre_ping=True,
+        )
+        event.listen(engine, "connect", _set_sqlite_pragma)
+    return engine
+
+
+def get_engine():
+    """Retorna a engine de escrita, criando-a (e sincronizando o Turso) no primeiro uso."""
+    global _engine
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+
+        # Se usando Turso, sincroniza o cache local antes de criar engine
+        if is_using_turso():
+            from .sync_worker import turso_sync_worker
+            try:
+                # Abre a replica compartilhada (faz o sync inicial uma única vez)
+                get_turso_connection()
+                print("✅ Conectado ao Turso (banco online)")
+            except Exception as e:
+                print(f"⚠️ Erro ao conectar ao Turso: {e}")
+            # Syncs seguintes: debounce após escritas + periódico
+            turso_sync_worker.start()
+
+        # Cria engine SQLAlchemy usando cache local (sincronizado com Turso)
+        engine = create_db_engine(get_database_url("medcal"))
+        # Os eventos de sessão gravam nela em toda escrita: precisa existir sempre
+        TableVersion.__table__.create(engine, checkfirst=True)
+        # Bancos anteriores às colunas novas (score, status_atualizado_em): todo
+        # processo (Streamlit, API, scheduler) migra ao abrir, não só init_db()
+        if _add_missing_columns(engine):
+            _create_missing_indexes(engine)
+            if is_using_turso():
+                sync_with_turso()
+        Session.configure(bind=engine)
+        _engine = engine
+    return _engine
+
+
+def get_read_engine():
+    """Retorna a engine somente leitura (mesmo arquivo, pool e pragmas próprios)."""
+    global _read_engine
+    if _read_engine is not None:
+        return _read_engine
+    # Garante sync inicial com Turso e o arquivo em WAL antes de abrir leitores
+    get_engine()
+    with _engine_lock:
+        if _read_engine is None:
+            engine = create_db_engine(get_database_url("medcal"), read_only=True)
+            ReadSession.configure(bind=engine)
+            _read_engine = engine
+    return _read_engine
+
+
+def warm_up(background: bool = True):
+    """
+    Cria a engine e abre uma conexão antecipadamente (opcional).
+    Com `background=True` roda em thread daemon e não atrasa o startup.
+    """
+    def _run():
+        try:
+            with get_engine().connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+        except Exception as e:
+            print(f"⚠️ Erro no warm-up do banco: {e}")
+
+    if not background:
+        _run()
+        return None
+    thread = threading.Thread(target=_run, name="db-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def __getattr__(name):
+    # Compatibilidade: `from modules.database.database import engine, DATABASE_URL`
+    if name == "engine":
+        return get_engine()
+    if name == "DATABASE_URL":
+        return get_database_url("medcal")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_BUMP_VERSION_SQL = text(
+    "INSERT INTO table_versions (tabela, versao, atualizado_em) VALUES (:tabela, 1, :agora) "
+    "ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1, atualizado_em = :agora"
+)
+
+
+def _bump_table_versions(session, tabelas):
+    if not tabelas:
+        return
+    agora = datetime.now()
+    conn = session.connection()
+    for tabela in sorted(tabelas):
+        conn.execute(_BUMP_VERSION_SQL, {"tabela": tabela, "agora": agora})
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_status_changes(session, flush_context, instances):
+    """Carimba status_atualizado_em quando o status de uma licitação muda (via ORM)."""
+    agora = None
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Licitacao):
+            continue
+        if obj in session.new:
+            mudou = obj.status not in (None, 'Nova')
+        else:
+            mudou = get_history(obj, 'status').has_changes()
+        if mudou:
+            agora = agora or datetime.now()
+            obj.status_atualizado_em = agora
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_dirty(session, flush_context):
+    """Marca sessões que escreveram algo (sync Turso) e incrementa a versão das tabelas."""
+    session.info["_turso_dirty"] = True
+    objetos = list(session.new) + list(session.dirty) + list(session.deleted)
+    DB_WRITE_BATCH_ROWS.observe(len(objetos))
+    tabelas = {
+        obj.__table__.name
+        for obj in objetos
+        if hasattr(obj, "__table__") and obj.__table__.name != TableVersion.__tablename__
+    }
+    _bump_table_versions(session, tabelas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    """
+    `query.update()`/`query.delete()` não passam pelo flush: trata aqui.
+
+    Só enxerga instruções ORM (com mapper). Escritas com `text()` ou por
+    conexão crua (sqlite3, libsql) não incrementam `table_versions` e deixam
+    ETag/cache da API velhos: quem escreve assim chama
+    `_bump_table_versions(session, {tabela})` na mesma transação.
+    """
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    orm_execute_state.session.info["_turso_dirty"] = True
+    _bump_table_versions(orm_execute_state.session, {mapper.local_table.name})
+    # query.update({"status": ...}) também é mudança de rótulo
+    if orm_execute_state.is_update and mapper.class_ is Licitacao:
+        statement = orm_execute_state.statement
+        colunas = _colunas_atualizadas(statement)
+        if "status" in colunas and "status_atualizado_em" not in colunas:
+            orm_execute_state.statement = statement.values(status_atualizado_em=datetime.now())
+
+
+def _colunas_atualizadas(statement) -> set:
+    """Colunas do `.values()` de um UPDATE: nos parâmetros compilados elas têm o nome da coluna (as do WHERE ganham sufixo, ex. `status_1`)"""
+    return set(statement.compile().params)
+
+
+def get_table_versions(tabelas) -> dict:
+    """
+    Versão atual de cada tabela: {tabela: (versao, atualizado_em)}.
+    Tabelas nunca alteradas retornam (0, None).
+    """
+    session = get_read_session()
+    try:
+        rows = session.query(TableVersion).filter(TableVersion.tabela.in_(list(tabelas))).all()
+        versoes = {row.tabela: (row.versao, row.atualizado_em) for row in rows}
+    finally:
+        session.close()
+    return {tabela: versoes.get(tabela, (0, None)) for tabela in tabelas}
+
+
+@event.listens_for(Session, "after_commit")
+def _request_turso_sync(session):
+    """Agenda sync com Turso após commits com escrita (agrupados pelo worker)."""
+    if session.info.pop("_turso_dirty", False) and is_using_turso():
+        sync_with_turso()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_session_dirty(session):
+    session.info.pop("_turso_dirty", None)
+
+
+def _add_missing_columns(engine, metadata=None) -> int:
+    """
+    create_all não altera tabelas existentes: adiciona colunas novas anuláveis.
+    Retorna quantas colunas foram adicionadas (0 no caso comum: só inspeciona).
+    `metadata`: tabelas a migrar (padrão: as do banco principal).
+    """
+    inspector = inspect(engine)
+    adicionadas = 0
+    for table in (metadata or Base.metadata).sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existentes = {col["name"] for col in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in existentes or not col.nullable:
+                continue
+            tipo = col.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {col.name} {tipo}'))
+                adicionadas += 1
+            except OperationalError as e:
+                # Outro processo abrindo o mesmo banco migrou primeiro
+                if "duplicate column" not in str(e).lower():
+                    raise
+    return adicionadas
+
+
+def _create_missing_indexes(engine):
+    """create_all não adiciona índices novos em tabelas que já existem"""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
 def init_db():
+    engine = get_engine()
     Base.metadata.create_all(engine)
+    _add_missing_columns(engine)
+    _create_missing_indexes(engine)
     # Sincroniza estrutura com Turso
     if is_using_turso():
         sync_with_turso()
 
 
 def get_session():
+    get_engine()
     return Session()
 
 
+def get_read_session():
+    """Sessão somente leitura para páginas e consultas da API (não aceita escritas)."""
+    get_read_engine()
+    return ReadSession()
+
+
+def keyset_filter(model, data_publicacao, registro_id):
+    """
+    Condição "depois do cursor" para ORDER BY data_publicacao DESC, id DESC.
+    No SQLite NULL é o menor valor, então datas nulas vêm por último.
+    """
+    if data_publicacao is None:
+        return and_(model.data_publicacao.is_(None), model.id < registro_id)
+    return or_(
+        model.data_publicacao < data_publicacao,
+        and_(model.data_publicacao == data_publicacao, model.id < registro_id),
+        model.data_publicacao.is_(None),
+    )
+
+
 def sync_to_cloud():
     """Sincroniza dados locais com Turso (chame após escritas importantes)."""
     if is_using_turso():
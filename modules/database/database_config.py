@@ -4,7 +4,8 @@
 import os
 from pathlib import Path
 
-# Carrega variáveis de ambiente
+# Carrega variáveis de ambiente (só lê o .env: barato; o custo do startup é a
+# engine/sync do Turso, que continuam sob demanda em database.py)
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -22,29 +23,26 @@ DATA_DIR = BASE_DIR / 'data'
 # Se não estiverem definidas, usa SQLite local
 # =============================================================================
 
-TURSO_URL = os.getenv("TURSO_DATABASE_URL", "")
-TURSO_TOKEN = os.getenv("TURSO_AUTH_TOKEN", "")
-
 
 def is_using_turso() -> bool:
     """Verifica se está usando Turso (banco online)."""
-    return bool(TURSO_URL and TURSO_TOKEN)
+    return bool(get_turso_url() and get_turso_token())
 
 
 def get_turso_url() -> str:
     """Retorna a URL do Turso."""
-    return TURSO_URL
+    return os.getenv("TURSO_DATABASE_URL", "")
 
 
 def get_turso_token() -> str:
     """Retorna o token do Turso."""
-    return TURSO_TOKEN
+    return os.getenv("TURSO_AUTH_TOKEN", "")
 
 
-def get_turso_connection():
+def open_turso_replica():
     """
-    Retorna conexão com Turso usando libsql.
-    Com embedded replica (cache local + sync com nuvem).
+    Abre uma nova conexão libsql com embedded replica (cache local + sync com nuvem).
+    Não sincroniza; prefira `get_turso_connection()`, que reutiliza a conexão do processo.
     """
     if not is_using_turso():
         raise ValueError("Turso não configurado. Defina TURSO_DATABASE_URL e TURSO_AUTH_TOKEN")
@@ -54,15 +52,24 @@ def get_turso_connection():
     # Usa cache local para performance, sincroniza com nuvem
     cache_path = str(DATA_DIR / 'turso_sync.db')
     
-    conn = libsql.connect(
+    return libsql.connect(
         cache_path,
-        sync_url=TURSO_URL,
-        auth_token=TURSO_TOKEN
+        sync_url=get_turso_url(),
+        auth_token=get_turso_token()
     )
-    # Sincroniza com a nuvem
-    conn.sync()
+
+
+def get_turso_connection():
+    """
+    Retorna a conexão libsql compartilhada do processo.
+    A replica é aberta e sincronizada uma única vez; os syncs seguintes
+    ficam a cargo do worker em `sync_worker`.
+    """
+    if not is_using_turso():
+        raise ValueError("Turso não configurado. Defina TURSO_DATABASE_URL e TURSO_AUTH_TOKEN")
     
-    return conn
+    from .sync_worker import turso_sync_worker
+    return turso_sync_worker.get_connection()
 
 
 def get_sqlite_path(db_name: str = "medcal") -> str:
@@ -71,6 +78,7 @@ def get_sqlite_path(db_name: str = "medcal") -> str:
         "medcal": str(DATA_DIR / 'medcal.db'),
         "financeiro": str(DATA_DIR / 'financeiro.db'),
         "financeiro_historico": str(DATA_DIR / 'financeiro_historico.db'),
+        "medcal_archive": str(DATA_DIR / 'medcal_archive.db'),
     }
     return db_paths.get(db_name, db_paths["medcal"])
 
@@ -104,18 +112,18 @@ def get_connection_args() -> dict:
     }
 
 
-def sync_with_turso():
+def sync_with_turso(wait: bool = False):
     """
     Sincroniza o cache local com o Turso remoto.
     Chame esta função após escritas importantes.
+    
+    Por padrão apenas agenda o sync no worker (rajadas de escrita viram um
+    único sync). Com `wait=True`, sincroniza imediatamente e retorna o resultado.
     """
     if not is_using_turso():
         return False
     
-    try:
-        conn = get_turso_connection()
-        conn.sync()
-        return True
-    except Exception as e:
-        print(f"Erro ao sincronizar com Turso: {e}")
-        return False
+    from .sync_worker import turso_sync_worker
+    if wait:
+        return turso_sync_worker.sync_now()
+    return turso_sync_worker.request_sync()
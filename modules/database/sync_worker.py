@@ -0,0 +1,240 @@
+"""
+Worker de sincronização com Turso em segundo plano.
+
+Mantém uma única conexão libsql (embedded replica) por processo e agrupa
+rajadas de escrita em um único `sync()` (debounce). Sem escritas pendentes,
+sincroniza periodicamente para puxar mudanças feitas por outros processos.
+
+Uso:
+    from modules.database.sync_worker import turso_sync_worker
+
+    turso_sync_worker.request_sync()   # após escritas (não bloqueia)
+    turso_sync_worker.sync_now()       # força sync imediato (bloqueia)
+    turso_sync_worker.get_stats()      # lag, duração e falhas
+
+Variáveis de ambiente (opcionais):
+    TURSO_SYNC_DEBOUNCE_SECONDS   silêncio mínimo após a última escrita (padrão 2s)
+    TURSO_SYNC_MAX_DELAY_SECONDS  atraso máximo de uma escrita pendente (padrão 30s)
+    TURSO_SYNC_INTERVAL_SECONDS   intervalo do sync periódico (padrão 300s)
+"""
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from modules.utils.logging_config import get_logger
+from .database_config import is_using_turso, open_turso_replica
+
+logger = get_logger(__name__)
+
+DEBOUNCE_SECONDS = float(os.getenv("TURSO_SYNC_DEBOUNCE_SECONDS", "2"))
+MAX_DELAY_SECONDS = float(os.getenv("TURSO_SYNC_MAX_DELAY_SECONDS", "30"))
+INTERVAL_SECONDS = float(os.getenv("TURSO_SYNC_INTERVAL_SECONDS", "300"))
+
+
+class TursoSyncWorker:
+    """Sincroniza o cache local com o Turso usando uma conexão de longa duração"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        # Singleton: uma conexão e uma thread de sync por processo
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self._conn = None
+        self._conn_lock = threading.Lock()  # serializa uso da conexão libsql
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # Estado do debounce (time.monotonic)
+        self._dirty_since: Optional[float] = None
+        self._last_request_at: Optional[float] = None
+        self._last_attempt_at: float = time.monotonic()
+        self._retry_at: Optional[float] = None
+
+        # Métricas
+        self._total_syncs = 0
+        self._total_falhas = 0
+        self._falhas_consecutivas = 0
+        self._total_pedidos = 0
+        self._ultima_duracao: Optional[float] = None
+        self._ultimo_sync_em: Optional[datetime] = None
+        self._ultimo_erro: Optional[str] = None
+
+    # === CONEXÃO ===
+
+    def get_connection(self):
+        """
+        Retorna a conexão libsql compartilhada.
+        Na primeira chamada abre a embedded replica e faz o sync inicial.
+        """
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = open_turso_replica()
+                self._sync_locked("inicial")
+            return self._conn
+
+    # === API PÚBLICA ===
+
+    def start(self):
+        """Inicia a thread de sync (idempotente). Não faz nada sem Turso."""
+        if not is_using_turso():
+            return
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="turso-sync", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def request_sync(self) -> bool:
+        """
+        Marca o banco como alterado. O sync acontece após DEBOUNCE_SECONDS sem
+        novas escritas (ou no máximo MAX_DELAY_SECONDS após a primeira).
+        """
+        if not is_using_turso():
+            return False
+        with self._cond:
+            agora = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = agora
+            self._last_request_at = agora
+            self._total_pedidos += 1
+            self._cond.notify()
+        self.start()
+        return True
+
+    def sync_now(self) -> bool:
+        """Sincroniza imediatamente na thread chamadora."""
+        if not is_using_turso():
+            return False
+        return self._do_sync("manual")
+
+    def stop(self, timeout: float = 10.0):
+        """Encerra a thread, descarregando escritas pendentes antes de sair."""
+        with self._cond:
+            thread = self._thread
+            if not thread or not thread.is_alive():
+                return
+            self._stopping = True
+            self._cond.notify()
+        thread.join(timeout=timeout)
+
+    def get_stats(self) -> dict:
+        """Retorna métricas do worker (lag, duração e falhas)."""
+        with self._cond:
+            agora = time.monotonic()
+            lag = (agora - self._dirty_since) if self._dirty_since is not None else 0.0
+            return {
+                "ativo": bool(self._thread and self._thread.is_alive()),
+                "pendente": self._dirty_since is not None,
+                "lag_segundos": round(lag, 3),
+                "ultima_duracao_segundos": round(self._ultima_duracao, 3) if self._ultima_duracao is not None else None,
+                "ultimo_sync_em": self._ultimo_sync_em.isoformat() if self._ultimo_sync_em else None,
+                "total_syncs": self._total_syncs,
+                "total_pedidos": self._total_pedidos,
+                "total_falhas": self._total_falhas,
+                "falhas_consecutivas": self._falhas_consecutivas,
+                "ultimo_erro": self._ultimo_erro,
+                "intervalo_segundos": INTERVAL_SECONDS,
+                "debounce_segundos": DEBOUNCE_SECONDS,
+            }
+
+    # === INTERNOS ===
+
+    def _next_deadline(self) -> float:
+        """Calcula o próximo instante de sync (chamar com self._cond adquirido)."""
+        if self._dirty_since is not None:
+            deadline = min(self._last_request_at + DEBOUNCE_SECONDS, self._dirty_since + MAX_DELAY_SECONDS)
+        else:
+            deadline = self._last_attempt_at + INTERVAL_SECONDS
+        if self._retry_at is not None:
+            deadline = max(deadline, self._retry_at)
+        return deadline
+
+    def _run(self):
+        logger.info("Worker de sync Turso iniciado (debounce=%ss, intervalo=%ss)", DEBOUNCE_SECONDS, INTERVAL_SECONDS)
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    espera = self._next_deadline() - time.monotonic()
+                    if espera <= 0:
+                        break
+                    self._cond.wait(timeout=espera)
+                if self._stopping and self._dirty_since is None:
+                    return
+                motivo = "escritas" if self._dirty_since is not None else "periodico"
+                parar = self._stopping
+
+            self._do_sync(motivo)
+            if parar:
+                return
+
+    def _do_sync(self, motivo: str) -> bool:
+        with self._conn_lock:
+            if self._conn is None:
+                try:
+                    self._conn = open_turso_replica()
+                except Exception as e:
+                    self._record_failure(e, motivo)
+                    return False
+            return self._sync_locked(motivo)
+
+    def _sync_locked(self, motivo: str) -> bool:
+        """Executa `conn.sync()` (chamar com self._conn_lock adquirido)."""
+        with self._cond:
+            pedido_visto = self._last_request_at
+            self._last_attempt_at = time.monotonic()
+
+        inicio = time.perf_counter()
+        try:
+            self._conn.sync()
+        except Exception as e:
+            self._record_failure(e, motivo)
+            return False
+        duracao = time.perf_counter() - inicio
+
+        with self._cond:
+            self._total_syncs += 1
+            self._falhas_consecutivas = 0
+            self._retry_at = None
+            self._ultima_duracao = duracao
+            self._ultimo_sync_em = datetime.now()
+            self._ultimo_erro = None
+            if self._last_request_at == pedido_visto:
+                self._dirty_since = None
+            else:
+                # Escritas chegaram durante o sync: continuam pendentes
+                self._dirty_since = self._last_request_at
+        logger.debug("Sync Turso (%s) em %.2fs", motivo, duracao)
+        return True
+
+    def _record_failure(self, exc: Exception, motivo: str):
+        with self._cond:
+            self._total_falhas += 1
+            self._falhas_consecutivas += 1
+            self._ultimo_erro = str(exc)[:200]
+            self._last_attempt_at = time.monotonic()
+            # Backoff exponencial limitado ao intervalo periódico
+            atraso = min(INTERVAL_SECONDS, DEBOUNCE_SECONDS * (2 ** self._falhas_consecutivas))
+            self._retry_at = self._last_attempt_at + atraso
+        logger.warning("Erro ao sincronizar com Turso (%s): %s", motivo, exc)
+
+
+# Instância global (singleton)
+turso_sync_worker = TursoSyncWorker()
@@ -1,9 +1,11 @@
+import time
 import requests
 from sqlalchemy import text
 import pandas as pd
 from modules.finance.database import get_finance_session, get_finance_historico_session
 from modules.database.database import get_session as get_main_session, Configuracao
 from datetime import date, datetime
+from modules.utils.metrics import LLM_REQUEST_SECONDS, LLM_REQUESTS
 
 class FinanceAI:
     def __init__(self, session_factory=None, fonte_nome: str = "financeiro"):
@@ -483,10 +485,19 @@ Resposta:"""
             ],
             "temperature": 0.1,
         }
-        resp = requests.post(url, json=payload, headers=headers, timeout=30)
+        resultado = "excecao"
+        inicio = time.perf_counter()
         try:
-            resp.raise_for_status()
-        except Exception:
-            raise Exception(f"OpenRouter error {resp.status_code}: {resp.text}")
-        data = resp.json()
-        return data["choices"][0]["message"]["content"]
+            resp = requests.post(url, json=payload, headers=headers, timeout=30)
+            try:
+                resp.raise_for_status()
+            except Exception:
+                resultado = "rate_limit" if resp.status_code == 429 else "erro_http"
+                raise Exception(f"OpenRouter error {resp.status_code}: {resp.text}")
+            data = resp.json()
+            texto = data["choices"][0]["message"]["content"]
+            resultado = "ok"
+            return texto
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - inicio, modelo=self.openrouter_model)
+            LLM_REQUESTS.inc(modelo=self.openrouter_model, resultado=resultado)
@@ -3,10 +3,11 @@ Módulo ML (Machine Learning) para classificação de licitações
 """
 
 from .preprocessor import TextPreprocessor, FeatureExtractor
-from .classifier import LicitacaoClassifier
+from .classifier import LicitacaoClassifier, get_classifier
 
 __all__ = [
     'TextPreprocessor',
     'FeatureExtractor',
     'LicitacaoClassifier',
+    'get_classifier',
 ]
@@ -1,43 +1,103 @@
 """
 Classificador de relevância de licitações usando Machine Learning
-Usa TF-IDF + RandomForest para classificar licitações como relevantes ou não
+Usa TF-IDF + RandomForest (ou regressão logística) para classificar licitações
+como relevantes ou não. As features ficam esparsas de ponta a ponta.
+Os modelos treinados são versionados em modules/ml/registry.py.
 """
 import os
+import threading
 import joblib
 import numpy as np
+from scipy import sparse
 from typing import List, Dict, Any, Tuple, Optional
 from datetime import datetime
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score, f1_score
 
 from modules.ml.preprocessor import TextPreprocessor, FeatureExtractor
+from modules.ml.registry import ModelRegistry, hash_conjunto_treino
 from modules.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Algoritmos disponíveis: RandomForest (padrão histórico) ou linear (treino e
+# inferência bem mais rápidos em matrizes esparsas grandes)
+ALGORITMOS = ("random_forest", "linear")
+ALGORITMO_PADRAO = os.getenv("ML_ALGORITMO", "random_forest")
+
+# "batch": modelo do trainer.py (retreino completo); "online": modules/ml/online.py (partial_fit)
+ML_MODO = os.getenv("ML_MODO", "batch").lower()
+
 
 class LicitacaoClassifier:
     """
     Classificador de relevância de licitações
     
-    Usa TF-IDF para vetorizar texto + features numéricas + RandomForest
+    Usa TF-IDF para vetorizar texto + features numéricas + RandomForest/linear
     """
+
+    # Arrays do modelo mapeados somente leitura (compartilhados entre processos)
+    _mmap_mode: Optional[str] = "r"
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, algoritmo: Optional[str] = None,
+                 max_features: int = 500):
         """
         Args:
-            model_path: Caminho para modelo salvo. Se None, usa padrão.
+            model_path: Caminho para modelo salvo (arquivo avulso). Se None, usa a
+                versão atual do registro (com fallback para o .pkl legado).
+            algoritmo: 'random_forest' ou 'linear' (usado no próximo train).
+                Se None, usa ML_ALGORITMO (padrão 'random_forest').
+            max_features: Tamanho máximo do vocabulário TF-IDF
         """
+        self.registry: Optional[ModelRegistry] = None if model_path else ModelRegistry()
         self.model_path = model_path or "data/models/licitacao_classifier.pkl"
+        # algoritmo_treino: usado no próximo train; algoritmo: o do modelo carregado/treinado
+        self.algoritmo_treino = algoritmo or ALGORITMO_PADRAO
+        if self.algoritmo_treino not in ALGORITMOS:
+            raise ValueError(f"Algoritmo inválido: {self.algoritmo_treino} (use {', '.join(ALGORITMOS)})")
+        self.algoritmo: Optional[str] = None
+        self.max_features = max_features
         self.vectorizer: Optional[TfidfVectorizer] = None
-        self.classifier: Optional[RandomForestClassifier] = None
+        self.classifier = None
         self.trained = False
+        # Identifica o modelo nos scores persistidos (Licitacao.score_modelo)
+        self.model_version: Optional[str] = None
+        self.metrics: Dict[str, Any] = {}
+        self._model_mtime: Optional[float] = None
         
         # Tenta carregar modelo existente
         self.load_model()
     
+    @staticmethod
+    def _features(vectorizer: TfidfVectorizer, textos: List[str],
+                  licitacoes: List[Dict[str, Any]], fit: bool = False) -> sparse.csr_matrix:
+        """TF-IDF (esparso) + features numéricas, sem densificar a matriz"""
+        X_text = vectorizer.fit_transform(textos) if fit else vectorizer.transform(textos)
+        X_numerical = sparse.csr_matrix(np.array([
+            FeatureExtractor.extract_numerical_features(lic)
+            for lic in licitacoes
+        ]))
+        return sparse.hstack([X_text, X_numerical], format="csr")
+    
+    def _novo_estimador(self):
+        if self.algoritmo_treino == "linear":
+            return LogisticRegression(
+                C=1.0,
+                solver="liblinear",
+                max_iter=1000,
+                random_state=42
+            )
+        return RandomForestClassifier(
+            n_estimators=100,
+            max_depth=10,
+            min_samples_split=5,
+            random_state=42,
+            n_jobs=-1
+        )
+    
     def train(self, licitacoes: List[Dict[str, Any]], labels: List[int]) -> Dict[str, Any]:
         """
         Treina o classificador com dados históricos
@@ -58,28 +118,20 @@ class LicitacaoClassifier:
         logger.info(f"Iniciando treinamento com {len(licitacoes)} licitações")
         
         # Extrai textos
-        textos = [TextPreprocessor.extract_features_from_licitacao(lic) for lic in licitacoes]
+        textos = TextPreprocessor.extract_features_batch(licitacoes)
         
-        # Vetoriza textos com TF-IDF
+        # Vetoriza textos com TF-IDF + features numéricas (matriz esparsa CSR)
         self.vectorizer = TfidfVectorizer(
-            max_features=500,
+            max_features=self.max_features,
             ngram_range=(1, 2),
             min_df=2,
             max_df=0.8
         )
-        X_text = self.vectorizer.fit_transform(textos).toarray()
-        
-        # Extrai features numéricas
-        X_numerical = np.array([
-            FeatureExtractor.extract_numerical_features(lic)
-            for lic in licitacoes
-        ])
-        
-        # Combina features
-        X = np.hstack([X_text, X_numerical])
+        X = self._features(self.vectorizer, textos, licitacoes, fit=True)
         y = np.array(labels)
         
-        logger.info(f"Features extraídas: {X.shape[1]} (texto: {X_text.shape[1]}, numéricas: {X_numerical.shape[1]})")
+        n_texto = len(self.vectorizer.vocabulary_)
+        logger.info(f"Features extraídas: {X.shape[1]} (texto: {n_texto}, numéricas: {X.shape[1] - n_texto})")
         
         # Split train/test
         X_train, X_test, y_train, y_test = train_test_split(
@@ -89,17 +141,13 @@ class LicitacaoClassifier:
             stratify=y if len(np.unique(y)) > 1 else None
         )
         
-        # Treina RandomForest
-        self.classifier = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=5,
-            random_state=42,
-            n_jobs=-1
-        )
+        # Treina o estimador escolhido (RandomForest ou linear)
+        self.classifier = self._novo_estimador()
+        self.algoritmo = self.algoritmo_treino
         
         self.classifier.fit(X_train, y_train)
         self.trained = True
+        self.model_version = datetime.now().strftime("%Y%m%d%H%M%S")
         
         # Avalia no conjunto de teste
         y_pred = self.classifier.predict(X_test)
@@ -114,12 +162,15 @@ class LicitacaoClassifier:
         metrics = {
             'accuracy': accuracy,
             'f1_score': f1,
-            'train_size': len(X_train),
-            'test_size': len(X_test),
+            'train_size': X_train.shape[0],
+            'test_size': X_test.shape[0],
             'n_features': X.shape[1],
+            'algoritmo': self.algoritmo,
+            'dataset_hash': hash_conjunto_treino(textos, labels),
             'report': report,
             'trained_at': datetime.now().isoformat()
         }
+        self.metrics = metrics
         
         return metrics
     
@@ -130,31 +181,45 @@ class LicitacaoClassifier:
         Returns:
             Float entre 0 e 1 (probabilidade de ser relevante)
         """
-        if not self.trained or self.vectorizer is None or self.classifier is None:
+        # Referências locais: um hot-reload concorrente não mistura modelos
+        vectorizer, classifier = self.vectorizer, self.classifier
+        if not self.trained or vectorizer is None or classifier is None:
             logger.warning("Modelo não treinado, retornando relevância padrão")
             return 0.5
         
         try:
-            # Extrai texto
+            # Extrai texto e monta features (esparsas)
             texto = TextPreprocessor.extract_features_from_licitacao(licitacao)
-            
-            # Vetoriza
-            X_text = self.vectorizer.transform([texto]).toarray()
-            
-            # Features numéricas
-            X_numerical = FeatureExtractor.extract_numerical_features(licitacao).reshape(1, -1)
-            
-            # Combina
-            X = np.hstack([X_text, X_numerical])
+            X = self._features(vectorizer, [texto], [licitacao])
             
             # Predição
-            proba = self.classifier.predict_proba(X)[0][1]  # Probabilidade classe 1 (relevante)
+            proba = classifier.predict_proba(X)[0][1]  # Probabilidade classe 1 (relevante)
             
             return float(proba)
         except Exception as e:
             logger.error(f"Erro na predição: {e}", exc_info=True)
             return 0.5
     
+    def predict_proba_batch(self, licitacoes: List[Dict[str, Any]]) -> List[float]:
+        """
+        Probabilidade de relevância de várias licitações em uma única chamada
+        ao vetorizador e ao modelo (bem mais barato que N chamadas a predict_proba).
+        """
+        if not licitacoes:
+            return []
+        vectorizer, classifier = self.vectorizer, self.classifier
+        if not self.trained or vectorizer is None or classifier is None:
+            logger.warning("Modelo não treinado, retornando relevância padrão")
+            return [0.5] * len(licitacoes)
+
+        try:
+            textos = TextPreprocessor.extract_features_batch(licitacoes)
+            X = self._features(vectorizer, textos, licitacoes)
+            return [float(p) for p in classifier.predict_proba(X)[:, 1]]
+        except Exception as e:
+            logger.error(f"Erro na predição em lote: {e}", exc_info=True)
+            return [0.5] * len(licitacoes)
+
     def predict(self, licitacao: Dict[str, Any], threshold: float = 0.5) -> int:
         """
         Prediz se licitação é relevante (1) ou não (0)
@@ -170,43 +235,117 @@ class LicitacaoClassifier:
         return 1 if proba >= threshold else 0
     
     def save_model(self, path: Optional[str] = None):
-        """Salva modelo treinado"""
+        """
+        Salva modelo treinado: como nova versão do registro (promovida a atual)
+        ou, com path/model_path explícitos, em um arquivo avulso.
+        """
         if not self.trained:
             raise ValueError("Modelo não treinado")
         
-        save_path = path or self.model_path
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        
         model_data = {
             'vectorizer': self.vectorizer,
             'classifier': self.classifier,
+            'version': self.model_version,
+            'algoritmo': self.algoritmo,
             'trained_at': datetime.now().isoformat()
         }
         
-        joblib.dump(model_data, save_path)
+        if path is None and self.registry is not None:
+            metricas = {k: v for k, v in self.metrics.items() if k not in ('report', 'dataset_hash')}
+            self.registry.registrar(model_data, self.model_version, metricas=metricas,
+                                    dataset_hash=self.metrics.get('dataset_hash'))
+            return
+        
+        save_path = path or self.model_path
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        
+        # Grava em arquivo temporário e troca atomicamente: processos com o
+        # modelo residente nunca leem um pickle pela metade
+        tmp_path = f"{save_path}.tmp"
+        joblib.dump(model_data, tmp_path)
+        os.replace(tmp_path, save_path)
         logger.info(f"Modelo salvo em: {save_path}")
     
     def load_model(self, path: Optional[str] = None) -> bool:
         """
-        Carrega modelo salvo
+        Carrega modelo salvo (versão atual do registro, se houver; senão o arquivo)
         
         Returns:
             True se carregou com sucesso, False caso contrário
         """
-        load_path = path or self.model_path
+        if path is None and self.registry is not None and self.registry.versao_atual():
+            load_path = str(self.registry.ponteiro)
+        else:
+            load_path = path or self.model_path
         
         if not os.path.exists(load_path):
             logger.debug(f"Modelo não encontrado em: {load_path}")
             return False
         
         try:
-            model_data = joblib.load(load_path)
+            mtime = os.path.getmtime(load_path)
+            if self.registry is not None and load_path == str(self.registry.ponteiro):
+                model_data = self.registry.carregar(mmap=self._mmap_mode is not None)
+                if model_data is None:
+                    return False
+            else:
+                model_data = joblib.load(load_path, mmap_mode=self._mmap_mode)
             self.vectorizer = model_data['vectorizer']
             self.classifier = model_data['classifier']
+            self.algoritmo = model_data.get('algoritmo', 'random_forest')
             self.trained = True
+            # Modelos antigos não têm 'version': usa a data de treino
+            self.model_version = model_data.get('version') or model_data.get('trained_at')
+            if path is None:
+                self._model_mtime = mtime
+            self._carregar_extras(model_data)
             
             logger.info(f"Modelo carregado de: {load_path} (treinado em {model_data.get('trained_at', 'N/A')})")
             return True
         except Exception as e:
             logger.error(f"Erro ao carregar modelo: {e}", exc_info=True)
             return False
+
+    def _carregar_extras(self, model_data: Dict[str, Any]):
+        """Gancho para subclasses lerem campos próprios do modelo salvo"""
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recarrega o modelo se o arquivo mudou desde o último load (mtime do
+        ponteiro CURRENT do registro ou do arquivo avulso).
+        """
+        monitorado = self.model_path
+        if self.registry is not None and self.registry.ponteiro.exists():
+            monitorado = str(self.registry.ponteiro)
+        try:
+            mtime = os.path.getmtime(monitorado)
+        except OSError:
+            return False
+        if mtime == self._model_mtime:
+            return False
+        return self.load_model()
+
+
+# === CLASSIFICADOR RESIDENTE ===
+
+_resident: Optional[LicitacaoClassifier] = None
+_resident_lock = threading.Lock()
+
+
+def get_classifier() -> LicitacaoClassifier:
+    """
+    Classificador compartilhado do processo: carregado uma vez e recarregado
+    automaticamente quando o arquivo do modelo é substituído (novo treino).
+    Com ML_MODO=online serve o OnlineLicitacaoClassifier.
+    """
+    global _resident
+    with _resident_lock:
+        if _resident is None:
+            if ML_MODO == "online":
+                from modules.ml.online import OnlineLicitacaoClassifier
+                _resident = OnlineLicitacaoClassifier()
+            else:
+                _resident = LicitacaoClassifier()
+        else:
+            _resident.reload_if_changed()
+        return _resident
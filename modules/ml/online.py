@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Aprendizado online do classificador de relevância
+Em vez de retreinar do zero sobre todo o histórico (modules/ml/trainer.py),
+consome só as mudanças de status desde o último checkpoint e atualiza o
+modelo com partial_fit. O vetorizador é um HashingVectorizer (sem vocabulário
+a ajustar), então novos termos entram no modelo sem refazer nada.
+
+Ative com ML_MODO=online: get_classifier() passa a servir este modelo e o
+scheduler aplica os eventos novos periodicamente.
+
+A versão do modelo (score_modelo) só muda a cada ML_ONLINE_EVENTOS_POR_VERSAO
+eventos: entre uma versão e outra o scheduler repontua apenas as licitações
+rotuladas no ciclo, não a tabela inteira.
+
+Uso:
+    python -m modules.ml.online               # aplica eventos desde o checkpoint
+    python -m modules.ml.online --reiniciar   # descarta o modelo e reaprende tudo
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sqlalchemy import and_, or_
+
+from modules.database.database import get_session, Licitacao
+from modules.ml.classifier import LicitacaoClassifier
+from modules.ml.preprocessor import TextPreprocessor
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Status que são rótulos (os demais, como Nova/Em Análise/Arquivada, não ensinam nada)
+ROTULOS = {
+    'Salva': 1,
+    'Participar': 1,
+    'Ganha': 1,
+    'Ignorada': 0,
+    'Perdida': 0,
+}
+
+# Eventos aplicados por versão do modelo (cada versão nova repontua a tabela inteira)
+EVENTOS_POR_VERSAO = max(1, int(os.getenv("ML_ONLINE_EVENTOS_POR_VERSAO", "500")))
+
+# Checkpoint (status_atualizado_em, id). Com data None o modelo ainda está no
+# bootstrap: rótulos anteriores ao carimbo de status, percorridos por id.
+_BOOTSTRAP = (None, 0)
+_INICIO = (datetime.min, 0)
+
+
+class OnlineLicitacaoClassifier(LicitacaoClassifier):
+    """
+    Classificador incremental: HashingVectorizer + SGD (log_loss) com partial_fit
+
+    Mesma interface de predição do LicitacaoClassifier; o estado salvo inclui o
+    checkpoint (status_atualizado_em, id) do último evento aplicado.
+    """
+
+    # partial_fit altera os coeficientes: sem mmap somente leitura
+    _mmap_mode = None
+
+    def __init__(self, model_path: Optional[str] = None, n_features: int = 2 ** 18):
+        self.n_features = n_features
+        self.checkpoint: Optional[tuple] = None
+        self.n_eventos = 0
+        self.criado_em: Optional[str] = None
+        super().__init__(model_path=model_path or "data/models/licitacao_online.pkl", algoritmo="linear")
+        if not self.trained:
+            self._novo_modelo()
+
+    def _novo_modelo(self):
+        self.vectorizer = HashingVectorizer(
+            n_features=self.n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+        )
+        # Passo decrescente (eta0 / t^0.5): o "optimal" do sklearn dá passos enormes
+        # nos primeiros lotes pequenos e satura as probabilidades em 0/1
+        self.classifier = SGDClassifier(
+            loss="log_loss",
+            alpha=1e-4,
+            learning_rate="invscaling",
+            eta0=0.5,
+            random_state=42
+        )
+        self.algoritmo = "online"
+        self.trained = False
+        self.model_version = None
+        self.checkpoint = _BOOTSTRAP
+        self.n_eventos = 0
+        # Identifica o modelo: um modelo recomeçado não reaproveita versões (scores) do anterior
+        self.criado_em = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    def train(self, licitacoes: List[Dict[str, Any]], labels: List[int]) -> Dict[str, Any]:
+        """Treino completo = modelo novo + um partial_fit com todo o conjunto"""
+        self._novo_modelo()
+        self.partial_fit(licitacoes, labels)
+        return {'train_size': len(labels), 'algoritmo': self.algoritmo, 'trained_at': datetime.now().isoformat()}
+
+    def partial_fit(self, licitacoes: List[Dict[str, Any]], labels: List[int]) -> int:
+        """Atualiza o modelo com um lote de exemplos rotulados. Retorna o tamanho do lote."""
+        if not licitacoes:
+            return 0
+        textos = TextPreprocessor.extract_features_batch(licitacoes)
+        X = self._features(self.vectorizer, textos, licitacoes)
+        self.classifier.partial_fit(X, np.array(labels), classes=np.array([0, 1]))
+        self.trained = True
+        self.n_eventos += len(labels)
+        self.model_version = self._versao()
+        return len(labels)
+
+    def _versao(self) -> str:
+        """Estável por blocos de EVENTOS_POR_VERSAO eventos"""
+        return f"online-{self.criado_em}-{self.n_eventos // EVENTOS_POR_VERSAO}"
+
+    def save_model(self, path: Optional[str] = None):
+        """Salva modelo + checkpoint (troca atômica, como no LicitacaoClassifier)"""
+        if not self.trained:
+            raise ValueError("Modelo não treinado")
+
+        save_path = path or self.model_path
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+
+        model_data = {
+            'vectorizer': self.vectorizer,
+            'classifier': self.classifier,
+            'version': self.model_version,
+            'algoritmo': self.algoritmo,
+            'checkpoint': self.checkpoint,
+            'n_eventos': self.n_eventos,
+            'criado_em': self.criado_em,
+            'trained_at': datetime.now().isoformat()
+        }
+
+        tmp_path = f"{save_path}.tmp"
+        joblib.dump(model_data, tmp_path)
+        os.replace(tmp_path, save_path)
+        logger.debug(f"Modelo online salvo em: {save_path} ({self.n_eventos} eventos)")
+
+    def _carregar_extras(self, model_data: Dict[str, Any]):
+        self.checkpoint = model_data.get('checkpoint')
+        self.n_eventos = model_data.get('n_eventos', 0)
+        # Modelos salvos antes do criado_em (versão "online-<n_eventos>"): ganham uma
+        # identidade agora e migram para o esquema por blocos no próximo evento
+        self.criado_em = model_data.get('criado_em') or str(model_data.get('trained_at', ''))[:19].replace(':', '')
+
+
+def _eventos(session, checkpoint: tuple, lote: int) -> List[Licitacao]:
+    """Próximo lote de licitações rotuladas após o checkpoint"""
+    query = session.query(Licitacao).filter(Licitacao.status.in_(list(ROTULOS)))
+    ts, ultimo_id = checkpoint
+    if ts is None:
+        return query.filter(
+            Licitacao.status_atualizado_em.is_(None),
+            Licitacao.id > ultimo_id,
+        ).order_by(Licitacao.id).limit(lote).all()
+    return query.filter(
+        Licitacao.status_atualizado_em.isnot(None),
+        or_(
+            Licitacao.status_atualizado_em > ts,
+            and_(Licitacao.status_atualizado_em == ts, Licitacao.id > ultimo_id),
+        ),
+    ).order_by(Licitacao.status_atualizado_em, Licitacao.id).limit(lote).all()
+
+
+def atualizar_modelo_online(classifier: Optional[OnlineLicitacaoClassifier] = None,
+                            lote: int = 1000) -> Dict:
+    """
+    Aplica (partial_fit) os eventos de rótulo desde o último checkpoint e salva
+    o modelo uma vez no fim. Sem eventos novos é uma consulta vazia.
+
+    Returns:
+        {"eventos": N, "versao": versão do modelo (None se ainda não treinado),
+         "ids": licitações rotuladas nos eventos aplicados}
+    """
+    from modules.ml.scoring import _descricoes_por_licitacao, licitacao_para_dict
+
+    classifier = classifier or OnlineLicitacaoClassifier()
+    total = 0
+    ids: List[int] = []
+    session = get_session()
+    try:
+        while True:
+            checkpoint = classifier.checkpoint or _BOOTSTRAP
+            licitacoes = _eventos(session, checkpoint, lote)
+            if not licitacoes:
+                if checkpoint[0] is None:
+                    # Bootstrap concluído: daqui em diante só eventos carimbados
+                    classifier.checkpoint = _INICIO
+                    continue
+                break
+            descricoes = _descricoes_por_licitacao(session, [lic.id for lic in licitacoes])
+            total += classifier.partial_fit(
+                [licitacao_para_dict(lic, descricoes.get(lic.id, [])) for lic in licitacoes],
+                [ROTULOS[lic.status] for lic in licitacoes],
+            )
+            ids.extend(lic.id for lic in licitacoes)
+            ultimo = licitacoes[-1]
+            classifier.checkpoint = (ultimo.status_atualizado_em, ultimo.id)
+            session.expunge_all()
+    finally:
+        session.close()
+
+    if total:
+        classifier.save_model()
+        logger.info(f"Modelo online atualizado: +{total} eventos (versão {classifier.model_version})")
+    return {"eventos": total, "versao": classifier.model_version, "ids": ids}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aprendizado online do classificador de relevância")
+    parser.add_argument("--reiniciar", action="store_true", help="Descarta o modelo online e reaprende do início")
+    parser.add_argument("--lote", type=int, default=1000, help="Eventos por partial_fit")
+    args = parser.parse_args()
+
+    clf = OnlineLicitacaoClassifier()
+    if args.reiniciar:
+        clf._novo_modelo()
+    resultado = atualizar_modelo_online(clf, lote=args.lote)
+    print(f"✅ {resultado['eventos']} eventos aplicados (modelo: {resultado['versao'] or 'não treinado'})")
@@ -1,12 +1,69 @@
 """
 Preprocessador de texto para ML/NLP
 Limpeza, normalização e vetorização de textos de licitações
+O texto preprocessado de cada licitação fica em um cache LRU (chave: hash do
+conteúdo), reaproveitado por treino, scoring em lote e reruns do Dashboard.
 """
+import hashlib
+import os
 import re
+import threading
 import unicodedata
+from collections import OrderedDict
 from typing import List, Dict, Any
 import numpy as np
 
+# Regexes do clean_text, compiladas uma vez
+_RE_URL = re.compile(r'http\S+|www\S+')
+_RE_EMAIL = re.compile(r'\S+@\S+')
+_RE_NUMERO_ISOLADO = re.compile(r'\s\d+\s')
+_RE_ESPECIAIS = re.compile(r'[^\w\s]')
+_RE_ESPACOS = re.compile(r'\s+')
+# Especiais -> espaço seguido de split equivale a extrair as sequências de \w
+_RE_PALAVRAS = re.compile(r'\w+')
+
+# Entradas do cache de texto preprocessado (por processo)
+CACHE_MAX_ENTRADAS = int(os.getenv("ML_PREPROC_CACHE", "50000"))
+
+
+class _CachePreprocessado:
+    """LRU thread-safe: hash do texto combinado -> texto preprocessado"""
+
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self._dados: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def chave(texto: str) -> bytes:
+        return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, chave: bytes):
+        with self._lock:
+            valor = self._dados.get(chave)
+            if valor is None:
+                self.misses += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def put(self, chave: bytes, valor: str):
+        if self.max_entradas <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+            self.hits = self.misses = 0
+
 
 class TextPreprocessor:
     """
@@ -25,9 +82,13 @@ class TextPreprocessor:
         'elas', 'qual', 'nós', 'lhe', 'deles', 'essas', 'esses', 'pelas', 'este'
     }
     
+    _cache = _CachePreprocessado(CACHE_MAX_ENTRADAS)
+    
     @staticmethod
     def remove_accents(text: str) -> str:
         """Remove acentuação mantendo significado"""
+        if text.isascii():
+            return text
         try:
             text = unicodedata.normalize('NFD', text)
             text = text.encode('ascii', 'ignore').decode('utf-8')
@@ -42,19 +103,21 @@ class TextPreprocessor:
             return ""
         
         # Remove URLs
-        text = re.sub(r'http\S+|www\S+', '', text)
+        if 'http' in text or 'www' in text:
+            text = _RE_URL.sub('', text)
         
-        # Remove emails
-        text = re.sub(r'\S+@\S+', '', text)
+        # Remove emails (o \S+@ é caro: só roda se houver '@')
+        if '@' in text:
+            text = _RE_EMAIL.sub('', text)
         
         # Remove números isolados (mas mantém códigos alfanuméricos)
-        text = re.sub(r'\s\d+\s',' ', text)
+        text = _RE_NUMERO_ISOLADO.sub(' ', text)
         
         # Remove caracteres especiais (mantém letras, números e espaços)
-        text = re.sub(r'[^\w\s]', ' ', text)
+        text = _RE_ESPECIAIS.sub(' ', text)
         
         # Normaliza espaços múltiplos
-        text = re.sub(r'\s+', ' ', text)
+        text = _RE_ESPACOS.sub(' ', text)
         
         return text.strip()
     
@@ -70,15 +133,18 @@ class TextPreprocessor:
         # Remove acentos
         text = TextPreprocessor.remove_accents(text)
         
-        # Limpa texto
-        text = TextPreprocessor.clean_text(text)
-        
-        # Tokeniza
-        tokens = text.split()
+        # Limpa e tokeniza (mesmo resultado de clean_text(text).split(), com menos passadas)
+        if 'http' in text or 'www' in text:
+            text = _RE_URL.sub('', text)
+        if '@' in text:
+            text = _RE_EMAIL.sub('', text)
+        text = _RE_NUMERO_ISOLADO.sub(' ', text)
+        tokens = _RE_PALAVRAS.findall(text)
         
         # Remove stopwords se solicitado
         if remove_stopwords:
-            tokens = [t for t in tokens if t not in TextPreprocessor.STOPWORDS_PT and len(t) > 2]
+            stopwords = TextPreprocessor.STOPWORDS_PT
+            tokens = [t for t in tokens if len(t) > 2 and t not in stopwords]
         
         return tokens
     
@@ -97,6 +163,29 @@ class TextPreprocessor:
         Extrai texto relevante de uma licitação para análise ML
         Combina objeto, órgão e modalidade
         """
+        return TextPreprocessor.extract_features_batch([licitacao])[0]
+    
+    @staticmethod
+    def extract_features_batch(licitacoes: List[Dict[str, Any]]) -> List[str]:
+        """
+        Texto preprocessado de várias licitações, consultando o cache pelo hash
+        do texto combinado: só o que mudou (ou nunca foi visto) é reprocessado.
+        """
+        cache = TextPreprocessor._cache
+        resultado = []
+        for licitacao in licitacoes:
+            combinado = TextPreprocessor._texto_combinado(licitacao)
+            chave = cache.chave(combinado)
+            texto = cache.get(chave)
+            if texto is None:
+                texto = TextPreprocessor.preprocess_for_ml(combinado)
+                cache.put(chave, texto)
+            resultado.append(texto)
+        return resultado
+    
+    @staticmethod
+    def _texto_combinado(licitacao: Dict[str, Any]) -> str:
+        """Objeto (3x), órgão, modalidade e até 5 itens, antes do preprocessamento"""
         parts = []
         
         # Objeto (mais peso) - repete 3x
@@ -122,8 +211,7 @@ class TextPreprocessor:
                 parts.append(desc)
         
         # Combina tudo
-        combined_text = ' '.join(parts)
-        return TextPreprocessor.preprocess_for_ml(combined_text)
+        return ' '.join(parts)
 
 
 class FeatureExtractor:
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Registro versionado de modelos de ML
+Cada treino vira uma versão imutável em data/models/registry/<nome>/<versao>/
+(model.joblib + meta.json com métricas, hash do conjunto de treino e data de
+criação). A versão em produção é apontada pelo arquivo <nome>/CURRENT,
+trocado atomicamente na promoção: processos com o modelo residente veem a
+troca pelo mtime do ponteiro e recarregam.
+
+Os artefatos são gravados sem compressão e carregados com mmap_mode='r':
+os arrays numpy (coeficientes do modelo linear, idf do TF-IDF) ficam no
+page cache do SO e são compartilhados entre Streamlit, API e scheduler.
+As árvores do RandomForest são copiadas pelo próprio sklearn ao carregar.
+
+Uso:
+    python modules/ml/registry.py                      # lista versões
+    python modules/ml/registry.py --promover 20250101120000
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import joblib
+
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+REGISTRY_DIR = os.getenv("ML_REGISTRY_DIR", "data/models/registry")
+MODELO_PADRAO = "licitacao_classifier"
+ARQUIVO_MODELO = "model.joblib"
+ARQUIVO_META = "meta.json"
+PONTEIRO_ATUAL = "CURRENT"
+
+
+def hash_conjunto_treino(textos: List[str], labels: List[int]) -> str:
+    """SHA-256 do conjunto de treino (textos + rótulos, na ordem)"""
+    h = hashlib.sha256()
+    for texto, label in zip(textos, labels):
+        h.update(f"{label}\t{texto}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _gravar_atomico(caminho: Path, conteudo: str):
+    tmp = caminho.with_name(caminho.name + ".tmp")
+    tmp.write_text(conteudo, encoding="utf-8")
+    os.replace(tmp, caminho)
+
+
+class ModelRegistry:
+    """Versões de um modelo em disco + ponteiro da versão atual"""
+
+    def __init__(self, nome: str = MODELO_PADRAO, base_dir: Optional[str] = None):
+        self.nome = nome
+        self.dir = Path(base_dir or REGISTRY_DIR) / nome
+
+    @property
+    def ponteiro(self) -> Path:
+        """Arquivo CURRENT (seu mtime sinaliza promoções aos processos residentes)"""
+        return self.dir / PONTEIRO_ATUAL
+
+    def versao_atual(self) -> Optional[str]:
+        try:
+            versao = self.ponteiro.read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return versao or None
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """Metadados de todas as versões, da mais recente para a mais antiga"""
+        if not self.dir.exists():
+            return []
+        atual = self.versao_atual()
+        versoes = []
+        for meta_path in self.dir.glob(f"*/{ARQUIVO_META}"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            meta["atual"] = meta.get("versao") == atual
+            versoes.append(meta)
+        return sorted(versoes, key=lambda m: m.get("created_at", ""), reverse=True)
+
+    def registrar(self, model_data: Dict[str, Any], versao: str, metricas: Optional[Dict] = None,
+                  dataset_hash: Optional[str] = None, promover: bool = True) -> str:
+        """
+        Grava uma nova versão (diretório temporário + rename) e, por padrão,
+        promove-a a atual.
+
+        Returns:
+            A versão registrada
+        """
+        destino = self.dir / versao
+        if destino.exists():
+            raise ValueError(f"Versão já registrada: {self.nome}/{versao}")
+
+        tmp = self.dir / f".{versao}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            # Sem compressão: requisito do mmap_mode no load
+            joblib.dump(model_data, tmp / ARQUIVO_MODELO)
+            meta = {
+                "nome": self.nome,
+                "versao": versao,
+                "created_at": datetime.now().isoformat(),
+                "dataset_hash": dataset_hash,
+                "metricas": metricas or {},
+            }
+            (tmp / ARQUIVO_META).write_text(json.dumps(meta, ensure_ascii=False, indent=2, default=str),
+                                            encoding="utf-8")
+            os.replace(tmp, destino)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        logger.info(f"Modelo registrado: {self.nome}/{versao}")
+        if promover:
+            self.promover(versao)
+        return versao
+
+    def promover(self, versao: str):
+        """Aponta CURRENT para a versão (troca atômica do ponteiro)"""
+        if not (self.dir / versao / ARQUIVO_MODELO).exists():
+            raise ValueError(f"Versão inexistente: {self.nome}/{versao}")
+        _gravar_atomico(self.ponteiro, versao + "\n")
+        logger.info(f"Versão atual de {self.nome}: {versao}")
+
+    def carregar(self, versao: Optional[str] = None, mmap: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Carrega o model_data da versão (padrão: a atual). Com mmap, os arrays
+        numpy são mapeados somente leitura em vez de copiados para o processo.
+        """
+        versao = versao or self.versao_atual()
+        if not versao:
+            return None
+        caminho = self.dir / versao / ARQUIVO_MODELO
+        if not caminho.exists():
+            logger.warning(f"Artefato ausente: {caminho}")
+            return None
+        return joblib.load(caminho, mmap_mode="r" if mmap else None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registro de versões de modelos ML")
+    parser.add_argument("--nome", default=MODELO_PADRAO, help="Nome do modelo")
+    parser.add_argument("--promover", metavar="VERSAO", help="Promove a versão a atual")
+    args = parser.parse_args()
+
+    registro = ModelRegistry(args.nome)
+    if args.promover:
+        registro.promover(args.promover)
+        print(f"✅ {args.nome}: versão atual = {args.promover}")
+    else:
+        versoes = registro.listar()
+        if not versoes:
+            print(f"Nenhuma versão registrada para {args.nome}")
+        for meta in versoes:
+            metricas = meta.get("metricas", {})
+            f1 = metricas.get("f1_score")
+            print(f"{'*' if meta['atual'] else ' '} {meta['versao']}  {meta.get('created_at', '')[:19]}  "
+                  f"{metricas.get('algoritmo', '-'):<14} F1={f1 if f1 is None else round(f1, 3)}  "
+                  f"dataset={str(meta.get('dataset_hash'))[:12]}")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Scores de relevância (ML) persistidos em Licitacao
+Licitações novas são pontuadas no pipeline de busca; este job repontua em lote
+todas as linhas cujo score foi gerado por outra versão do modelo (ou nunca foi
+calculado). Assim o Dashboard e a API ordenam/filtram por score direto no SQL.
+
+Uso:
+    python -m modules.ml.scoring            # só o que está desatualizado
+    python -m modules.ml.scoring --forcar   # repontua tudo
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import or_, update
+
+from modules.database.database import get_session, ItemLicitacao, Licitacao
+from modules.ml.classifier import LicitacaoClassifier, get_classifier
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def licitacao_para_dict(lic, itens: Optional[List[Dict]] = None) -> Dict:
+    """Entrada do classificador a partir de um Licitacao (mesmos campos do treino)"""
+    if itens is None:
+        itens = [{'descricao': item.descricao} for item in lic.itens] if lic.itens else []
+    return {
+        'orgao': lic.orgao or '',
+        'uf': lic.uf or '',
+        'modalidade': lic.modalidade or '',
+        'objeto': lic.objeto or '',
+        'itens': itens,
+        'data_encerramento_proposta': lic.data_encerramento_proposta,
+    }
+
+
+def _descricoes_por_licitacao(session, ids: List[int]) -> Dict[int, List[Dict]]:
+    """Descrições dos itens de várias licitações em uma única consulta"""
+    descricoes: Dict[int, List[Dict]] = {}
+    if not ids:
+        return descricoes
+    for licitacao_id, descricao in session.query(ItemLicitacao.licitacao_id, ItemLicitacao.descricao).filter(
+        ItemLicitacao.licitacao_id.in_(ids)
+    ).order_by(ItemLicitacao.id):
+        descricoes.setdefault(licitacao_id, []).append({'descricao': descricao})
+    return descricoes
+
+
+def pontuar_licitacoes(session, licitacoes: List[Licitacao],
+                       classifier: Optional[LicitacaoClassifier] = None) -> int:
+    """
+    Calcula e grava (via UPDATE em lote) o score das licitações informadas.
+    O commit fica a cargo de quem chama. Retorna quantas foram pontuadas.
+    """
+    classifier = classifier or get_classifier()
+    if not licitacoes or not classifier.trained:
+        return 0
+
+    descricoes = _descricoes_por_licitacao(session, [lic.id for lic in licitacoes])
+    dicts = [licitacao_para_dict(lic, descricoes.get(lic.id, [])) for lic in licitacoes]
+    scores = classifier.predict_proba_batch(dicts)
+    session.execute(
+        update(Licitacao),
+        [
+            {"id": lic.id, "score_relevancia": round(score, 4), "score_modelo": classifier.model_version}
+            for lic, score in zip(licitacoes, scores)
+        ],
+    )
+    return len(licitacoes)
+
+
+def repontuar_licitacoes(forcar: bool = False, lote: int = 500, ids: Optional[List[int]] = None) -> Dict:
+    """
+    Repontua, em lotes por id, as licitações sem score ou com score de outra
+    versão do modelo. Com o modelo inalterado é só uma consulta vazia.
+    Com `ids`, repontua só essas licitações (mesmo com score da versão atual).
+
+    Returns:
+        {"pontuadas": N, "versao": versão do modelo (None se não treinado)}
+    """
+    classifier = get_classifier()
+    if not classifier.trained:
+        logger.info("Modelo não treinado; nada a pontuar")
+        return {"pontuadas": 0, "versao": None}
+
+    versao = classifier.model_version
+    ids_ordenados = sorted(set(ids)) if ids is not None else None
+    total = 0
+    ultimo_id = 0
+    session = get_session()
+    try:
+        while True:
+            query = session.query(Licitacao).filter(Licitacao.id > ultimo_id)
+            if ids is not None:
+                # Lote de ids por consulta (limite de parâmetros do SQLite)
+                pendentes = [i for i in ids_ordenados if i > ultimo_id][:lote]
+                query = query.filter(Licitacao.id.in_(pendentes))
+            elif not forcar:
+                query = query.filter(or_(Licitacao.score_modelo.is_(None), Licitacao.score_modelo != versao))
+            licitacoes = query.order_by(Licitacao.id).limit(lote).all()
+            if not licitacoes:
+                break
+            total += pontuar_licitacoes(session, licitacoes, classifier)
+            session.commit()
+            ultimo_id = licitacoes[-1].id
+            session.expunge_all()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    if total:
+        logger.info(f"Scores ML atualizados: {total} licitações (modelo {versao})")
+    return {"pontuadas": total, "versao": versao}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Repontua a relevância (ML) das licitações")
+    parser.add_argument("--forcar", action="store_true", help="Repontua todas, mesmo com score da versão atual")
+    parser.add_argument("--lote", type=int, default=500, help="Licitações por lote")
+    args = parser.parse_args()
+
+    resultado = repontuar_licitacoes(forcar=args.forcar, lote=args.lote)
+    print(f"✅ {resultado['pontuadas']} licitações pontuadas (modelo: {resultado['versao'] or 'não treinado'})")
@@ -3,6 +3,7 @@
 Script de treinamento do modelo de classificação de licitações
 Carrega dados históricos do banco e treina modelo ML
 """
+import argparse
 import sys
 from pathlib import Path
 
@@ -10,7 +11,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from modules.database.database import get_session, Licitacao
-from modules.ml.classifier import LicitacaoClassifier
+from modules.ml.classifier import ALGORITMOS, LicitacaoClassifier
+from modules.ml.scoring import licitacao_para_dict, repontuar_licitacoes
 from modules.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -25,47 +27,25 @@ def load_training_data():
         Labels: 1 = Salva (relevante), 0 = Nova/Não Salva (não relevante)
     """
     session = get_session()
-    
-    # Busca licitações salvas (relevantes)
-    salvas = session.query(Licitacao).filter(Licitacao.status == 'Salva').all()
-    
-    # Busca licitações não salvas (não relevantes)
-    nao_salvas = session.query(Licitacao).filter(Licitacao.status != 'Salva').limit(len(salvas) * 3).all()
-    
-    session.close()
-    
-    logger.info(f"Dados carregados: {len(salvas)} salvas, {len(nao_salvas)} não salvas")
-    
-    # Converte para dicionários
-    licitacoes_dict = []
-    labels = []
-    
-    for lic in salvas:
-        licitacoes_dict.append({
-            'orgao': lic.orgao,
-            'uf': lic.uf,
-            'modalidade': lic.modalidade,
-            'objeto': lic.objeto,
-            'itens': [{'descricao': item.descricao} for item in lic.itens] if lic.itens else [],
-            'data_encerramento_proposta': lic.data_encerramento_proposta,
-        })
-        labels.append(1)  # Relevante
-    
-    for lic in nao_salvas:
-        licitacoes_dict.append({
-            'orgao': lic.orgao,
-            'uf': lic.uf,
-            'modalidade': lic.modalidade,
-            'objeto': lic.objeto,
-            'itens': [{'descricao': item.descricao} for item in lic.itens] if lic.itens else [],
-            'data_encerramento_proposta': lic.data_encerramento_proposta,
-        })
-        labels.append(0)  # Não relevante
+    try:
+        # Busca licitações salvas (relevantes)
+        salvas = session.query(Licitacao).filter(Licitacao.status == 'Salva').all()
+        
+        # Busca licitações não salvas (não relevantes)
+        nao_salvas = session.query(Licitacao).filter(Licitacao.status != 'Salva').limit(len(salvas) * 3).all()
+        
+        logger.info(f"Dados carregados: {len(salvas)} salvas, {len(nao_salvas)} não salvas")
+        
+        # Converte para dicionários (com a sessão aberta: itens são carregados sob demanda)
+        licitacoes_dict = [licitacao_para_dict(lic) for lic in salvas + nao_salvas]
+        labels = [1] * len(salvas) + [0] * len(nao_salvas)  # 1 = Relevante, 0 = Não relevante
+    finally:
+        session.close()
     
     return licitacoes_dict, labels
 
 
-def main():
+def main(algoritmo=None):
     """Função principal de treinamento"""
     print("=" * 60)
     print("TREINAMENTO DO MODELO DE CLASSIFICAÇÃO")
@@ -85,7 +65,7 @@ def main():
     
     # Treina modelo
     print("\n2. Treinando modelo...")
-    classifier = LicitacaoClassifier()
+    classifier = LicitacaoClassifier(algoritmo=algoritmo)
     
     try:
         metrics = classifier.train(licitacoes, labels)
@@ -97,11 +77,18 @@ def main():
         print(f"   - Tamanho treino: {metrics['train_size']}")
         print(f"   - Tamanho teste: {metrics['test_size']}")
         print(f"   - Features: {metrics['n_features']}")
+        print(f"   - Algoritmo: {metrics['algoritmo']}")
         
         # Salva modelo
         print("\n4. Salvando modelo...")
         classifier.save_model()
-        print("   ✓ Modelo salvo em: data/models/licitacao_classifier.pkl")
+        print(f"   ✓ Versão {classifier.model_version} registrada e promovida a atual")
+        print(f"   ✓ Conjunto de treino: {metrics['dataset_hash'][:12]}")
+        
+        # Novo modelo: scores persistidos da versão anterior ficam desatualizados
+        print("\n5. Atualizando scores das licitações...")
+        resultado = repontuar_licitacoes()
+        print(f"   ✓ {resultado['pontuadas']} licitações pontuadas (modelo {resultado['versao']})")
         
         print("\n" + "=" * 60)
         print("✅ TREINAMENTO CONCLUÍDO COM SUCESSO")
@@ -115,4 +102,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Treina o classificador de relevância")
+    parser.add_argument("--algoritmo", choices=ALGORITMOS, default=None,
+                        help="random_forest ou linear (padrão: ML_ALGORITMO ou random_forest)")
+    args = parser.parse_args()
+    main(algoritmo=args.algoritmo)
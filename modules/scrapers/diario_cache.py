@@ -0,0 +1,181 @@
+"""
+Cache de PDFs de diários oficiais
+O scheduler roda às 08:00 e às 14:00 contra a mesma edição do diário. Aqui:
+  - o download é condicional (If-None-Match / If-Modified-Since), indexado
+    pela URL do PDF: edição inalterada responde 304 e não trafega o arquivo;
+  - o texto extraído fica em disco, uma página por arquivo, indexado pelo
+    SHA-256 do conteúdo do PDF: a mesma edição nunca é extraída duas vezes.
+
+Layout em data/cache/diarios/:
+    indice.json                      url -> etag, last_modified, sha256, verificado_em
+    textos/<sha256>/pagina_0001.txt  texto de cada página
+    textos/<sha256>/paginas.json     nº de páginas (gravado por último: marca extração completa)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from modules.scrapers.pdf_text import extrair_paginas as _extrair_paginas_pdf
+from modules.utils.logging_config import get_logger
+from modules.utils.metrics import CACHE_REQUESTS
+
+logger = get_logger(__name__)
+
+# Caminho do cache
+BASE_DIR = Path(__file__).parent.parent.parent
+DIARIOS_CACHE_DIR = BASE_DIR / 'data' / 'cache' / 'diarios'
+
+# Textos de edições sem acesso há mais que isso são removidos
+DEFAULT_RETENCAO_DIAS = 15
+
+
+class DiarioPDFCache:
+    """Download condicional + texto por página em disco (thread-safe)"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, retencao_dias: int = DEFAULT_RETENCAO_DIAS):
+        self.cache_dir = Path(cache_dir or DIARIOS_CACHE_DIR)
+        self.textos_dir = self.cache_dir / 'textos'
+        self.indice_path = self.cache_dir / 'indice.json'
+        self.retencao_dias = retencao_dias
+        self._lock = threading.Lock()
+
+    # === ÍNDICE (URL -> validadores HTTP) ===
+
+    def _carregar_indice(self) -> Dict[str, Dict]:
+        try:
+            with open(self.indice_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _salvar_indice(self, indice: Dict[str, Dict]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.indice_path.with_suffix('.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.indice_path)
+
+    # === TEXTO POR PÁGINA ===
+
+    def _dir_texto(self, sha256: str) -> Path:
+        return self.textos_dir / sha256
+
+    def paginas_em_cache(self, sha256: str) -> Optional[List[str]]:
+        """Texto das páginas de um PDF já extraído (None se ausente ou incompleto)"""
+        destino = self._dir_texto(sha256)
+        try:
+            total = json.loads((destino / 'paginas.json').read_text(encoding='utf-8'))['total']
+            paginas = [(destino / f'pagina_{n:04d}.txt').read_text(encoding='utf-8') for n in range(1, total + 1)]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        os.utime(destino)  # marca uso recente (retenção)
+        return paginas
+
+    def salvar_paginas(self, sha256: str, paginas: List[str]):
+        destino = self._dir_texto(sha256)
+        destino.mkdir(parents=True, exist_ok=True)
+        for n, texto in enumerate(paginas, start=1):
+            (destino / f'pagina_{n:04d}.txt').write_text(texto, encoding='utf-8')
+        (destino / 'paginas.json').write_text(json.dumps({'total': len(paginas)}), encoding='utf-8')
+
+    @staticmethod
+    def extrair_paginas(conteudo: bytes) -> List[str]:
+        # Diários grandes são divididos em intervalos de páginas (pool de processos)
+        return _extrair_paginas_pdf(conteudo)
+
+    def limpar_antigos(self) -> int:
+        """Remove textos de edições não usadas há mais de retencao_dias"""
+        if not self.textos_dir.exists():
+            return 0
+        limite = time.time() - self.retencao_dias * 86400
+        removidos = 0
+        for destino in self.textos_dir.iterdir():
+            try:
+                if destino.is_dir() and destino.stat().st_mtime < limite:
+                    shutil.rmtree(destino, ignore_errors=True)
+                    removidos += 1
+            except OSError:
+                continue
+        return removidos
+
+    # === DOWNLOAD CONDICIONAL ===
+
+    def obter_paginas(self, session, url: str, headers: Optional[Dict] = None,
+                      **kwargs) -> Tuple[List[str], Dict]:
+        """
+        Texto por página do PDF em `url`, baixando/extraindo só o necessário.
+
+        Args:
+            session: requests.Session do scraper (retries, adapters)
+            url: URL do PDF (chave do índice)
+            headers: Headers base da requisição
+            **kwargs: Repassados ao session.get (timeout, verify...)
+
+        Returns:
+            (paginas, info) com info = {"sha256", "download": "baixado"|"nao_modificado",
+            "extracao": "cache"|"extraido", "bytes": tamanho baixado (0 se 304)}
+        """
+        with self._lock:
+            entrada = self._carregar_indice().get(url, {})
+
+        # Só vale a pena perguntar "mudou?" se o texto daquela versão ainda existe
+        paginas = self.paginas_em_cache(entrada['sha256']) if entrada.get('sha256') else None
+        req_headers = dict(headers or {})
+        if paginas is not None:
+            if entrada.get('etag'):
+                req_headers['If-None-Match'] = entrada['etag']
+            if entrada.get('last_modified'):
+                req_headers['If-Modified-Since'] = entrada['last_modified']
+
+        response = session.get(url, headers=req_headers, **kwargs)
+        if response.status_code == 304 and paginas is not None:
+            CACHE_REQUESTS.inc(cache="diario_pdf", resultado="hit")
+            CACHE_REQUESTS.inc(cache="diario_texto", resultado="hit")
+            info = {"sha256": entrada['sha256'], "download": "nao_modificado", "extracao": "cache", "bytes": 0}
+            self._registrar(url, entrada['sha256'], entrada.get('etag'), entrada.get('last_modified'))
+            return paginas, info
+        response.raise_for_status()
+        CACHE_REQUESTS.inc(cache="diario_pdf", resultado="miss")
+
+        conteudo = response.content
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        paginas = self.paginas_em_cache(sha256)
+        if paginas is not None:
+            # Servidor sem validadores (ou URL nova) mas o mesmo PDF: não extrai de novo
+            CACHE_REQUESTS.inc(cache="diario_texto", resultado="hit")
+            extracao = "cache"
+        else:
+            CACHE_REQUESTS.inc(cache="diario_texto", resultado="miss")
+            paginas = self.extrair_paginas(conteudo)
+            self.salvar_paginas(sha256, paginas)
+            extracao = "extraido"
+            removidos = self.limpar_antigos()
+            if removidos:
+                logger.info(f"Cache de diários: {removidos} edições antigas removidas")
+
+        self._registrar(url, sha256, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return paginas, {"sha256": sha256, "download": "baixado", "extracao": extracao, "bytes": len(conteudo)}
+
+    def _registrar(self, url: str, sha256: str, etag: Optional[str], last_modified: Optional[str]):
+        with self._lock:
+            indice = self._carregar_indice()
+            indice[url] = {
+                'sha256': sha256,
+                'etag': etag,
+                'last_modified': last_modified,
+                'verificado_em': datetime.now().isoformat(),
+            }
+            # URLs cujo texto já foi removido pela retenção saem do índice
+            indice = {u: e for u, e in indice.items() if self._dir_texto(e.get('sha256', '')).exists()}
+            self._salvar_indice(indice)
+
+
+# Instância global
+diario_pdf_cache = DiarioPDFCache()
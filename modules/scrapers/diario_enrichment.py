@@ -0,0 +1,479 @@
+"""
+Enriquecimento por IA dos avisos de diários oficiais
+Resumo do objeto + itens extraídos por LLM (OpenRouter), com:
+  - pool limitado de workers: os avisos aprovados de uma edição são enviados
+    juntos, não um a um;
+  - cache persistente pelo hash do aviso normalizado: reprocessar a mesma
+    edição (08:00 e 14:00, ou outro diário com o mesmo aviso) não chama a IA;
+  - orçamento por execução (tokens estimados + tempo): em vez de desligar o
+    enriquecimento no primeiro 429, espera (backoff) e segue até o orçamento
+    acabar. O que sobrar por orçamento/rate limit fica pendente e é drenado
+    depois (drenar_pendentes), atualizando as licitações já gravadas. Falhas
+    que não são de limite (JSON inválido, erro HTTP) são tentadas em no máximo
+    FALHAS_MAXIMAS passadas; sem chave de API nada fica pendente.
+
+Layout em data/cache/diarios/enriquecimento/:
+    respostas.jsonl   {"chave", "dados", "em"} por linha (a última ocorrência vence)
+    pendentes.json    chave -> {"texto", "pncp_ids", "em", "falhas"}
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules.ai.ai_config import get_model
+from modules.utils.logging_config import get_logger
+from modules.utils.metrics import CACHE_REQUESTS
+
+from .diario_cache import DIARIOS_CACHE_DIR
+from .diario_rules import normalizar
+
+logger = get_logger(__name__)
+
+ENRIQUECIMENTO_DIR = DIARIOS_CACHE_DIR / 'enriquecimento'
+
+DIARIO_IA_WORKERS = int(os.getenv("DIARIO_IA_WORKERS", "4"))
+# Orçamento por execução: tokens estimados (prompt + resposta) e segundos
+DIARIO_IA_TOKENS = int(os.getenv("DIARIO_IA_TOKENS_POR_EXECUCAO", "150000"))
+DIARIO_IA_SEGUNDOS = float(os.getenv("DIARIO_IA_SEGUNDOS_POR_EXECUCAO", "300"))
+# Respostas e pendências mais antigas que isso são descartadas
+RETENCAO_DIAS = 60
+
+# O prompt só leva o começo do aviso: é isso que define a resposta (e a chave do cache)
+LIMITE_TEXTO = 8000
+TENTATIVAS = 3
+BACKOFF_INICIAL = 5.0
+BACKOFF_MAXIMO = 60.0
+# Passadas com falha (não rate limit) antes de um aviso sair da fila de pendências
+FALHAS_MAXIMAS = 2
+
+# Resultado de uma tentativa de enriquecimento
+ENRIQUECIDO = "ok"
+ADIADO = "adiado"        # orçamento, prazo ou rate limit: fica pendente
+FALHOU = "falha"         # JSON inválido, erro HTTP: pendente até FALHAS_MAXIMAS
+SEM_CHAVE = "sem_chave"  # IA não configurada: não fica pendente
+
+_RE_ESPACOS = re.compile(r'\s+')
+
+PROMPT = """
+            Analise o seguinte aviso de licitação extraído de um Diário Oficial.
+
+            Tarefa:
+            1. Identifique o Objeto principal de forma resumida.
+            2. Extraia a lista de itens/produtos (se houver) com quantidade estimada.
+            3. Se não houver itens explícitos, retorne lista vazia.
+
+            Texto:
+            {texto}
+            Retorne APENAS um JSON válido no formato:
+            {{
+                "objeto_resumido": "...",
+                "itens": [
+                    {{"descricao": "Nome do Item", "quantidade": 100, "unidade": "UN", "valor_estimado": 0.0, "valor_unitario": 0.0}}
+                ]
+            }}
+            """
+
+
+def chave_aviso(texto: str) -> str:
+    """SHA-256 do trecho enviado à IA, sem acentos/caixa/espaços repetidos"""
+    base = _RE_ESPACOS.sub(' ', normalizar(texto[:LIMITE_TEXTO])).strip()
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def _tokens_estimados(texto: str) -> int:
+    # ~4 caracteres por token (texto em português)
+    return len(texto) // 4 + 1
+
+
+def _eh_rate_limit(erro: Exception) -> bool:
+    msg = str(erro).lower()
+    # OpenRouterClient esgota os modelos com 429 e termina com "Último erro: None"
+    return "429" in msg or "quota" in msg or "rate limit" in msg or msg.endswith("none")
+
+
+class OrcamentoIA:
+    """Tokens estimados e tempo de uma execução (thread-safe)"""
+
+    def __init__(self, tokens: int = DIARIO_IA_TOKENS, segundos: float = DIARIO_IA_SEGUNDOS):
+        self.tokens = tokens
+        self.segundos = segundos
+        self.inicio = time.monotonic()
+        self.usados = 0
+        self._lock = threading.Lock()
+
+    @property
+    def prazo(self) -> float:
+        return self.inicio + self.segundos
+
+    def esgotado(self) -> bool:
+        with self._lock:
+            return self.usados >= self.tokens or time.monotonic() >= self.prazo
+
+    def reservar(self, tokens: int) -> bool:
+        """Reserva tokens para uma chamada; False se não cabem (ou o tempo acabou)"""
+        with self._lock:
+            if time.monotonic() >= self.prazo or self.usados + tokens > self.tokens:
+                return False
+            self.usados += tokens
+            return True
+
+    def consumir(self, tokens: int):
+        with self._lock:
+            self.usados += tokens
+
+
+class EnriquecedorDiarios:
+    """Pool de chamadas à IA + cache de respostas + fila de pendências"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, workers: int = DIARIO_IA_WORKERS):
+        self.dir = Path(cache_dir or ENRIQUECIMENTO_DIR)
+        self.respostas_path = self.dir / 'respostas.jsonl'
+        self.pendentes_path = self.dir / 'pendentes.json'
+        self.workers = max(1, workers)
+        self._lock = threading.RLock()
+        self._respostas: Optional[Dict[str, Dict]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._orcamento: Optional[OrcamentoIA] = None
+        self._pausa_ate = 0.0
+        self._backoff = BACKOFF_INICIAL
+
+    # === CACHE DE RESPOSTAS ===
+
+    def _carregar_respostas(self) -> Dict[str, Dict]:
+        if self._respostas is not None:
+            return self._respostas
+        respostas: Dict[str, Dict] = {}
+        linhas = 0
+        limite = (datetime.now() - timedelta(days=RETENCAO_DIAS)).isoformat()
+        try:
+            with open(self.respostas_path, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    linhas += 1
+                    try:
+                        entrada = json.loads(linha)
+                    except ValueError:
+                        continue  # linha parcial de uma escrita interrompida
+                    if entrada.get('em', '') >= limite:
+                        respostas[entrada['chave']] = entrada
+        except FileNotFoundError:
+            pass
+        if linhas > 2 * len(respostas) + 100:
+            self._regravar_respostas(respostas)
+        self._respostas = respostas
+        return respostas
+
+    def _regravar_respostas(self, respostas: Dict[str, Dict]):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.respostas_path.with_suffix('.jsonl.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entrada in respostas.values():
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.respostas_path)
+
+    def resposta_em_cache(self, chave: str) -> Optional[Dict]:
+        with self._lock:
+            entrada = self._carregar_respostas().get(chave)
+        return entrada['dados'] if entrada else None
+
+    def _salvar_resposta(self, chave: str, dados: Dict):
+        entrada = {'chave': chave, 'dados': dados, 'em': datetime.now().isoformat()}
+        with self._lock:
+            self._carregar_respostas()[chave] = entrada
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(self.respostas_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+
+    # === PENDÊNCIAS ===
+
+    def _carregar_pendentes(self) -> Dict[str, Dict]:
+        try:
+            with open(self.pendentes_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _salvar_pendentes(self, pendentes: Dict[str, Dict]):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.pendentes_path.with_suffix('.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(pendentes, f, ensure_ascii=False)
+        os.replace(tmp, self.pendentes_path)
+
+    def _registrar_pendentes(self, avisos: Dict[str, Tuple[str, List[str]]],
+                             falhas: Optional[Dict[str, int]] = None):
+        if not avisos:
+            return
+        falhas = falhas or {}
+        with self._lock:
+            pendentes = self._carregar_pendentes()
+            for chave, (texto, pncp_ids) in avisos.items():
+                entrada = pendentes.setdefault(chave, {'texto': texto, 'pncp_ids': [],
+                                                       'em': datetime.now().isoformat()})
+                entrada['pncp_ids'] = sorted(set(entrada['pncp_ids']) | set(pncp_ids))
+                entrada['falhas'] = max(entrada.get('falhas', 0), falhas.get(chave, 0))
+            self._salvar_pendentes(pendentes)
+
+    def pendentes(self) -> int:
+        with self._lock:
+            return len(self._carregar_pendentes())
+
+    # === ORÇAMENTO ===
+
+    def nova_execucao(self, tokens: int = DIARIO_IA_TOKENS, segundos: float = DIARIO_IA_SEGUNDOS) -> OrcamentoIA:
+        """Inicia o orçamento de uma execução (coleta), compartilhado por todos os diários"""
+        with self._lock:
+            self._orcamento = OrcamentoIA(tokens, segundos)
+            return self._orcamento
+
+    def orcamento_execucao(self) -> OrcamentoIA:
+        """Orçamento corrente; sem nova_execucao() recente (ex.: busca manual), abre um novo"""
+        with self._lock:
+            if self._orcamento is None or time.monotonic() > self._orcamento.prazo + self._orcamento.segundos:
+                self._orcamento = OrcamentoIA()
+            return self._orcamento
+
+    # === CHAMADAS ===
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Pool único: vários diários em paralelo dividem os mesmos workers"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="diario-ia")
+            return self._executor
+
+    def _chamar_ia(self, texto: str) -> str:
+        """Uma chamada ao LLM. Retorna o texto da resposta."""
+        model = get_model(temperature=0.1)
+        return model.generate_content(PROMPT.format(texto=texto[:LIMITE_TEXTO])).text
+
+    @staticmethod
+    def _ler_json(resposta: str):
+        raw_json = resposta.replace('```json', '').replace('```', '').strip()
+
+        # Tenta limpar o JSON se vier sujo
+        if '{' in raw_json:
+            raw_json = raw_json[raw_json.find('{'):raw_json.rfind('}') + 1]
+
+        return json.loads(raw_json)
+
+    def _aguardar_pausa(self, orcamento: OrcamentoIA) -> bool:
+        """Espera o backoff compartilhado; False se o prazo da execução acaba antes"""
+        with self._lock:
+            pausa_ate = self._pausa_ate
+        if pausa_ate >= orcamento.prazo:
+            return False
+        espera = pausa_ate - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        return True
+
+    def _enriquecer_um(self, chave: str, texto: str, orcamento: OrcamentoIA) -> Tuple[Optional[Dict], str]:
+        """Chama a IA respeitando orçamento e backoff. Retorna (dados ou None, resultado)."""
+        for _ in range(TENTATIVAS):
+            if not self._aguardar_pausa(orcamento):
+                return None, ADIADO
+            reserva = _tokens_estimados(PROMPT) + _tokens_estimados(texto[:LIMITE_TEXTO])
+            if not orcamento.reservar(reserva):
+                return None, ADIADO
+            try:
+                resposta = self._chamar_ia(texto)
+            except Exception as e:
+                orcamento.consumir(-reserva)  # sem resposta: não gastou tokens
+                if isinstance(e, ValueError):
+                    # Chave não configurada: nenhuma tentativa vai funcionar
+                    logger.warning("IA (Enrich) indisponível: %s", e)
+                    return None, SEM_CHAVE
+                if not _eh_rate_limit(e):
+                    logger.warning("Erro na IA (Enrich): %s", e, exc_info=True)
+                    return None, FALHOU
+                with self._lock:
+                    # Backoff compartilhado: todos os workers param juntos
+                    self._pausa_ate = max(self._pausa_ate, time.monotonic() + self._backoff)
+                    logger.info(f"IA com rate limit/quota: pausa de {self._backoff:.0f}s")
+                    self._backoff = min(self._backoff * 2, BACKOFF_MAXIMO)
+                continue
+            with self._lock:
+                self._backoff = BACKOFF_INICIAL
+            if not isinstance(resposta, str):
+                # Ex.: message.content = null no OpenRouter
+                logger.warning("Erro na IA (Enrich): resposta vazia (%s)", type(resposta).__name__)
+                return None, FALHOU
+            try:
+                orcamento.consumir(_tokens_estimados(resposta))
+                dados = self._ler_json(resposta)
+            except Exception as e:
+                logger.warning("Erro na IA (Enrich): resposta não é JSON válido: %s", e)
+                return None, FALHOU
+            if not isinstance(dados, dict):
+                return None, FALHOU
+            self._salvar_resposta(chave, dados)
+            return dados, ENRIQUECIDO
+        # Rate limit em todas as tentativas
+        return None, ADIADO
+
+    def enriquecer_lote(self, avisos: Iterable[Tuple[str, str]],
+                        orcamento: Optional[OrcamentoIA] = None,
+                        falhas_anteriores: Optional[Dict[str, int]] = None) -> Dict[str, Dict]:
+        """
+        Enriquece vários avisos de uma vez.
+
+        Args:
+            avisos: Pares (pncp_id, texto do aviso)
+            orcamento: Orçamento da execução (padrão: orcamento_execucao())
+            falhas_anteriores: chave -> passadas que já falharam (drenar_pendentes)
+
+        Returns:
+            pncp_id -> dados da IA ({"objeto_resumido", "itens"}), só para os
+            enriquecidos; os adiados (orçamento/rate limit) ficam pendentes, os
+            que falharam só até FALHAS_MAXIMAS passadas
+        """
+        por_chave: Dict[str, Tuple[str, List[str]]] = {}
+        for pncp_id, texto in avisos:
+            chave = chave_aviso(texto)
+            por_chave.setdefault(chave, (texto, []))[1].append(pncp_id)
+
+        resultados: Dict[str, Dict] = {}
+        faltantes: Dict[str, Tuple[str, List[str]]] = {}
+        for chave, (texto, pncp_ids) in por_chave.items():
+            dados = self.resposta_em_cache(chave)
+            if dados is not None:
+                CACHE_REQUESTS.inc(cache="diario_ia", resultado="hit")
+                resultados.update((pncp_id, dados) for pncp_id in pncp_ids)
+            else:
+                CACHE_REQUESTS.inc(cache="diario_ia", resultado="miss")
+                faltantes[chave] = (texto, pncp_ids)
+
+        if faltantes:
+            orcamento = orcamento or self.orcamento_execucao()
+            pool = self._pool()
+            futuros = {chave: pool.submit(self._enriquecer_um, chave, texto, orcamento)
+                       for chave, (texto, _) in faltantes.items()}
+            falhas_anteriores = falhas_anteriores or {}
+            sobras = {}
+            falhas = {}
+            descartados = 0
+            for chave, futuro in futuros.items():
+                try:
+                    dados, resultado = futuro.result()
+                except Exception as e:
+                    # Um worker com erro inesperado não derruba o lote (o aviso segue com o texto original)
+                    logger.warning("Erro na IA (Enrich): %s", e, exc_info=True)
+                    dados, resultado = None, FALHOU
+                if resultado == ENRIQUECIDO:
+                    resultados.update((pncp_id, dados) for pncp_id in faltantes[chave][1])
+                    continue
+                falhas[chave] = falhas_anteriores.get(chave, 0) + (resultado == FALHOU)
+                if resultado == SEM_CHAVE or falhas[chave] >= FALHAS_MAXIMAS:
+                    descartados += 1
+                else:
+                    sobras[chave] = faltantes[chave]
+            self._registrar_pendentes(sobras, falhas)
+            if sobras or descartados:
+                logger.info(f"Enriquecimento IA: {len(faltantes) - len(sobras) - descartados} avisos enriquecidos, "
+                            f"{len(sobras)} pendentes para a próxima passada, {descartados} descartados")
+        return resultados
+
+    def drenar_pendentes(self, orcamento: Optional[OrcamentoIA] = None) -> Dict[str, int]:
+        """
+        Enriquece os avisos que sobraram de execuções anteriores e atualiza as
+        licitações já gravadas (objeto resumido e itens, se ainda não têm).
+
+        Returns:
+            {"enriquecidos", "atualizadas", "restantes"}
+        """
+        with self._lock:
+            todos = self._carregar_pendentes()
+            limite = (datetime.now() - timedelta(days=RETENCAO_DIAS)).isoformat()
+            pendentes = {c: p for c, p in todos.items() if p.get('em', '') >= limite}
+            if len(pendentes) != len(todos):
+                self._salvar_pendentes(pendentes)
+        if not pendentes:
+            return {"enriquecidos": 0, "atualizadas": 0, "restantes": 0}
+
+        orcamento = orcamento or OrcamentoIA()
+        avisos = [(pncp_id, p['texto']) for p in pendentes.values() for pncp_id in p['pncp_ids']]
+        # Sai da fila antes: o que não couber no orçamento é registrado de novo
+        with self._lock:
+            atuais = self._carregar_pendentes()
+            for chave in pendentes:
+                atuais.pop(chave, None)
+            self._salvar_pendentes(atuais)
+        resultados = self.enriquecer_lote(avisos, orcamento,
+                                          falhas_anteriores={c: p.get('falhas', 0) for c, p in pendentes.items()})
+
+        atualizadas = _aplicar_nas_licitacoes(resultados) if resultados else 0
+        restantes = self.pendentes()
+        logger.info(f"Pendências de IA drenadas: {len(resultados)} avisos enriquecidos, "
+                    f"{atualizadas} licitações atualizadas, {restantes} restantes")
+        return {"enriquecidos": len(resultados), "atualizadas": atualizadas, "restantes": restantes}
+
+
+def itens_da_ia(dados: Dict) -> List[Dict]:
+    """Itens no formato dos resultados de scraper"""
+    return [{
+        "numero": 0,
+        "descricao": it.get('descricao', 'Item sem nome'),
+        "quantidade": it.get('quantidade', 1.0),
+        "unidade": it.get('unidade', 'UN'),
+        "valor_estimado": it.get('valor_estimado', 0.0),
+        "valor_unitario": it.get('valor_unitario', 0.0)
+    } for it in (dados.get('itens') or []) if isinstance(it, dict)]
+
+
+def objeto_da_ia(dados: Dict) -> Optional[str]:
+    if dados.get('objeto_resumido'):
+        return dados['objeto_resumido'] + "\n\n[IA] Texto Original Resumido."
+    return None
+
+
+def _aplicar_nas_licitacoes(resultados: Dict[str, Dict]) -> int:
+    """Grava objeto resumido/itens da IA em licitações que ainda não os têm"""
+    from modules.core.search_engine import SearchEngine
+    from modules.database.database import ItemLicitacao, Licitacao, get_session
+
+    session = get_session()
+    atualizadas = 0
+    engine = None
+    try:
+        for lic in session.query(Licitacao).filter(Licitacao.pncp_id.in_(list(resultados))).all():
+            dados = resultados[lic.pncp_id]
+            alterada = False
+            objeto = objeto_da_ia(dados)
+            if objeto and "[IA]" not in (lic.objeto or ""):
+                lic.objeto = objeto
+                alterada = True
+            itens = itens_da_ia(dados)
+            if itens and not lic.itens:
+                for i in itens:
+                    session.add(ItemLicitacao(
+                        licitacao_id=lic.id,
+                        numero_item=i['numero'],
+                        descricao=i['descricao'],
+                        quantidade=i['quantidade'] or 0,
+                        unidade=i['unidade'],
+                        valor_estimado=i['valor_estimado'] or 0,
+                        valor_unitario=i['valor_unitario'] or 0
+                    ))
+                session.flush()
+                engine = engine or SearchEngine()
+                engine.match_itens(session, lic.id)
+                alterada = True
+            atualizadas += alterada
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    return atualizadas
+
+
+# Instância global
+diario_enriquecedor = EnriquecedorDiarios()
@@ -0,0 +1,344 @@
+"""
+Regras de filtro dos diários oficiais, compiladas uma vez por execução
+Os avisos de uma edição passam por milhares de termos (TERMOS_NEGATIVOS_PADRAO
+tem mais de mil). Em vez de renormalizar as listas e testar termo a termo em
+cada aviso, cada lista vira um único regex em forma de trie (prefixos comuns
+fatorados: "PAPEL|PAPELARIA" -> "PAPEL(?:ARIA)?"), que percorre o texto uma
+vez, como um autômato de múltiplos padrões. Os demais padrões são compilados
+junto.
+
+As regras dependem só dos termos recebidos: regras_diario() devolve o mesmo
+objeto para todos os diários de uma coleta (FEMURN, FAMUP, AMUPE...).
+
+Uso:
+    from modules.scrapers.diario_rules import regras_diario
+    regras = regras_diario(termos_busca, termos_negativos)
+    if regras.eh_licitacao_aberta(aviso_norm) and regras.tem_termo_positivo(aviso_norm):
+        ...
+"""
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from .pncp_client import PNCPClient
+
+
+def normalizar(txt: str) -> str:
+    """Maiúsculas sem acentos (texto ASCII, o caso comum após a 1ª normalização, só faz upper)"""
+    if not txt:
+        return ""
+    if txt.isascii():
+        return txt.upper()
+    return unicodedata.normalize('NFKD', txt).encode('ASCII', 'ignore').decode('ASCII').upper()
+
+
+def _regex_trie(termos: Iterable[str]) -> str:
+    """Alternância de literais com prefixos comuns fatorados (casa os mesmos textos que a lista)"""
+    raiz: Dict[str, dict] = {}
+    for termo in termos:
+        no = raiz
+        for c in termo:
+            no = no.setdefault(c, {})
+        no[''] = {}
+
+    def padrao(no: Dict[str, dict]) -> str:
+        ramos = [re.escape(c) + padrao(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ''
+        corpo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+        if '' in no:
+            # Termo que termina aqui: o restante é opcional
+            corpo = '(?:' + corpo + ')?'
+        return corpo
+
+    return padrao(raiz)
+
+
+class ConjuntoTermos:
+    """Busca de vários termos (substring, sem acento/caixa) em uma única passada"""
+
+    def __init__(self, termos: Iterable[str], normalizar_termos: bool = True):
+        """
+        Args:
+            termos: Termos a procurar (vazios são ignorados)
+            normalizar_termos: False para listas já escritas na forma do texto normalizado
+        """
+        termos = [t for t in termos if t and t.strip()]
+        if normalizar_termos:
+            termos = [normalizar(t) for t in termos]
+        self.termos: Tuple[str, ...] = tuple(dict.fromkeys(termos))
+        self._regex: Optional[Pattern] = re.compile(_regex_trie(self.termos)) if self.termos else None
+
+    def __len__(self) -> int:
+        return len(self.termos)
+
+    def encontrar(self, txt_norm: str) -> Optional[str]:
+        """Primeiro termo (mais à esquerda no texto) presente, ou None"""
+        if self._regex is None or not txt_norm:
+            return None
+        m = self._regex.search(txt_norm)
+        return m.group(0) if m else None
+
+    def contem(self, txt_norm: str) -> bool:
+        return self.encontrar(txt_norm) is not None
+
+
+def _alternancia(padroes: Sequence[str], flags: int = 0) -> Pattern:
+    return re.compile('|'.join(f'(?:{p})' for p in padroes), flags)
+
+
+TERMOS_LICITACAO_VALIDA = [
+    "AVISO DE LICITACAO",
+    "PREGAO ELETRONICO", "PREGAO PRESENCIAL",
+    "DISPENSA ELETRONICA",
+    "SETOR DE LICITAÇOES",
+]
+
+# "Aquisição de equipamentos... para Hospital Municipal"
+CONTEXTO_SAUDE = [
+    "HOSPITAL", "SAUDE", "UBS", "UNIDADE BASICA",
+    "SECRETARIA DE SAUDE", "FUNDO MUNICIPAL DE SAUDE",
+    "ATENCAO PRIMARIA", "AMBULATORIO", "PRONTO SOCORRO",
+]
+
+# Atos de resultado/homologação/adjudicação (o pipeline quer só ABERTURA)
+MARCADORES_RESULTADO = [
+    "AVISO DE RESULTADO", "AVISO DO RESULTADO",
+    "RESULTADO DO PREGAO", "RESULTADO DO PREGÃO", "RESULTADO DE JULGAMENTO",
+    "HOMOLOGACAO", "HOMOLOGAÇÃO", "ADJUDICACAO", "ADJUDICAÇÃO",
+    "TERMO DE HOMOLOGACAO", "TERMO DE HOMOLOGAÇÃO",
+    "TERMO DE ADJUDICACAO", "TERMO DE ADJUDICAÇÃO",
+    "EMPRESA VENCEDORA", "EMPRESAS VENCEDORAS", "EMPRESA(S) VENCEDORA(S)",
+    "VENCEDOR", "VENCEDORES",
+    "ATA DE REGISTRO DE PRECO",
+    "EXTRATO DE CONTRATO", "EXTRATO DO CONTRATO",
+]
+
+# Padrões comuns no corpo: "VENCEDOR: X", "EMPRESAS VENCEDORAS: X"
+PADROES_RESULTADO = [
+    r"\bVENCEDOR(?:A|ES)?\b\s*[:\-]",
+    r"\bEMPRESAS?\s+VENCEDORAS?\b\s*[:\-]",
+    r"\bVALOR\s+TOTAL\b",
+    r"\bCNPJ\b\s*[:\-]?\s*\d{2}\.?\d{3}\.?\d{3}/?\d{4}\-?\d{2}",
+]
+
+# Complementos específicos de Diários Oficiais (ruídos comuns que ainda passam pelo gate).
+# Importante: evitar "negativos administrativos" aqui (PORTARIA/DECRETO/LEI/ERRATA etc),
+# pois já são tratados pelos marcadores de resultado/TERMOS_DOCUMENTO_INVALIDO
+# e costumam derrubar avisos bons por falso positivo.
+NEGATIVOS_COMPLEMENTARES = [
+    # Serviços/contratações genéricas que costumam gerar falso positivo com "SAÚDE"
+    "CONSULTORIA", "ASSESSORIA",
+    # Viagens/eventos (ruído)
+    "VIAGEM", "HOSPEDAGEM", "PASSAGEM", "SHOW", "FESTA", "EVENTO", "PALCO", "SONORIZACAO",
+    # Papelaria/expediente (ruído)
+    "PAPELARIA", "RESMA DE PAPEL", "CANETA", "LAPIS", "BLOCO DE ANOTACOES", "CADERNO",
+    "GRAMPEADOR", "PERFURADOR", "CLIPE", "PASTA ARQUIVO",
+]
+
+TERMOS_DOCUMENTO_INVALIDO = [
+    "NOTIFICACAO",
+    "ATRASO NA ENTREGA", "ATRASO DE ENTREGA",
+    "PENALIDADE", "PENALIDADES", "MULTA", "ADVERTENCIA",
+    "RESCISAO", "RESCISAO DE CONTRATO",
+    "EXTRATO DE CONTRATO", "EXTRATO DO CONTRATO",
+    "EXTRATO DE TERMO ADITIVO", "TERMO ADITIVO",
+    "RATIFICACAO", "HOMOLOGACAO",
+    "ADJUDICACAO",
+    "RESULTADO DE JULGAMENTO",
+    "ATA DE REGISTRO DE PRECO",
+    "PUBLICACAO DE ATA",
+    "ERRATA", "RETIFICACAO",
+    "CONVOCACAO PARA ASSINATURA",
+    "ORDEM DE FORNECIMENTO", "ORDEM DE SERVICO",
+    "DESPACHO", "PARECER", "PORTARIA",
+]
+
+# Contratado/vencedor já definido
+SKIP_PATTERNS = [
+    r'CONTRATAD[OA]\s*:\s*[A-Z]',
+    r'CONTRATAD[OA]\s*\([Aa]\)\s*:\s*[A-Z]',
+    r'VENCEDOR\s*:\s*[A-Z]',
+    r'EMPRESA\s+VENCEDORA\s*:\s*[A-Z]',
+]
+
+# Separadores de avisos, em ordem de preferência
+SEPARADORES = [
+    r'(CODIGO IDENTIFICADOR:\s*[\w\d]+)',
+    r'(Código Identificador:\s*[\w\d]+)',
+    r'(PREFEITURA MUNICIPAL (?:DE|DA|DO)\s+[A-Z]+)',  # Cada prefeitura é um aviso
+]
+
+# Modalidade pelo primeiro termo presente, nesta ordem
+MODALIDADES = [
+    ("DISPENSA", "Dispensa"),
+    ("PREGAO", "Pregao"),
+    ("CONCORRENCIA", "Concorrencia"),
+    ("TOMADA DE PRECO", "Tomada de Preco"),
+    ("CHAMADA PUBLICA", "Chamada Publica"),
+    ("AVISO DE LICITACAO", "Aviso de Licitacao"),
+    ("EXTRATO", "Extrato/Contrato"),
+]
+
+_RE_SEPARADORES = [re.compile(p, re.IGNORECASE) for p in SEPARADORES]
+_RE_SEPARADOR_AVISO = re.compile(r'(AVISO DE LICITAC[AÃ]O)', re.IGNORECASE)
+_RE_AVISOS = re.compile(
+    r'((?:AVISO DE LICITAC[AÃ]O|PREGAO ELETRONICO|DISPENSA)[^\n]*(?:\n(?!AVISO DE LICITAC|PREGAO ELETRONICO|DISPENSA)[^\n]*){0,50})',
+    re.IGNORECASE,
+)
+_RE_QUEBRAS = re.compile(r'\n+')
+_RE_PADROES_RESULTADO = _alternancia(PADROES_RESULTADO, re.IGNORECASE)
+_RE_SKIP = _alternancia(SKIP_PATTERNS, re.IGNORECASE)
+_RE_CODIGO = re.compile(r'CODIGO IDENTIFICADOR:\s*([\w\d]+)')
+_RE_PREFEITURA = re.compile(r'PREFEITURA MUNICIPAL (?:DE|DA|DO)\s+([A-Z]+)')
+# Ordem importa: vale o primeiro padrão que casar
+_RE_ORGAOS = [re.compile(p, re.IGNORECASE) for p in [
+    r'(PREFEITURA MUNICIPAL (?:DE|DA|DO) [^\n]+)',
+    r'(CAMARA MUNICIPAL (?:DE|DA|DO) [^\n]+)',
+    r'(FUNDO MUNICIPAL (?:DE|DA|DO) [^\n]+)',
+    r'(CONSORCIO INTERMUNICIPAL [^\n]+)',
+    r'(SERVICO AUTONOMO [^\n]+)',
+]]
+_RE_ORGAOS_LOG = [re.compile(p) for p in [
+    r'PREFEITURA (?:MUNICIPAL )?(?:DE |DA |DO )?([A-Z\s]+)',
+    r'FUNDO MUNICIPAL DE ([A-Z\s]+)',
+]]
+
+
+class RegrasDiario:
+    """Conjunto de regras compilado para um par (termos positivos, termos negativos)"""
+
+    def __init__(self, termos_busca: Sequence[str], termos_negativos: Optional[Sequence[str]] = None):
+        self.positivos = ConjuntoTermos(termos_busca)
+        self.negativos = ConjuntoTermos(termos_negativos or [])
+        # Negativos por aviso: lista do chamador (ou fallback PNCP) + ruídos de diário
+        self.negativos_diario = ConjuntoTermos(
+            list(termos_negativos or PNCPClient.TERMOS_NEGATIVOS_PADRAO) + NEGATIVOS_COMPLEMENTARES
+        )
+        # Listas fixas: usadas literalmente, como sempre foram
+        self.licitacao_valida = ConjuntoTermos(TERMOS_LICITACAO_VALIDA, normalizar_termos=False)
+        self.contexto_saude = ConjuntoTermos(CONTEXTO_SAUDE, normalizar_termos=False)
+        self.marcadores_resultado = ConjuntoTermos(MARCADORES_RESULTADO, normalizar_termos=False)
+        self.documento_invalido = ConjuntoTermos(TERMOS_DOCUMENTO_INVALIDO, normalizar_termos=False)
+
+    # === GATES (texto já normalizado) ===
+
+    def eh_licitacao_aberta(self, txt_norm: str) -> bool:
+        return self.licitacao_valida.contem(txt_norm)
+
+    def tem_termo_positivo(self, txt_norm: str) -> bool:
+        """Termo positivo direto, ou EQUIPAMENTO + contexto de saúde"""
+        if self.positivos.contem(txt_norm):
+            return True
+        return "EQUIPAMENTO" in txt_norm and self.contexto_saude.contem(txt_norm)
+
+    def tem_termo_negativo(self, txt_norm: str) -> bool:
+        return self.negativos.contem(txt_norm)
+
+    def termo_negativo_diario(self, txt_norm: str) -> Optional[str]:
+        """Termo negativo (lista do aviso) que bloqueia o texto, ou None"""
+        return self.negativos_diario.encontrar(txt_norm)
+
+    def eh_publicacao_com_vencedor_ou_resultado(self, txt_norm: str) -> bool:
+        """
+        Diários municipais misturam editais de abertura com atos de resultado/homologação/adjudicação.
+        Para o pipeline de oportunidades, queremos apenas ABERTURA (prazo ainda faz sentido).
+        """
+        if not txt_norm:
+            return False
+        if self.marcadores_resultado.contem(txt_norm):
+            return True
+        return _RE_PADROES_RESULTADO.search(txt_norm) is not None
+
+    def eh_documento_invalido(self, txt_norm: str) -> bool:
+        return self.documento_invalido.contem(txt_norm)
+
+    @staticmethod
+    def tem_contratado_definido(texto: str) -> bool:
+        return _RE_SKIP.search(texto) is not None
+
+    # === SEGMENTAÇÃO E EXTRAÇÃO ===
+
+    @staticmethod
+    def dividir_avisos(text_normalized: str) -> Tuple[List[str], Optional[str]]:
+        """
+        Divide a edição em [corpo, separador, corpo, separador, ...] (re.split com grupo).
+
+        Returns:
+            (chunks, padrão usado); ([texto], None) se nenhum separador dividiu
+        """
+        for regex in _RE_SEPARADORES:
+            chunks = regex.split(text_normalized)
+            if len(chunks) > 2:
+                return chunks, regex.pattern
+        chunks = _RE_SEPARADOR_AVISO.split(text_normalized)
+        if len(chunks) > 2:
+            return chunks, _RE_SEPARADOR_AVISO.pattern
+        return [text_normalized], None
+
+    @staticmethod
+    def avisos_no_texto(text_normalized: str) -> List[str]:
+        return _RE_AVISOS.findall(text_normalized)
+
+    @staticmethod
+    def limpar_aviso(texto: str) -> str:
+        return _RE_QUEBRAS.sub('\n', texto).strip()
+
+    @staticmethod
+    def codigo_identificador(txt_norm: str) -> Optional[str]:
+        m = _RE_CODIGO.search(txt_norm)
+        return m.group(1) if m else None
+
+    @staticmethod
+    def prefeitura(txt_norm: str) -> Optional[str]:
+        m = _RE_PREFEITURA.search(txt_norm)
+        return m.group(1) if m else None
+
+    @staticmethod
+    def orgao(texto: str) -> Optional[str]:
+        for regex in _RE_ORGAOS:
+            m = regex.search(texto)
+            if m:
+                return m.group(1).strip()
+        return None
+
+    @staticmethod
+    def orgao_log(txt_norm: str) -> str:
+        for regex in _RE_ORGAOS_LOG:
+            m = regex.search(txt_norm)
+            if m:
+                return m.group(1).strip()[:20]
+        return "?"
+
+    @staticmethod
+    def modalidade(txt_norm: str) -> str:
+        for termo, modalidade in MODALIDADES:
+            if termo in txt_norm:
+                return modalidade
+        return "Diario Oficial"
+
+
+_cache: Dict[Tuple[Tuple[str, ...], Optional[Tuple[str, ...]]], RegrasDiario] = {}
+_cache_lock = threading.Lock()
+
+
+def regras_diario(termos_busca: Optional[Sequence[str]] = None,
+                  termos_negativos: Optional[Sequence[str]] = None) -> RegrasDiario:
+    """
+    Regras compiladas para os termos (compartilhadas entre diários e execuções).
+
+    Args:
+        termos_busca: Termos positivos (padrão: PNCPClient.TERMOS_PRIORITARIOS)
+        termos_negativos: Termos negativos do chamador (None: fallback PNCP nos avisos)
+    """
+    if termos_busca is None:
+        termos_busca = PNCPClient.TERMOS_PRIORITARIOS  # foco estrito
+    chave = (tuple(termos_busca), tuple(termos_negativos) if termos_negativos else None)
+    with _cache_lock:
+        regras = _cache.get(chave)
+        if regras is None:
+            if len(_cache) >= 8:
+                _cache.clear()
+            regras = _cache[chave] = RegrasDiario(termos_busca, termos_negativos)
+        return regras
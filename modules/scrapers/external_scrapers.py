@@ -1,26 +1,54 @@
-import requests
-from bs4 import BeautifulSoup
+import concurrent.futures
+import os
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
 from datetime import datetime, date
-import io
-from pypdf import PdfReader
-import re
-import unicodedata
-import json
 import urllib3
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from modules.utils.logging_config import get_logger
-from modules.ai.ai_config import get_model
+
+# lxml (C) quando disponível; html.parser (Python puro) como fallback
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Consultas simultâneas ao BNC (atividade x UF)
+BNC_WORKERS = int(os.getenv("BNC_WORKERS", "8"))
+
+# Página de uma edição passada (backfill), ex.: "{base}?data={data:%d/%m/%Y}".
+# Sem padrão conferido no portal não há default: DIARIO_EDICAO_URL_<FONTE> vale
+# para uma fonte, DIARIO_EDICAO_URL para todas; sem nenhum, o backfill recusa a fonte
+DIARIO_EDICAO_URL = os.getenv("DIARIO_EDICAO_URL", "")
 
 # Suprime avisos de SSL inseguro (comuns em sites de diários municipais)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 from modules.database.database import get_session, Configuracao
-from .pncp_client import PNCPClient
+from .diario_cache import diario_pdf_cache
+from .diario_enrichment import diario_enriquecedor, itens_da_ia, objeto_da_ia
+from .diario_rules import normalizar, regras_diario
+from .runtime import ColetaInterrompida, ExecucaoFonte, sufixo_env
 
 class ExternalScraper:
-    """Classe base para scrapers de portais externos"""
+    """
+    Classe base para scrapers de portais externos.
+    Transporte HTTP (self.session), orçamentos, cancelamento e métricas vêm do
+    runtime comum (modules/scrapers/runtime.py): a coleta vincula a execução da
+    fonte com vincular(); fora dela o scraper roda sem limites.
+    """
+    FONTE = None
+
+    def __init__(self, fonte=None):
+        self._logger = get_logger(self.__class__.__name__)
+        self.vincular(ExecucaoFonte(fonte or self.FONTE or self.__class__.__name__))
+
+    def vincular(self, execucao):
+        """Usa a sessão/orçamentos/métricas de `execucao` (devolve o próprio scraper)"""
+        self.execucao = execucao
+        self.session = execucao.session
+        return self
+
     def buscar_oportunidades(self):
         raise NotImplementedError("Método buscar_oportunidades deve ser implementado")
 
@@ -29,19 +57,16 @@ class DiarioMunicipalScraper(ExternalScraper):
     """
     Classe base para scrapers do sistema diariomunicipal.com.br (FEMURN, FAMUP, AMUPE, etc).
     """
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    }
+
     def __init__(self, base_url, uf, origem_nome):
+        super().__init__(origem_nome)
         self.BASE_URL = base_url
         self.UF = uf
         self.ORIGEM = origem_nome
-        self._logger = get_logger(self.__class__.__name__)
         self.enrich_enabled = True
-        
-        # Configura sessão com retries para maior robustez
-        self.session = requests.Session()
-        retries = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retries)
-        self.session.mount('https://', adapter)
-        self.session.mount('http://', adapter)
 
     def _get_pdf_url(self, soup):
         # 1. Tenta link direto
@@ -64,48 +89,28 @@ class DiarioMunicipalScraper(ExternalScraper):
         
         return None
 
-    def _enrich_with_ai(self, texto_aviso):
-        """Enriquece aviso com IA via OpenRouter (get_model)."""
-        if not self.enrich_enabled:
-            return None
-        try:
-            model = get_model(temperature=0.1)
-            
-            prompt = f"""
-            Analise o seguinte aviso de licitação extraído de um Diário Oficial.
-            
-            Tarefa:
-            1. Identifique o Objeto principal de forma resumida.
-            2. Extraia a lista de itens/produtos (se houver) com quantidade estimada.
-            3. Se não houver itens explícitos, retorne lista vazia.
-            
-            Texto:
-            {texto_aviso[:8000]}            
-            Retorne APENAS um JSON válido no formato:
-            {{
-                "objeto_resumido": "...",
-                "itens": [
-                    {{"descricao": "Nome do Item", "quantidade": 100, "unidade": "UN", "valor_estimado": 0.0, "valor_unitario": 0.0}}
-                ]
-            }}
-            """
-            
-            response = model.generate_content(prompt)
-            raw_json = response.text.replace('```json', '').replace('```', '').strip()
-            
-            # Tenta limpar o JSON se vier sujo
-            if '{' in raw_json:
-                raw_json = raw_json[raw_json.find('{'):raw_json.rfind('}')+1]
-                
-            data = json.loads(raw_json)
-            return data
-            
-        except Exception as e:
-            self._logger.warning("Erro na IA (Enrich): %s", e, exc_info=True)
-            if "quota" in str(e).lower() or "429" in str(e):
-                self.enrich_enabled = False
-                self._logger.info("Enrich desativado apos quota/rate limit.")
+    def pdf_da_pagina(self, url):
+        """URL do PDF publicado na página `url` (None se a página não tiver edição)"""
+        # Timeout de 30s; retries no transporte compartilhado
+        response = self.session.get(url, headers=self.HEADERS, timeout=30, verify=False)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+        return self._get_pdf_url(soup)
+
+    def padrao_edicao(self):
+        """Padrão configurado da página de edição (DIARIO_EDICAO_URL_<FONTE> ou DIARIO_EDICAO_URL); "" se nenhum"""
+        return os.getenv(f"DIARIO_EDICAO_URL_{sufixo_env(self.ORIGEM)}", "") or DIARIO_EDICAO_URL
+
+    def url_edicao(self, data):
+        """
+        Página da edição publicada em `data` (backfill), ou None sem padrão configurado.
+        O padrão ({base} = BASE_URL, {data} = date) vem de padrao_edicao();
+        subclasses de portais com arquivo de edições conhecido sobrescrevem aqui.
+        """
+        padrao = self.padrao_edicao()
+        if not padrao:
             return None
+        return padrao.format(base=self.BASE_URL, data=data)
 
     def buscar_oportunidades(self, termos_busca=None, termos_negativos=None):
         """
@@ -114,15 +119,7 @@ class DiarioMunicipalScraper(ExternalScraper):
         """
         resultados = []
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            # Aumentado timeout para 30s e usando session com retry
-            response = self.session.get(self.BASE_URL, headers=headers, timeout=30, verify=False)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            pdf_url = self._get_pdf_url(soup)
+            pdf_url = self.pdf_da_pagina(self.BASE_URL)
             if not pdf_url:
                 return [{
                     "pncp_id": f"{self.ORIGEM}-ERROR",
@@ -136,385 +133,196 @@ class DiarioMunicipalScraper(ExternalScraper):
                     "itens": [],
                     "origem": self.ORIGEM
                 }]
+            resultados, _ = self.processar_edicao(pdf_url, termos_busca, termos_negativos)
+        except ColetaInterrompida:
+            pass
+        except Exception as e:
+            self.execucao.registrar_erro(f"Erro ao processar PDF: {e}")
+        return resultados
 
-            # Aumentado timeout para 90s para download de PDF
-            pdf_response = self.session.get(pdf_url, headers=headers, timeout=90, verify=False)
-            pdf_response.raise_for_status()
+    def processar_edicao(self, pdf_url, termos_busca=None, termos_negativos=None, publicado_em=None):
+        """
+        Filtra os avisos de uma edição do diário.
 
-            f = io.BytesIO(pdf_response.content)
-            reader = PdfReader(f)
-            text = "".join(((page.extract_text() or "") + "\n") for page in reader.pages)
+        Args:
+            pdf_url: URL do PDF da edição
+            termos_busca / termos_negativos: Ver regras_diario
+            publicado_em: Data da edição (padrão: agora); compõe pncp_id e data_publicacao
 
-            def normalize_text(txt: str) -> str:
-                if not txt:
-                    return ""
-                return unicodedata.normalize('NFKD', txt).encode('ASCII', 'ignore').decode('ASCII').upper()
+        Returns:
+            (resultados, cache_info) com cache_info de DiarioPDFCache.obter_paginas
 
-            text_normalized = normalize_text(text)
-            
-            # DIAGNOSTICO: Logs para debug
-            print(f"[{self.ORIGEM}] PDF baixado: {len(text)} caracteres, {len(reader.pages)} páginas")
-            
-            # Verifica termos importantes
-            count_hospitalar = text_normalized.count("MATERIAL HOSPITALAR") + text_normalized.count("MATERIAL MEDICO HOSPITALAR")
-            count_pregao = text_normalized.count("PREGAO ELETRONICO")
-            count_aviso = text_normalized.count("AVISO DE LICITACAO")
-            print(f"[{self.ORIGEM}] Termos encontrados: MATERIAL HOSPITALAR={count_hospitalar}, PREGAO={count_pregao}, AVISO={count_aviso}")
+        Raises:
+            Erros de rede/PDF (o chamador decide se registra ou repete)
+        """
+        if publicado_em is None:
+            publicado_em = datetime.now()
+        resultados = []
+        # Download condicional (ETag/Last-Modified) + texto por página em cache:
+        # a mesma edição não é baixada nem extraída de novo (timeout de 90s mantido)
+        paginas, cache_info = diario_pdf_cache.obter_paginas(
+            self.session, pdf_url, headers=self.HEADERS, timeout=90, verify=False
+        )
+        text = "".join((pagina + "\n") for pagina in paginas)
+
+        text_normalized = normalizar(text)
+        
+        # DIAGNOSTICO: Logs para debug
+        self._logger.info(f"PDF {cache_info['download']} (texto: {cache_info['extracao']}): "
+                          f"{len(text)} caracteres, {len(paginas)} páginas")
+        
+        # Verifica termos importantes
+        count_hospitalar = text_normalized.count("MATERIAL HOSPITALAR") + text_normalized.count("MATERIAL MEDICO HOSPITALAR")
+        count_pregao = text_normalized.count("PREGAO ELETRONICO")
+        count_aviso = text_normalized.count("AVISO DE LICITACAO")
+        self._logger.debug(f"Termos encontrados: MATERIAL HOSPITALAR={count_hospitalar}, PREGAO={count_pregao}, AVISO={count_aviso}")
+
+        # Regras compiladas uma vez por conjunto de termos (compartilhadas entre os diários)
+        regras = regras_diario(termos_busca, termos_negativos)
+        
+        self._logger.debug(f"Buscando {len(regras.positivos)} termos positivos, {len(regras.negativos)} negativos")
 
-            if termos_busca is None:
-                termos_busca = PNCPClient.TERMOS_PRIORITARIOS  # foco estrito
+        chunks, separador = regras.dividir_avisos(text_normalized)
+        if separador:
+            self._logger.debug(f"PDF dividido em {len(chunks)//2} avisos usando: {separador[:30]}...")
 
-            terms_to_search_norm = [normalize_text(t) for t in termos_busca if t and t.strip()]
-            terms_negativos_norm = [normalize_text(t) for t in termos_negativos] if termos_negativos else []
+        if len(chunks) <= 2:
+            # PDF não foi dividido - processa inteiro buscando licitações
+            self._logger.info("PDF não dividido - buscando no texto completo...")
             
-            print(f"[{self.ORIGEM}] Buscando {len(terms_to_search_norm)} termos positivos, {len(terms_negativos_norm)} negativos")
-
-            termos_licitacao_valida = [
-                "AVISO DE LICITACAO",
-                "PREGAO ELETRONICO", "PREGAO PRESENCIAL",
-                "DISPENSA ELETRONICA", 
-                "SETOR DE LICITAÇOES",
-            ]
-
-            def eh_licitacao_aberta(txt_norm: str) -> bool:
-                return any(t in txt_norm for t in termos_licitacao_valida)
+            if (
+                regras.eh_licitacao_aberta(text_normalized)
+                and regras.tem_termo_positivo(text_normalized)
+                and not regras.eh_publicacao_com_vencedor_ou_resultado(text_normalized)
+            ):
+                if not regras.tem_termo_negativo(text_normalized):
+                    # Encontra todos os avisos de licitação no texto
+                    avisos = regras.avisos_no_texto(text_normalized)
+                    
+                    if avisos:
+                        for idx, aviso in enumerate(avisos):
+                            if (
+                                regras.tem_termo_positivo(aviso)
+                                and not regras.tem_termo_negativo(aviso)
+                                and not regras.eh_publicacao_com_vencedor_ou_resultado(aviso)
+                            ):
+                                # Extrai nome do órgão
+                                prefeitura = regras.prefeitura(aviso)
+                                orgao_name = f"Prefeitura de {prefeitura}" if prefeitura else f"Municipio {self.UF}"
+                                
+                                resultados.append({
+                                    "pncp_id": f"{self.ORIGEM}-{publicado_em.strftime('%Y%m%d')}-{idx+1}",
+                                    "orgao": orgao_name,
+                                    "uf": self.UF,
+                                    "modalidade": "Pregao" if "PREGAO" in aviso else "Diario Oficial",
+                                    "data_sessao": publicado_em.isoformat(),
+                                    "data_publicacao": publicado_em.isoformat(),
+                                    "objeto": aviso[:8000],
+                                    "link": pdf_url,
+                                    "itens": [],
+                                    "origem": self.ORIGEM
+                                })
+                                self._logger.debug(f"Encontrado: {orgao_name}")
+                    else:
+                        # Fallback: retorna o PDF inteiro como um resultado
+                        resultados.append({
+                            "pncp_id": f"{self.ORIGEM}-{publicado_em.strftime('%Y%m%d')}-FULL",
+                            "orgao": f"Municipios {self.UF} ({self.ORIGEM})",
+                            "uf": self.UF,
+                            "modalidade": "Diario Oficial",
+                            "data_sessao": publicado_em.isoformat(),
+                            "data_publicacao": publicado_em.isoformat(),
+                            "objeto": text[:5000] + "... (Texto muito longo, verifique o PDF)",
+                            "link": pdf_url,
+                            "itens": [],
+                            "origem": self.ORIGEM
+                        })
+        else:
+            # PDF foi dividido - processa cada chunk
+            avisos_licitacao = 0
+            avisos_positivos = 0
+            avisos_bloqueados_negativo = 0
+            aprovados_ia = []
             
-            def tem_termo_positivo(txt_norm: str) -> bool:
-                """Verifica se tem algum termo positivo (busca simples por substring)"""
-                # Primeiro: busca direta por termos específicos
-                for termo in terms_to_search_norm:
-                    if termo in txt_norm:
-                        return True
+            for i in range(0, len(chunks)-1, 2):
+                body = chunks[i]
+                code = chunks[i+1] if i+1 < len(chunks) else ""
+                full_notice_clean = regras.limpar_aviso(body + "\n" + code)
+                full_notice_norm = normalizar(full_notice_clean)
+
+                if not regras.eh_licitacao_aberta(full_notice_norm):
+                    continue
+
+                # Ignora atos que já indicam resultado/vencedor/homologação/adjudicação
+                if regras.eh_publicacao_com_vencedor_ou_resultado(full_notice_norm):
+                    continue
                 
-                # Segundo: busca por combinação EQUIPAMENTOS + CONTEXTO SAÚDE
-                # (para pegar "Aquisição de equipamentos... para Hospital Municipal")
-                contexto_saude = [
-                    "HOSPITAL", "SAUDE", "UBS", "UNIDADE BASICA",
-                    "SECRETARIA DE SAUDE", "FUNDO MUNICIPAL DE SAUDE",
-                    "ATENCAO PRIMARIA", "AMBULATORIO", "PRONTO SOCORRO"
-                ]
+                avisos_licitacao += 1
                 
-                if "EQUIPAMENTO" in txt_norm:
-                    for ctx in contexto_saude:
-                        if ctx in txt_norm:
-                            return True
+                if not regras.tem_termo_positivo(full_notice_norm):
+                    continue
                 
-                return False
-            
-            def tem_termo_negativo(txt_norm: str) -> bool:
-                """Verifica se tem algum termo negativo"""
-                for termo in terms_negativos_norm:
-                    if termo in txt_norm:
-                        return True
-                return False
-
-            def eh_publicacao_com_vencedor_ou_resultado(txt_norm: str) -> bool:
-                """
-                Diários municipais misturam editais de abertura com atos de resultado/homologação/adjudicação.
-                Para o pipeline de oportunidades, queremos apenas ABERTURA (prazo ainda faz sentido).
-                """
-                if not txt_norm:
-                    return False
-
-                marcadores_fortes = [
-                    "AVISO DE RESULTADO",
-                    "AVISO DO RESULTADO",
-                    "RESULTADO DO PREGAO",
-                    "RESULTADO DO PREGÃO",
-                    "RESULTADO DE JULGAMENTO",
-                    "HOMOLOGACAO",
-                    "HOMOLOGAÇÃO",
-                    "ADJUDICACAO",
-                    "ADJUDICAÇÃO",
-                    "TERMO DE HOMOLOGACAO",
-                    "TERMO DE HOMOLOGAÇÃO",
-                    "TERMO DE ADJUDICACAO",
-                    "TERMO DE ADJUDICAÇÃO",
-                    "EMPRESA VENCEDORA",
-                    "EMPRESAS VENCEDORAS",
-                    "EMPRESA(S) VENCEDORA(S)",
-                    "VENCEDOR",
-                    "VENCEDORES",
-                    "ATA DE REGISTRO DE PRECO",
-                    "ATA DE REGISTRO DE PREÇO",
-                    "EXTRATO DE CONTRATO",
-                    "EXTRATO DO CONTRATO",
-                ]
-                if any(m in txt_norm for m in marcadores_fortes):
-                    return True
-
-                # Padrões comuns no corpo: "VENCEDOR: X", "EMPRESAS VENCEDORAS: X"
-                padroes = [
-                    r"\bVENCEDOR(?:A|ES)?\b\s*[:\-]",
-                    r"\bEMPRESAS?\s+VENCEDORAS?\b\s*[:\-]",
-                    r"\bVALOR\s+TOTAL\b",
-                    r"\bCNPJ\b\s*[:\-]?\s*\d{2}\.?\d{3}\.?\d{3}/?\d{4}\-?\d{2}",
-                ]
-                return any(re.search(p, txt_norm, re.IGNORECASE) for p in padroes)
-
-            # Tenta dividir por diferentes padrões de separador
-            separadores = [
-                r'(CODIGO IDENTIFICADOR:\s*[\w\d]+)',
-                r'(Código Identificador:\s*[\w\d]+)',
-                r'(PREFEITURA MUNICIPAL (?:DE|DA|DO)\s+[A-Z]+)',  # Cada prefeitura é um aviso
-            ]
-            
-            chunks = [text_normalized]  # Default: PDF inteiro
-            for sep in separadores:
-                test_chunks = re.split(sep, text_normalized, flags=re.IGNORECASE)
-                if len(test_chunks) > 2:
-                    chunks = test_chunks
-                    print(f"[{self.ORIGEM}] PDF dividido em {len(chunks)//2} avisos usando: {sep[:30]}...")
-                    break
-            
-            # Se não conseguiu dividir, tenta por "AVISO DE LICITACAO"
-            if len(chunks) <= 2:
-                aviso_chunks = re.split(r'(AVISO DE LICITAC[AÃ]O)', text_normalized, flags=re.IGNORECASE)
-                if len(aviso_chunks) > 2:
-                    chunks = aviso_chunks
-                    print(f"[{self.ORIGEM}] PDF dividido em {len(chunks)//2} avisos por 'AVISO DE LICITACAO'")
-
-            if len(chunks) <= 2:
-                # PDF não foi dividido - processa inteiro buscando licitações
-                print(f"[{self.ORIGEM}] PDF não dividido - buscando no texto completo...")
+                avisos_positivos += 1
                 
-                if (
-                    eh_licitacao_aberta(text_normalized)
-                    and tem_termo_positivo(text_normalized)
-                    and not eh_publicacao_com_vencedor_ou_resultado(text_normalized)
-                ):
-                    if not tem_termo_negativo(text_normalized):
-                        # Encontra todos os avisos de licitação no texto
-                        avisos = re.findall(
-                            r'((?:AVISO DE LICITAC[AÃ]O|PREGAO ELETRONICO|DISPENSA)[^\n]*(?:\n(?!AVISO DE LICITAC|PREGAO ELETRONICO|DISPENSA)[^\n]*){0,50})',
-                            text_normalized,
-                            flags=re.IGNORECASE
-                        )
-                        
-                        if avisos:
-                            for idx, aviso in enumerate(avisos):
-                                if (
-                                    tem_termo_positivo(aviso)
-                                    and not tem_termo_negativo(aviso)
-                                    and not eh_publicacao_com_vencedor_ou_resultado(aviso)
-                                ):
-                                    # Extrai nome do órgão
-                                    orgao_match = re.search(r'PREFEITURA MUNICIPAL (?:DE|DA|DO)\s+([A-Z]+)', aviso)
-                                    orgao_name = f"Prefeitura de {orgao_match.group(1)}" if orgao_match else f"Municipio {self.UF}"
-                                    
-                                    resultados.append({
-                                        "pncp_id": f"{self.ORIGEM}-{datetime.now().strftime('%Y%m%d')}-{idx+1}",
-                                        "orgao": orgao_name,
-                                        "uf": self.UF,
-                                        "modalidade": "Pregao" if "PREGAO" in aviso else "Diario Oficial",
-                                        "data_sessao": datetime.now().isoformat(),
-                                        "data_publicacao": datetime.now().isoformat(),
-                                        "objeto": aviso[:8000],
-                                        "link": pdf_url,
-                                        "itens": [],
-                                        "origem": self.ORIGEM
-                                    })
-                                    print(f"[{self.ORIGEM}] ✅ Encontrado: {orgao_name}")
-                        else:
-                            # Fallback: retorna o PDF inteiro como um resultado
-                            resultados.append({
-                                "pncp_id": f"{self.ORIGEM}-{datetime.now().strftime('%Y%m%d')}-FULL",
-                                "orgao": f"Municipios {self.UF} ({self.ORIGEM})",
-                                "uf": self.UF,
-                                "modalidade": "Diario Oficial",
-                                "data_sessao": datetime.now().isoformat(),
-                                "data_publicacao": datetime.now().isoformat(),
-                                "objeto": text[:5000] + "... (Texto muito longo, verifique o PDF)",
-                                "link": pdf_url,
-                                "itens": [],
-                                "origem": self.ORIGEM
-                            })
-            else:
-                # PDF foi dividido - processa cada chunk
-                avisos_licitacao = 0
-                avisos_positivos = 0
-                avisos_bloqueados_negativo = 0
+                # Negativos em diários: lista do chamador (ou fallback PNCP) + ruídos de diário
+                termo_neg_encontrado = regras.termo_negativo_diario(full_notice_norm)
                 
-                for i in range(0, len(chunks)-1, 2):
-                    body = chunks[i]
-                    code = chunks[i+1] if i+1 < len(chunks) else ""
-                    full_notice_clean = re.sub(r'\n+', '\n', body + "\n" + code).strip()
-                    full_notice_norm = normalize_text(full_notice_clean)
-
-                    if not eh_licitacao_aberta(full_notice_norm):
-                        continue
-
-                    # Ignora atos que já indicam resultado/vencedor/homologação/adjudicação
-                    if eh_publicacao_com_vencedor_ou_resultado(full_notice_norm):
-                        continue
-                    
-                    avisos_licitacao += 1
-                    
-                    if not tem_termo_positivo(full_notice_norm):
-                        continue
-                    
-                    avisos_positivos += 1
-                    
-                    # Negativos em diários: use a lista recebida do chamador (ou fallback PNCP).
-                    # Importante: evitar "negativos administrativos" aqui (PORTARIA/DECRETO/LEI/ERRATA etc),
-                    # pois já são tratados por `eh_publicacao_com_vencedor_ou_resultado`/`termos_documento_invalido`
-                    # e costumam derrubar avisos bons por falso positivo.
-                    termos_negativos_diario = list(termos_negativos or PNCPClient.TERMOS_NEGATIVOS_PADRAO)
-                    
-                    # Complementos específicos de Diários Oficiais (ruídos comuns que ainda passam pelo gate).
-                    termos_negativos_diario.extend(
-                        [
-                            # Serviços/contratações genéricas que costumam gerar falso positivo com "SAÚDE"
-                            "CONSULTORIA",
-                            "ASSESSORIA",
-                            # Viagens/eventos (ruído)
-                            "VIAGEM",
-                            "HOSPEDAGEM",
-                            "PASSAGEM",
-                            "SHOW",
-                            "FESTA",
-                            "EVENTO",
-                            "PALCO",
-                            "SONORIZACAO",
-                            # Papelaria/expediente (ruído)
-                            "PAPELARIA",
-                            "RESMA DE PAPEL",
-                            "CANETA",
-                            "LAPIS",
-                            "BLOCO DE ANOTACOES",
-                            "CADERNO",
-                            "GRAMPEADOR",
-                            "PERFURADOR",
-                            "CLIPE",
-                            "PASTA ARQUIVO",
-                        ]
-                    )
-                    
-                    # Normaliza para comparação
-                    termos_negativos_diario_norm = [normalize_text(t) for t in termos_negativos_diario]
-                    
-                    termo_neg_encontrado = None
-                    for termo in termos_negativos_diario_norm:
-                        if termo in full_notice_norm:
-                            termo_neg_encontrado = termo
-                            break
-                    
-                    if termo_neg_encontrado:
-                        avisos_bloqueados_negativo += 1
-                        if avisos_bloqueados_negativo <= 5:
-                            # Extrai nome do órgão para o log
-                            orgao_log = "?"
-                            for pat in [r'PREFEITURA (?:MUNICIPAL )?(?:DE |DA |DO )?([A-Z\s]+)', r'FUNDO MUNICIPAL DE ([A-Z\s]+)']:
-                                m = re.search(pat, full_notice_norm)
-                                if m:
-                                    orgao_log = m.group(1).strip()[:20]
-                                    break
-                            print(f"[{self.ORIGEM}] Bloqueado: '{termo_neg_encontrado}' em {orgao_log}")
-                        continue
-
-                    code_match = re.search(r'CODIGO IDENTIFICADOR:\s*([\w\d]+)', full_notice_norm)
-                    code_id = code_match.group(1) if code_match else f"UNK-{i}"
-
-                    orgao_name = f"Municipio {self.UF} ({self.ORIGEM})"
-                    patterns_orgao = [
-                        r'(PREFEITURA MUNICIPAL (?:DE|DA|DO) [^\n]+)',
-                        r'(CAMARA MUNICIPAL (?:DE|DA|DO) [^\n]+)',
-                        r'(FUNDO MUNICIPAL (?:DE|DA|DO) [^\n]+)',
-                        r'(CONSORCIO INTERMUNICIPAL [^\n]+)',
-                        r'(SERVICO AUTONOMO [^\n]+)'
-                    ]
-                    for pat in patterns_orgao:
-                        match = re.search(pat, full_notice_clean, re.IGNORECASE)
-                        if match:
-                            orgao_name = match.group(1).strip()
-                            break
-
-                    if "INEXIGIBILIDADE" in full_notice_norm:
-                        continue
-
-                    modalidade = "Diario Oficial"
-                    if "DISPENSA" in full_notice_norm:
-                        modalidade = "Dispensa"
-                    elif "PREGAO" in full_notice_norm:
-                        modalidade = "Pregao"
-                    elif "CONCORRENCIA" in full_notice_norm:
-                        modalidade = "Concorrencia"
-                    elif "TOMADA DE PRECO" in full_notice_norm:
-                        modalidade = "Tomada de Preco"
-                    elif "CHAMADA PUBLICA" in full_notice_norm:
-                        modalidade = "Chamada Publica"
-                    elif "AVISO DE LICITACAO" in full_notice_norm:
-                        modalidade = "Aviso de Licitacao"
-                    elif "EXTRATO" in full_notice_norm:
-                        modalidade = "Extrato/Contrato"
-
-                    termos_documento_invalido = [
-                        "NOTIFICACAO",
-                        "ATRASO NA ENTREGA", "ATRASO DE ENTREGA",
-                        "PENALIDADE", "PENALIDADES", "MULTA", "ADVERTENCIA",
-                        "RESCISAO", "RESCISAO DE CONTRATO",
-                        "EXTRATO DE CONTRATO", "EXTRATO DO CONTRATO",
-                        "EXTRATO DE TERMO ADITIVO", "TERMO ADITIVO",
-                        "RATIFICACAO", "HOMOLOGACAO",
-                        "ADJUDICACAO",
-                        "RESULTADO DE JULGAMENTO",
-                        "ATA DE REGISTRO DE PRECO",
-                        "PUBLICACAO DE ATA",
-                        "ERRATA", "RETIFICACAO",
-                        "CONVOCACAO PARA ASSINATURA",
-                        "ORDEM DE FORNECIMENTO", "ORDEM DE SERVICO",
-                        "DESPACHO", "PARECER", "PORTARIA"
-                    ]
-                    if any(termo in full_notice_norm for termo in termos_documento_invalido):
-                        continue
-
-                    skip_patterns = [
-                        r'CONTRATAD[OA]\s*:\s*[A-Z]',
-                        r'CONTRATAD[OA]\s*\([Aa]\)\s*:\s*[A-Z]',
-                        r'VENCEDOR\s*:\s*[A-Z]',
-                        r'EMPRESA\s+VENCEDORA\s*:\s*[A-Z]',
-                    ]
-                    if any(re.search(pat, full_notice_clean, re.IGNORECASE) for pat in skip_patterns):
-                        continue
-
-                    ai_data = self._enrich_with_ai(full_notice_clean)
-                    objeto_final = full_notice_clean
-                    itens_final = []
-
-                    if ai_data:
-                        if ai_data.get('objeto_resumido'):
-                            objeto_final = ai_data['objeto_resumido'] + "\n\n[IA] Texto Original Resumido."
-                        if ai_data.get('itens'):
-                            for it in ai_data['itens']:
-                                itens_final.append({
-                                    "numero": 0,
-                                    "descricao": it.get('descricao', 'Item sem nome'),
-                                    "quantidade": it.get('quantidade', 1.0),
-                                    "unidade": it.get('unidade', 'UN'),
-                                    "valor_estimado": it.get('valor_estimado', 0.0),
-                                    "valor_unitario": it.get('valor_unitario', 0.0)
-                                })
+                if termo_neg_encontrado:
+                    avisos_bloqueados_negativo += 1
+                    if avisos_bloqueados_negativo <= 5:
+                        # Extrai nome do órgão para o log
+                        orgao_log = regras.orgao_log(full_notice_norm)
+                        self._logger.debug(f"Bloqueado: '{termo_neg_encontrado}' em {orgao_log}")
+                    continue
 
-                    resultados.append({
-                        "pncp_id": f"{self.ORIGEM}-{datetime.now().strftime('%Y%m%d')}-{code_id}",
-                        "orgao": orgao_name,
-                        "uf": self.UF,
-                        "modalidade": f"{modalidade} ({self.ORIGEM})",
-                        "data_sessao": datetime.now().isoformat(),
-                        "data_publicacao": datetime.now().isoformat(),
-                        "objeto": objeto_final,
-                        "link": pdf_url,
-                        "itens": itens_final,
-                        "origem": self.ORIGEM
-                    })
-                    print(f"[{self.ORIGEM}] ✅ Aprovado: {orgao_name[:50]}")
-                
-                # Log estatísticas
-                print(f"[{self.ORIGEM}] Estatísticas: {avisos_licitacao} avisos de licitação, {avisos_positivos} com termo positivo, {avisos_bloqueados_negativo} bloqueados por negativo, {len(resultados)} aprovados")
+                code_id = regras.codigo_identificador(full_notice_norm) or f"UNK-{i}"
 
-        except Exception as e:
-            print(f"[WARN] Erro ao processar PDF do {self.ORIGEM}: {str(e)}")
-        return resultados
+                orgao_name = regras.orgao(full_notice_clean) or f"Municipio {self.UF} ({self.ORIGEM})"
+
+                if "INEXIGIBILIDADE" in full_notice_norm:
+                    continue
+
+                modalidade = regras.modalidade(full_notice_norm)
+
+                if regras.eh_documento_invalido(full_notice_norm):
+                    continue
+
+                if regras.tem_contratado_definido(full_notice_clean):
+                    continue
+
+                resultado = {
+                    "pncp_id": f"{self.ORIGEM}-{publicado_em.strftime('%Y%m%d')}-{code_id}",
+                    "orgao": orgao_name,
+                    "uf": self.UF,
+                    "modalidade": f"{modalidade} ({self.ORIGEM})",
+                    "data_sessao": publicado_em.isoformat(),
+                    "data_publicacao": publicado_em.isoformat(),
+                    "objeto": full_notice_clean,
+                    "link": pdf_url,
+                    "itens": [],
+                    "origem": self.ORIGEM
+                }
+                resultados.append(resultado)
+                aprovados_ia.append((resultado, full_notice_clean))
+                self._logger.debug(f"Aprovado: {orgao_name[:50]}")
+
+            # IA em lote (pool + cache): o que não couber no orçamento da execução
+            # segue com o texto original e é enriquecido depois (drenar_pendentes)
+            if aprovados_ia and self.enrich_enabled:
+                dados_ia = diario_enriquecedor.enriquecer_lote(
+                    [(resultado["pncp_id"], texto) for resultado, texto in aprovados_ia]
+                )
+                for resultado, _ in aprovados_ia:
+                    dados = dados_ia.get(resultado["pncp_id"])
+                    if dados:
+                        resultado["objeto"] = objeto_da_ia(dados) or resultado["objeto"]
+                        resultado["itens"] = itens_da_ia(dados)
+            
+            # Log estatísticas
+            self._logger.info(f"Estatísticas: {avisos_licitacao} avisos de licitação, {avisos_positivos} com termo positivo, {avisos_bloqueados_negativo} bloqueados por negativo, {len(resultados)} aprovados")
+            self.execucao.registrar_filtrados(avisos_licitacao - len(resultados))
+
+        return resultados, cache_info
 
 
 class BncScraper(ExternalScraper):
@@ -525,18 +333,12 @@ class BncScraper(ExternalScraper):
     BASE_URL = "https://bnccompras.com"
     SEARCH_PAGE = f"{BASE_URL}/Process/ProcessSearchActivity"
     API_URL = f"{BASE_URL}/Process/GetProcessByActivity"
-
-    def __init__(self):
-        self.session = requests.Session()
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retries)
-        self.session.mount('https://', adapter)
-        self.session.mount('http://', adapter)
+    FONTE = "BNC"
 
     def _fetch_filters(self):
         resp = self.session.get(self.SEARCH_PAGE, timeout=30)
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        soup = BeautifulSoup(resp.text, HTML_PARSER)
 
         atividades = []
         for opt in soup.select('#fkActivity option'):
@@ -569,56 +371,88 @@ class BncScraper(ExternalScraper):
                 relevantes.append(a)
         return relevantes
 
-    def buscar_oportunidades(self, termos_positivos=None, termos_negativos=None, estados=None):
+    def _buscar_tabela(self, atividade_id, uf_id):
+        """HTML da tabela de processos de uma atividade em um estado (None se falhar)"""
+        r = self.session.post(
+            self.API_URL,
+            params={"idActivity": atividade_id, "idState": uf_id, "token": ""},
+            timeout=30
+        )
+        if r.status_code != 200:
+            return None
+        return r.json().get("html", "")
+
+    def buscar_oportunidades(self, termos_busca=None, termos_negativos=None, estados=None, termos_positivos=None):
+        """
+        Args:
+            termos_busca: Termos positivos (mesmo nome usado pelos demais scrapers)
+            termos_negativos: Termos que descartam o processo
+            estados: UFs (padrão: todas as disponíveis no BNC)
+            termos_positivos: Nome antigo de termos_busca (compatibilidade)
+        """
+        termos_positivos = termos_busca if termos_busca is not None else termos_positivos
         resultados = []
         try:
             atividades, estados_map = self._fetch_filters()
             atividades = self._atividades_relevantes(atividades)
 
             if not atividades:
-                print("[BNC] Nenhuma atividade relevante encontrada.")
+                self._logger.info("Nenhuma atividade relevante encontrada.")
                 return resultados
 
             # Mapeia UF -> id do BNC (se não existir, ignora)
             estados_upper = [e.upper() for e in estados] if estados else list(estados_map.keys())
             estados_ids = {uf: estados_map.get(uf) for uf in estados_upper if estados_map.get(uf)}
-            if estados_upper and not estados_ids:
-                print("[BNC] Nenhum estado da lista está disponível no BNC.")
+            # Sem estados (lista fora do BNC ou página de filtros sem UFs) não há consultas
+            if not estados_ids:
+                self._logger.info("Nenhum estado da lista está disponível no BNC.")
                 return resultados
 
             termos_pos_upper = [t.upper() for t in termos_positivos] if termos_positivos else []
             termos_neg_upper = [t.upper() for t in termos_negativos] if termos_negativos else []
 
-            for atividade in atividades:
-                for uf, uf_id in estados_ids.items():
+            # Todas as consultas (atividade x UF) em paralelo; o tempo total fica
+            # no da consulta mais lenta, não na soma
+            consultas = [(atividade, uf, uf_id) for atividade in atividades for uf, uf_id in estados_ids.items()]
+            vistos = set()
+            repetidos = 0
+            descartados = 0
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(BNC_WORKERS, len(consultas))) as executor:
+                futuros = [executor.submit(self._buscar_tabela, atividade["id"], uf_id)
+                           for atividade, _, uf_id in consultas]
+
+                # Resultados na ordem das consultas: a 1ª atividade que traz um processo
+                # é a que fica no motivo, como no laço sequencial
+                for (atividade, uf, _), futuro in zip(consultas, futuros):
                     try:
-                        r = self.session.post(
-                            self.API_URL,
-                            params={"idActivity": atividade["id"], "idState": uf_id, "token": ""},
-                            timeout=30
-                        )
-                        if r.status_code != 200:
+                        html = futuro.result()
+                        if not html:
                             continue
-
-                        data_json = r.json()
-                        html = data_json.get("html", "")
-                        soup = BeautifulSoup(html, 'html.parser')
+                        soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer('tr'))
                         for tr in soup.find_all('tr'):
                             cols = tr.find_all('td')
                             if len(cols) < 7:
                                 continue
-                            orgao = cols[1].get_text(strip=True)
                             proc_num = cols[2].get_text(strip=True)
-                            modalidade = cols[3].get_text(strip=True)
-                            objeto = cols[4].get_text(strip=True)
-                            disputa_str = cols[6].get_text(strip=True)
+                            # Mesmo processo listado em outra atividade: já avaliado
+                            if (uf, proc_num) in vistos:
+                                repetidos += 1
+                                continue
+                            vistos.add((uf, proc_num))
 
+                            objeto = cols[4].get_text(strip=True)
                             obj_upper = objeto.upper()
                             if termos_neg_upper and any(t in obj_upper for t in termos_neg_upper):
+                                descartados += 1
                                 continue
                             if termos_pos_upper and not any(t in obj_upper for t in termos_pos_upper):
+                                descartados += 1
                                 continue
 
+                            orgao = cols[1].get_text(strip=True)
+                            modalidade = cols[3].get_text(strip=True)
+                            disputa_str = cols[6].get_text(strip=True)
+
                             # Data de disputa -> usa como encerramento
                             data_enc = None
                             dias_restantes = None
@@ -649,14 +483,21 @@ class BncScraper(ExternalScraper):
                                 "motivo_aprovacao": f"Atividade {atividade['nome']} / Termos: {', '.join(termos_hit) if termos_hit else 'contexto saúde'}",
                                 "termos_encontrados": termos_hit
                             })
+                    except ColetaInterrompida:
+                        # Orçamento/cancelamento: devolve o que já foi avaliado
+                        break
                     except Exception as e:
-                        print(f"[BNC] Erro na atividade {atividade['id']} UF {uf}: {e}")
+                        self.execucao.registrar_erro(f"Erro na atividade {atividade['id']} UF {uf}: {e}")
 
-            print(f"[BNC] Total retornado: {len(resultados)}")
+            self.execucao.registrar_duplicados(repetidos)
+            self.execucao.registrar_filtrados(descartados)
+            self._logger.info(f"Total retornado: {len(resultados)} ({len(consultas)} consultas, {len(vistos)} processos)")
             return resultados
 
+        except ColetaInterrompida:
+            return resultados
         except Exception as e:
-            print(f"[BNC] Erro geral: {e}")
+            self.execucao.registrar_erro(f"Erro geral: {e}")
             return resultados
 
 class FemurnScraper(DiarioMunicipalScraper):
@@ -1,9 +1,8 @@
 import logging
 import json
 import re
-import pypdf
-from io import BytesIO
 from modules.ai.ai_config import get_model
+from modules.scrapers.pdf_text import extrair_texto
 
 class PDFExtractor:
     def __init__(self):
@@ -12,11 +11,7 @@ class PDFExtractor:
     def extract_text(self, pdf_content: bytes) -> str:
         """Extracts raw text from PDF bytes."""
         try:
-            reader = pypdf.PdfReader(BytesIO(pdf_content))
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            return extrair_texto(pdf_content)
         except Exception as e:
             logging.error(f"Erro ao ler PDF: {e}")
             return ""
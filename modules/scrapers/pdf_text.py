@@ -0,0 +1,147 @@
+"""
+Extração de texto de PDFs por página, em paralelo
+O extract_text do pypdf é Python puro: um diário de centenas de páginas
+prende uma thread (e o GIL) por minutos. Aqui o PDF é dividido em intervalos
+de páginas extraídos por um pool de processos compartilhado; cada worker abre
+o arquivo por conta própria e devolve o texto do seu intervalo.
+
+PDFs pequenos (ou PDF_WORKERS=1) são extraídos no próprio processo: abrir o
+PDF em cada worker só compensa quando há páginas suficientes para dividir.
+Os workers são iniciados por forkserver: scripts que extraem PDFs precisam
+do guarda `if __name__ == "__main__"` (o módulo principal é reimportado).
+
+Uso:
+    from modules.scrapers.pdf_text import extrair_paginas, iterar_paginas
+    paginas = extrair_paginas(conteudo)          # lista, uma string por página
+    for texto in iterar_paginas(conteudo):       # stream, na ordem das páginas
+        ...
+"""
+import atexit
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional
+
+from pypdf import PdfReader
+
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Páginas por tarefa enviada ao pool
+PDF_PAGINAS_POR_LOTE = int(os.getenv("PDF_PAGINAS_POR_LOTE", "16"))
+# Abaixo disso a extração é feita no próprio processo
+PDF_MINIMO_PARALELO = int(os.getenv("PDF_MINIMO_PARALELO", "24"))
+
+
+def _texto_pagina(reader: PdfReader, indice: int) -> str:
+    try:
+        return reader.pages[indice].extract_text() or ""
+    except Exception as e:
+        # Uma página corrompida não derruba o documento inteiro
+        logger.warning(f"Falha ao extrair página {indice + 1}: {e}")
+        return ""
+
+
+def _extrair_intervalo(caminho: str, inicio: int, fim: int) -> List[str]:
+    """Worker: texto das páginas [inicio, fim) do PDF em disco"""
+    reader = PdfReader(caminho)
+    return [_texto_pagina(reader, i) for i in range(inicio, fim)]
+
+
+# === POOL COMPARTILHADO ===
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _obter_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # forkserver/spawn: fork de um processo com threads (scheduler, API)
+            # pode herdar locks presos, e o pypdf loga nos workers
+            metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context(metodo))
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_descartar_pool)
+
+
+# === API ===
+
+def iterar_paginas(conteudo: bytes, max_paginas: Optional[int] = None) -> Iterator[str]:
+    """
+    Texto de cada página do PDF, na ordem, à medida que os intervalos ficam prontos.
+
+    Args:
+        conteudo: Bytes do PDF
+        max_paginas: Limita às primeiras N páginas
+
+    Raises:
+        pypdf.errors.PdfReadError se o arquivo não puder ser aberto
+    """
+    reader = PdfReader(io.BytesIO(conteudo))
+    total = len(reader.pages)
+    if max_paginas is not None:
+        total = min(total, max_paginas)
+
+    if PDF_WORKERS <= 1 or total < PDF_MINIMO_PARALELO:
+        for i in range(total):
+            yield _texto_pagina(reader, i)
+        return
+
+    # Intervalos pequenos o bastante para ocupar todos os workers
+    tamanho = max(1, min(PDF_PAGINAS_POR_LOTE, -(-total // PDF_WORKERS)))
+    fd, caminho = tempfile.mkstemp(suffix=".pdf")
+    proxima = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(conteudo)
+        pool = _obter_pool()
+        futuros = [pool.submit(_extrair_intervalo, caminho, inicio, min(inicio + tamanho, total))
+                   for inicio in range(0, total, tamanho)]
+        try:
+            for futuro in futuros:
+                for texto in futuro.result():
+                    proxima += 1
+                    yield texto
+        except BrokenProcessPool as e:
+            logger.warning(f"Pool de extração de PDF falhou ({e}); seguindo no processo atual")
+            _descartar_pool()
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+    finally:
+        try:
+            os.unlink(caminho)
+        except OSError:
+            pass
+
+    for i in range(proxima, total):
+        yield _texto_pagina(reader, i)
+
+
+def extrair_paginas(conteudo: bytes, max_paginas: Optional[int] = None) -> List[str]:
+    """Lista com o texto de cada página (ver iterar_paginas)"""
+    return list(iterar_paginas(conteudo, max_paginas=max_paginas))
+
+
+def extrair_texto(conteudo: bytes, max_paginas: Optional[int] = None) -> str:
+    """Texto do documento inteiro, cada página terminada em quebra de linha"""
+    return "".join(texto + "\n" for texto in iterar_paginas(conteudo, max_paginas=max_paginas))
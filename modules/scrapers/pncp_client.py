@@ -6,6 +6,9 @@ import concurrent.futures
 from threading import Lock
 import unicodedata
 
+from modules.utils.metrics import CACHE_REQUESTS, PNCP_PAGINAS_POR_COMBO, PNCP_REQUEST_SECONDS, PNCP_REQUESTS
+from modules.utils.search_progress import search_progress
+
 # Cache de resultados para evitar chamadas repetidas
 try:
     from .pncp_cache import get_cached_results, save_to_cache, get_orgaos_prioritarios
@@ -578,6 +581,8 @@ class PNCPClient:
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36"
         }
+        # Execução da fonte na coleta (runtime de scrapers): cancelamento e orçamento de tempo
+        self.execucao = None
         
         # Inicializa cache de termos negativos (uma vez só)
         if PNCPClient._TERMOS_NEGATIVOS_SET is None:
@@ -595,6 +600,24 @@ class PNCPClient:
         # Default combinado (evita recomputar listas enormes a cada chamada)
         self._negativos_com_eventos_norm = self._negativos_norm + self._eventos_neg_norm + self._infra_neg_norm
 
+    def _get(self, endpoint: str, url: str, via_session: bool = True, **kwargs):
+        """GET instrumentado: latência e status HTTP por endpoint (GET /metrics da API)"""
+        if self.execucao is not None:
+            self.execucao.verificar()
+        status = "erro"
+        inicio = time.perf_counter()
+        try:
+            resp = (self.session.get if via_session else requests.get)(url, **kwargs)
+            status = str(resp.status_code)
+            return resp
+        finally:
+            PNCP_REQUEST_SECONDS.observe(time.perf_counter() - inicio, endpoint=endpoint)
+            PNCP_REQUESTS.inc(endpoint=endpoint, status=status)
+
+    def _interrompida(self):
+        """Motivo se a execução vinculada foi cancelada/estourou orçamento (ColetaInterrompida em _get)"""
+        return self.execucao.interrompida if self.execucao is not None else None
+
     def _is_maintenance_term(self, termo_norm: str) -> bool:
         if not termo_norm:
             return False
@@ -706,8 +729,10 @@ class PNCPClient:
                 apenas_abertas=apenas_abertas
             )
             if cached is not None:
+                CACHE_REQUESTS.inc(cache="pncp_resultados", resultado="hit")
                 print(f"[PNCP] ✅ Usando {len(cached)} resultados em cache")
                 return cached
+            CACHE_REQUESTS.inc(cache="pncp_resultados", resultado="miss")
         
         if termos_negativos is None:
             termos_neg_norm = self._negativos_com_eventos_norm
@@ -778,11 +803,13 @@ class PNCPClient:
             modalidade_nome = {6: "Pregão", 8: "Dispensa", 12: "Emergencial"}.get(modalidade)
             resultados_local = []
             count_api = 0
+            paginas_lidas = 0
             total_paginas_api = None
             
             tamanho_pagina = 50
 
             def fetch_page(page_num: int):
+                nonlocal paginas_lidas
                 params = params_base.copy()
                 params.update(
                     {
@@ -792,17 +819,19 @@ class PNCPClient:
                         "tamanhoPagina": str(tamanho_pagina),
                     }
                 )
-                resp = self.session.get(self.BASE_URL, params=params, headers=self.headers, timeout=45)
+                resp = self._get("publicacao", self.BASE_URL, params=params, headers=self.headers, timeout=45)
                 # A API aceita yyyyMMdd; se 400, tentamos ISO apenas para dataInicial/dataFinal (legado)
                 if resp.status_code == 400:
                     params["dataInicial"] = datas_fallback["data_inicial_iso"]
                     params["dataFinal"] = datas_fallback["data_final_iso"]
-                    resp = self.session.get(self.BASE_URL, params=params, headers=self.headers, timeout=45)
+                    resp = self._get("publicacao", self.BASE_URL, params=params, headers=self.headers, timeout=45)
                 if resp.status_code == 204:
                     return [], 0
                 if resp.status_code != 200:
                     return None, 0
                 payload = resp.json()
+                paginas_lidas += 1
+                search_progress.incr("paginas")
                 try:
                     total_pags = int(payload.get("totalPaginas") or 0)
                 except Exception:
@@ -847,6 +876,7 @@ class PNCPClient:
                     parsed["fonte"] = "PNCP"
                     resultados_local.append(parsed)
                     aprovados_pagina += 1
+                    search_progress.incr("aprovados")
 
                     if apenas_abertas and max_por_combo and len(resultados_local) >= max_por_combo:
                         return aprovados_pagina
@@ -873,6 +903,7 @@ class PNCPClient:
                 with resultados_lock:
                     resultados.extend(resultados_local)
                     total_api[0] += count_api
+                PNCP_PAGINAS_POR_COMBO.observe(paginas_lidas)
                 print(f"  ✓ {modalidade_nome}/{uf}: {len(resultados_local)} aprovados de {count_api}")
                 return len(resultados_local)
 
@@ -917,6 +948,8 @@ class PNCPClient:
                             except requests.exceptions.ReadTimeout:
                                 continue
                             except Exception as e:
+                                if self._interrompida():
+                                    raise
                                 print(f"[PNCP] Erro {modalidade_nome}/{uf} pag {pagina}: {e}")
                                 continue
                             if items is None:
@@ -939,6 +972,8 @@ class PNCPClient:
                     except requests.exceptions.ReadTimeout:
                         continue
                     except Exception as e:
+                        if self._interrompida():
+                            raise
                         print(f"[PNCP] Erro {modalidade_nome}/{uf} pag {pagina}: {e}")
                         continue
             
@@ -946,6 +981,7 @@ class PNCPClient:
             with resultados_lock:
                 resultados.extend(resultados_local)
                 total_api[0] += count_api
+            PNCP_PAGINAS_POR_COMBO.observe(paginas_lidas)
             
             print(f"  ✓ {modalidade_nome}/{uf}: {len(resultados_local)} aprovados de {count_api}")
             return len(resultados_local)
@@ -979,7 +1015,11 @@ class PNCPClient:
         print(f"{'='*80}\n")
 
         # === CACHE: Salva resultados para próximas buscas ===
-        if usar_cache and CACHE_DISPONIVEL and resultados:
+        # Busca interrompida (cancelamento/orçamento) é parcial: não vira cache
+        interrompida = self._interrompida()
+        if interrompida:
+            print(f"[PNCP] Busca interrompida ({interrompida}): resultados parciais não vão para o cache")
+        if usar_cache and CACHE_DISPONIVEL and resultados and not interrompida:
             save_to_cache(
                 results=resultados,
                 dias_busca=dias_busca,
@@ -1033,7 +1073,7 @@ class PNCPClient:
         
         arquivos = []
         try:
-            resp = requests.get(url, headers=self.headers, timeout=20)
+            resp = self._get("arquivos", url, headers=self.headers, via_session=False, timeout=20)
             if resp.status_code == 200:
                 lista = resp.json()
                 for arq in lista:
@@ -1053,7 +1093,7 @@ class PNCPClient:
         Retorna bytes ou None.
         """
         try:
-            resp = requests.get(url, headers=self.headers, timeout=30)
+            resp = self._get("download", url, headers=self.headers, via_session=False, timeout=30)
             if resp.status_code == 200:
                 return resp.content
         except Exception as e:
@@ -1067,7 +1107,9 @@ class PNCPClient:
         """
         cache_key = '_itens_cache'
         if licitacao_dict and cache_key in licitacao_dict:
+            CACHE_REQUESTS.inc(cache="pncp_itens", resultado="hit")
             return licitacao_dict[cache_key]
+        CACHE_REQUESTS.inc(cache="pncp_itens", resultado="miss")
 
         cnpj = licitacao_dict.get('cnpj') if licitacao_dict else None
         ano = licitacao_dict.get('ano') if licitacao_dict else None
@@ -1084,7 +1126,7 @@ class PNCPClient:
         itens_encontrados = []
         for url in urls_tentativas:
             try:
-                resp = requests.get(url, headers=self.headers, timeout=30)
+                resp = self._get("itens", url, headers=self.headers, via_session=False, timeout=30)
                 if resp.status_code != 200:
                     print(f"[PNCP] Itens HTTP {resp.status_code} em {url}")
                     continue
@@ -1122,7 +1164,7 @@ class PNCPClient:
             return None
         url = f"https://pncp.gov.br/api/pncp/v1/orgaos/{cnpj}/compras/{ano}/{seq}"
         try:
-            resp = requests.get(url, headers=self.headers, timeout=20)
+            resp = self._get("compra", url, headers=self.headers, via_session=False, timeout=20)
             if resp.status_code != 200:
                 print(f"Erro buscar_por_id: {resp.status_code} {resp.text[:200]}")
                 return None
@@ -1157,7 +1199,7 @@ class PNCPClient:
             params["uf"] = uf
             
         try:
-            resp = self.session.get(url, params=params, headers=self.headers, timeout=15)
+            resp = self._get("precos_itens", url, params=params, headers=self.headers, timeout=15)
             if resp.status_code == 200:
                 dados = resp.json().get('data', [])
                 precos = []
@@ -1218,7 +1260,7 @@ class PNCPClient:
                     "tamanhoPagina": "20",
                 }
                 
-                resp = self.session.get(url, params=params, headers=self.headers, timeout=30)
+                resp = self._get("publicacao", url, params=params, headers=self.headers, timeout=30)
                 if resp.status_code != 200:
                     continue
                 
@@ -0,0 +1,288 @@
+"""
+Runtime comum dos scrapers de fontes externas
+Antes cada scraper montava a própria requests.Session (retries, pool e timeouts
+diferentes) e logava com print. Aqui ficam, uma vez só para todas as fontes:
+  - transporte HTTP compartilhado: uma Session com pool de conexões e política
+    de retry única (SCRAPER_RETRIES, SCRAPER_POOL_CONEXOES, SCRAPER_TIMEOUT);
+  - orçamentos por fonte: tempo (SCRAPER_TEMPO_MAX) e bytes baixados
+    (SCRAPER_MAX_MB), com override por fonte (ex.: SCRAPER_TEMPO_MAX_FEMURN);
+  - cancelamento: um threading.Event compartilhado pela coleta; a próxima
+    requisição de cada fonte levanta ColetaInterrompida;
+  - métricas: latência, status e bytes de cada requisição (GET /metrics) e o
+    run da fonte em ScraperMetricsCollector (coletados, filtrados, duplicados,
+    erros, latência média).
+
+Fonte nova: herda de ExternalScraper, usa self.session (mesma interface
+get/post da requests.Session) e devolve a lista de resultados; orçamentos,
+cancelamento e métricas vêm do runtime.
+
+Uso:
+    execucao = ExecucaoFonte("FEMURN", cancelamento=evento, metricas=scraper_metrics)
+    resultados = execucao.rodar(lambda ex: FemurnScraper().vincular(ex).buscar_oportunidades())
+    execucao.registrar_duplicados(3)
+    execucao.finalizar()
+"""
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules.scrapers.diario_rules import normalizar
+from modules.utils.logging_config import get_logger
+from modules.utils.metrics import (
+    SCRAPER_BYTES,
+    SCRAPER_ITEMS,
+    SCRAPER_REQUEST_SECONDS,
+    SCRAPER_REQUESTS,
+    SCRAPER_RUNS,
+)
+from modules.utils.scraper_metrics import ScraperMetricsCollector
+
+logger = get_logger(__name__)
+
+# Conexões mantidas por host no pool compartilhado (>= maior fan-out de uma fonte)
+SCRAPER_POOL_CONEXOES = int(os.getenv("SCRAPER_POOL_CONEXOES", "16"))
+SCRAPER_RETRIES = int(os.getenv("SCRAPER_RETRIES", "3"))
+# Timeout padrão de uma requisição (segundos), quando o scraper não informa
+SCRAPER_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "30"))
+# Orçamentos de uma execução da fonte na coleta
+SCRAPER_TEMPO_MAX = float(os.getenv("SCRAPER_TEMPO_MAX", "900"))
+SCRAPER_MAX_MB = int(os.getenv("SCRAPER_MAX_MB", "200"))
+
+
+class ColetaInterrompida(Exception):
+    """Fonte parou antes do fim: motivo "cancelada", "tempo" ou "bytes" """
+
+    def __init__(self, fonte: str, motivo: str):
+        super().__init__(f"{fonte}: coleta interrompida ({motivo})")
+        self.fonte = fonte
+        self.motivo = motivo
+
+
+# === TRANSPORTE COMPARTILHADO ===
+
+_transporte: Optional[requests.Session] = None
+_transporte_lock = threading.Lock()
+
+
+def transporte_compartilhado() -> requests.Session:
+    """Session única (pool + retry) usada por todas as fontes"""
+    global _transporte
+    with _transporte_lock:
+        if _transporte is None:
+            sessao = requests.Session()
+            retries = Retry(total=SCRAPER_RETRIES, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+            adapter = HTTPAdapter(max_retries=retries, pool_connections=20, pool_maxsize=SCRAPER_POOL_CONEXOES)
+            sessao.mount('https://', adapter)
+            sessao.mount('http://', adapter)
+            _transporte = sessao
+        return _transporte
+
+
+def sufixo_env(fonte: str) -> str:
+    """Nome da fonte como sufixo de variável de ambiente ("MaceióSaúde" -> "MACEIOSAUDE")"""
+    return re.sub(r'\W+', '_', normalizar(fonte)).strip('_')
+
+
+def orcamento_fonte(fonte: str) -> Tuple[float, int]:
+    """(segundos, bytes) de uma execução da fonte; SCRAPER_TEMPO_MAX_<FONTE> / SCRAPER_MAX_MB_<FONTE> sobrescrevem"""
+    sufixo = sufixo_env(fonte)
+    segundos = float(os.getenv(f"SCRAPER_TEMPO_MAX_{sufixo}", SCRAPER_TEMPO_MAX))
+    megas = int(os.getenv(f"SCRAPER_MAX_MB_{sufixo}", SCRAPER_MAX_MB))
+    return segundos, megas * 1024 * 1024
+
+
+class SessaoFonte:
+    """
+    Interface da requests.Session (get/post/request) sobre o transporte
+    compartilhado, com orçamento, cancelamento e métricas da fonte.
+    """
+
+    def __init__(self, execucao: "ExecucaoFonte"):
+        self._execucao = execucao
+        self.headers: Dict[str, str] = {}
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        execucao = self._execucao
+        execucao.verificar()
+
+        timeout = kwargs.get('timeout') or SCRAPER_TIMEOUT
+        restante = execucao.restante()
+        if restante is not None and not isinstance(timeout, tuple):
+            # Uma requisição lenta (com todas as tentativas do retry) não estoura
+            # o orçamento de tempo da fonte
+            timeout = max(1.0, min(timeout, restante / (SCRAPER_RETRIES + 1)))
+        kwargs['timeout'] = timeout
+        if self.headers:
+            kwargs['headers'] = {**self.headers, **(kwargs.get('headers') or {})}
+        stream = kwargs.pop('stream', False)
+
+        status = "erro"
+        tamanho = 0
+        inicio = time.perf_counter()
+        try:
+            resp = transporte_compartilhado().request(method, url, stream=True, **kwargs)
+            status = str(resp.status_code)
+            anunciado = int(resp.headers.get('Content-Length') or 0)
+            if anunciado:
+                try:
+                    # Recusa antes de baixar o corpo se ele não cabe no orçamento
+                    execucao.verificar(bytes_a_baixar=anunciado)
+                except ColetaInterrompida:
+                    resp.close()
+                    raise
+            tamanho = anunciado if stream else len(resp.content)
+            return resp
+        finally:
+            segundos = time.perf_counter() - inicio
+            execucao.contabilizar(tamanho, segundos, status)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+
+class ExecucaoFonte:
+    """
+    Uma execução de uma fonte: sessão HTTP, orçamentos, cancelamento e métricas.
+    Sem orçamento (None) não há limite: é o caso dos scrapers usados fora da
+    coleta (dashboard, backfill), que continuam com transporte e métricas comuns.
+    """
+
+    def __init__(self, fonte: str, *, segundos: Optional[float] = None, max_bytes: Optional[int] = None,
+                 cancelamento: Optional[threading.Event] = None,
+                 metricas: Optional[ScraperMetricsCollector] = None):
+        self.fonte = fonte
+        self.segundos = segundos
+        self.max_bytes = max_bytes
+        self.cancelamento = cancelamento or threading.Event()
+        self.metricas = metricas
+        self.run_id = metricas.start_run(fonte) if metricas else None
+        self.inicio = time.monotonic()
+        self.bytes = 0
+        self.erros = 0
+        self.interrompida: Optional[str] = None
+        self._lock = threading.Lock()
+        self.session = SessaoFonte(self)
+
+    @classmethod
+    def com_orcamento(cls, fonte: str, **kwargs) -> "ExecucaoFonte":
+        """Execução com os orçamentos da fonte (orcamento_fonte)"""
+        segundos, max_bytes = orcamento_fonte(fonte)
+        return cls(fonte, segundos=segundos, max_bytes=max_bytes, **kwargs)
+
+    # === ORÇAMENTOS / CANCELAMENTO ===
+
+    def restante(self) -> Optional[float]:
+        """Segundos restantes do orçamento de tempo (None: sem limite)"""
+        if self.segundos is None:
+            return None
+        return self.segundos - (time.monotonic() - self.inicio)
+
+    def cancelar(self):
+        self.cancelamento.set()
+
+    def verificar(self, bytes_a_baixar: int = 0):
+        """Levanta ColetaInterrompida se a fonte foi cancelada ou esgotou um orçamento"""
+        motivo = None
+        if self.cancelamento.is_set():
+            motivo = "cancelada"
+        elif self.segundos is not None and self.restante() <= 0:
+            motivo = "tempo"
+        elif self.max_bytes is not None and self.bytes + bytes_a_baixar > self.max_bytes:
+            motivo = "bytes"
+        if motivo:
+            with self._lock:
+                if self.interrompida is None:
+                    self.interrompida = motivo
+                    logger.warning(f"{self.fonte}: coleta interrompida ({motivo})")
+            raise ColetaInterrompida(self.fonte, motivo)
+
+    # === MÉTRICAS ===
+
+    def contabilizar(self, bytes_baixados: int, segundos: float, status: str):
+        with self._lock:
+            self.bytes += bytes_baixados
+        SCRAPER_REQUEST_SECONDS.observe(segundos, fonte=self.fonte)
+        SCRAPER_REQUESTS.inc(fonte=self.fonte, status=status)
+        if bytes_baixados:
+            SCRAPER_BYTES.inc(bytes_baixados, fonte=self.fonte)
+        if self.metricas:
+            self.metricas.record_request(bytes_baixados, segundos, run_id=self.run_id)
+
+    def registrar_coletados(self, n: int):
+        if n:
+            SCRAPER_ITEMS.inc(n, fonte=self.fonte, resultado="coletado")
+            if self.metricas:
+                self.metricas.record_collected(n, run_id=self.run_id)
+
+    def registrar_filtrados(self, n: int):
+        if n:
+            SCRAPER_ITEMS.inc(n, fonte=self.fonte, resultado="filtrado")
+            if self.metricas:
+                self.metricas.record_filtered(n, run_id=self.run_id)
+
+    def registrar_duplicados(self, n: int):
+        if n:
+            SCRAPER_ITEMS.inc(n, fonte=self.fonte, resultado="duplicado")
+            if self.metricas:
+                self.metricas.record_duplicate(n, run_id=self.run_id)
+
+    def registrar_erro(self, mensagem: str):
+        with self._lock:
+            self.erros += 1
+        SCRAPER_ITEMS.inc(fonte=self.fonte, resultado="erro")
+        if self.metricas:
+            self.metricas.record_error(f"{self.fonte}: {mensagem}", run_id=self.run_id)
+        else:
+            logger.warning(f"{self.fonte}: {mensagem}")
+
+    # === CICLO DE VIDA ===
+
+    def rodar(self, buscar: Callable[["ExecucaoFonte"], Optional[List[Dict[str, Any]]]],
+              eh_erro: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        Executa a busca da fonte; erros e interrupções viram métricas (nunca sobem).
+
+        Args:
+            buscar: Recebe a execução e devolve os resultados (parciais, se interrompida)
+            eh_erro: Identifica entradas de erro devolvidas pelo scraper (contadas como
+                erro e removidas)
+
+        Returns:
+            Resultados válidos (contados como coletados)
+        """
+        try:
+            self.verificar()
+            resultados = buscar(self) or []
+        except ColetaInterrompida:
+            resultados = []
+        except Exception as e:
+            logger.warning(f"Erro {self.fonte}: {e}", exc_info=True)
+            self.registrar_erro(str(e))
+            resultados = []
+        if eh_erro:
+            validos = []
+            for r in resultados:
+                if eh_erro(r):
+                    self.registrar_erro(str(r.get("objeto") or r.get("pncp_id"))[:200])
+                else:
+                    validos.append(r)
+            resultados = validos
+        self.registrar_coletados(len(resultados))
+        return resultados
+
+    def finalizar(self):
+        """Fecha o run (grava em ScraperMetricsCollector)"""
+        status = self.interrompida or ("erro" if self.erros else "ok")
+        SCRAPER_RUNS.inc(fonte=self.fonte, status=status)
+        if self.metricas:
+            mensagem = f"Interrompida ({self.interrompida})" if self.interrompida else None
+            self.metricas.end_run(sucesso=status == "ok", mensagem=mensagem, run_id=self.run_id)
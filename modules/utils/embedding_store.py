@@ -0,0 +1,296 @@
+"""
+Armazenamento binário de embeddings (substitui data/embeddings_cache.json)
+Os vetores ficam em uma matriz float32 num arquivo .npy lido por memmap: um
+lookup lê só a linha pedida, sem carregar (nem parsear) o resto. As chaves
+ficam em keys.jsonl, uma por linha, na mesma ordem das linhas da matriz.
+
+Layout em data/embeddings/:
+    keys.jsonl        1ª linha: manifesto {"dim", "vetores"}; demais: uma chave (JSON) por linha
+    vectors-<N>.npy   matriz (linhas x dim) float32, cresce só no fim
+
+Crescimento append-only: vetores novos (ou regravados) são escritos no fim da
+matriz e o cabeçalho do .npy é atualizado no lugar; a chave entra no fim do
+keys.jsonl (a última ocorrência vence). A compactação regrava só as linhas
+vivas em uma nova geração vectors-<N+1>.npy e troca o keys.jsonl
+atomicamente (o manifesto é o ponto de commit).
+
+Uso:
+    from modules.utils.embedding_store import get_embedding_store
+    store = get_embedding_store()
+    vetor = store.get("Centrífuga CENTRIFUGA")
+    store.put("Nova chave", vetor)
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ARQUIVO_CHAVES = "keys.jsonl"
+DTYPE = np.dtype("<f4")
+# Compacta automaticamente quando as linhas mortas passam desta fração (e do mínimo)
+FRACAO_COMPACTACAO = 0.5
+MINIMO_COMPACTACAO = 1000
+
+
+def _cabecalho_npy(linhas: int, dim: int) -> bytes:
+    """Cabeçalho .npy v1.0 (o numpy reserva espaço para o eixo 0 crescer no lugar)"""
+    import io
+    buf = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buf, {"descr": DTYPE.str, "fortran_order": False, "shape": (linhas, dim)})
+    return buf.getvalue()
+
+
+class EmbeddingStore:
+    """
+    Matriz float32 memmap + índice de chaves, com crescimento append-only.
+    Um escritor por vez (lock de thread); leitores em outros processos
+    acompanham as mudanças pelo tamanho do keys.jsonl.
+    """
+
+    def __init__(self, diretorio: str = None):
+        """
+        Args:
+            diretorio: Diretório do store. Default: data/embeddings/
+        """
+        if diretorio is None:
+            diretorio = Path(__file__).parent.parent.parent / "data" / "embeddings"
+        self.dir = Path(diretorio)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.arquivo_chaves = self.dir / ARQUIVO_CHAVES
+
+        self._lock = threading.RLock()
+        self.dim: Optional[int] = None
+        self.arquivo_vetores: Optional[Path] = None
+        self._indice: Dict[str, int] = {}
+        self._linhas = 0           # linhas válidas na matriz (= chaves no keys.jsonl)
+        self._offset_chaves = 0    # bytes do keys.jsonl já lidos
+        self._inode = None
+        self._matriz: Optional[np.memmap] = None
+        self._sincronizar()
+
+    # === LEITURA DO ÍNDICE ===
+
+    def _sincronizar(self):
+        """Lê as chaves novas do keys.jsonl (ou tudo, se houve compactação)"""
+        try:
+            st = os.stat(self.arquivo_chaves)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset_chaves:
+            self._recarregar()
+            return
+        if st.st_size == self._offset_chaves:
+            return
+        with open(self.arquivo_chaves, "rb") as f:
+            f.seek(self._offset_chaves)
+            self._ler_chaves(f)
+
+    def _recarregar(self):
+        self._indice = {}
+        self._linhas = 0
+        self._matriz = None
+        with open(self.arquivo_chaves, "rb") as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            manifesto = json.loads(f.readline())
+            self.dim = int(manifesto["dim"])
+            self.arquivo_vetores = self.dir / manifesto["vetores"]
+            self._offset_chaves = f.tell()
+            self._ler_chaves(f)
+
+    def _ler_chaves(self, f):
+        for linha in f:
+            if not linha.endswith(b"\n"):
+                break  # escrita em andamento (ou interrompida): ignora a linha parcial
+            self._indice[json.loads(linha)] = self._linhas
+            self._linhas += 1
+            self._offset_chaves = f.tell()
+        self._matriz = None
+
+    def _vetores(self) -> Optional[np.ndarray]:
+        if self._matriz is None and self._linhas:
+            self._matriz = np.load(self.arquivo_vetores, mmap_mode="r")
+        return self._matriz
+
+    # === CONSULTA ===
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sincronizar()
+            return len(self._indice)
+
+    def __contains__(self, chave: str) -> bool:
+        with self._lock:
+            self._sincronizar()
+            return chave in self._indice
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            self._sincronizar()
+            return list(self._indice)
+
+    def get(self, chave: str) -> Optional[np.ndarray]:
+        """Vetor da chave (cópia da linha) ou None"""
+        with self._lock:
+            self._sincronizar()
+            linha = self._indice.get(chave)
+            if linha is None:
+                return None
+            return np.array(self._vetores()[linha])
+
+    def get_many(self, chaves: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Vetores das chaves presentes (leitura das linhas em ordem de disco)"""
+        with self._lock:
+            self._sincronizar()
+            presentes = sorted(((self._indice[c], c) for c in set(chaves) if c in self._indice))
+            if not presentes:
+                return {}
+            matriz = self._vetores()[[linha for linha, _ in presentes]]
+            return {chave: matriz[i] for i, (_, chave) in enumerate(presentes)}
+
+    # === ESCRITA ===
+
+    def _iniciar(self, dim: int):
+        """Cria um store vazio (geração 1)"""
+        self.dim = dim
+        self.arquivo_vetores = self.dir / "vectors-1.npy"
+        with open(self.arquivo_vetores, "wb") as f:
+            f.write(_cabecalho_npy(0, dim))
+        self._gravar_manifesto(self.arquivo_chaves, [])
+        self._recarregar()
+
+    def _gravar_manifesto(self, destino: Path, chaves: List[str]):
+        tmp = destino.with_name(destino.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"dim": self.dim, "vetores": self.arquivo_vetores.name}) + "\n")
+            for chave in chaves:
+                f.write(json.dumps(chave, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, destino)
+
+    def put(self, chave: str, vetor):
+        self.put_many({chave: vetor})
+
+    def put_many(self, vetores: Dict[str, Iterable[float]]):
+        """
+        Acrescenta vetores no fim da matriz (chaves existentes ganham linha
+        nova; a antiga vira espaço morto até a próxima compactação).
+        """
+        if not vetores:
+            return
+        chaves = list(vetores)
+        matriz = np.asarray([np.asarray(vetores[c], dtype=DTYPE) for c in chaves], dtype=DTYPE)
+        if matriz.ndim != 2:
+            raise ValueError("Vetores devem ter todos a mesma dimensão")
+
+        with self._lock:
+            self._sincronizar()
+            if self.dim is None:
+                self._iniciar(matriz.shape[1])
+            if matriz.shape[1] != self.dim:
+                raise ValueError(f"Dimensão {matriz.shape[1]} difere da do store ({self.dim})")
+
+            total = self._linhas + len(chaves)
+            cabecalho = _cabecalho_npy(total, self.dim)
+            with open(self.arquivo_vetores, "r+b") as f:
+                # Posição pela contagem de chaves: descarta restos de uma escrita interrompida
+                inicio = len(cabecalho) + self._linhas * self.dim * DTYPE.itemsize
+                f.truncate(inicio)
+                f.seek(inicio)
+                f.write(matriz.tobytes())
+                f.seek(0)
+                if len(_cabecalho_npy(self._linhas, self.dim)) != len(cabecalho):
+                    raise RuntimeError("Cabeçalho .npy mudou de tamanho; compacte o store")
+                f.write(cabecalho)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # As chaves entram por último: são elas que tornam as linhas visíveis
+            with open(self.arquivo_chaves, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(c, ensure_ascii=False) + "\n" for c in chaves))
+            self._sincronizar()
+
+            mortas = self._linhas - len(self._indice)
+            if mortas >= MINIMO_COMPACTACAO and mortas > FRACAO_COMPACTACAO * self._linhas:
+                self.compactar()
+
+    def compactar(self) -> int:
+        """
+        Regrava só as linhas vivas em uma nova geração da matriz.
+
+        Returns:
+            Linhas mortas removidas
+        """
+        with self._lock:
+            self._sincronizar()
+            if self.dim is None:
+                return 0
+            mortas = self._linhas - len(self._indice)
+            antigo = self.arquivo_vetores
+            geracao = int(antigo.stem.split("-")[-1]) + 1
+            novo = self.dir / f"vectors-{geracao}.npy"
+
+            chaves = sorted(self._indice, key=self._indice.get)
+            origem = self._vetores()
+            with open(novo, "wb") as f:
+                f.write(_cabecalho_npy(len(chaves), self.dim))
+                for i in range(0, len(chaves), 4096):
+                    bloco = chaves[i:i + 4096]
+                    f.write(np.ascontiguousarray(origem[[self._indice[c] for c in bloco]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            origem = None
+
+            self.arquivo_vetores = novo
+            self._gravar_manifesto(self.arquivo_chaves, chaves)
+            self._recarregar()
+            for arquivo in self.dir.glob("vectors-*.npy"):
+                if arquivo != novo:
+                    arquivo.unlink(missing_ok=True)
+
+            logger.info(f"Embeddings compactados: {len(chaves)} vetores, {mortas} linhas mortas removidas")
+            return mortas
+
+    def migrar_json(self, caminho_json) -> int:
+        """
+        Importa um embeddings_cache.json ({chave: [floats]}) e o renomeia para
+        .migrado, para a migração não se repetir.
+
+        Returns:
+            Vetores importados
+        """
+        caminho_json = Path(caminho_json)
+        if not caminho_json.exists():
+            return 0
+        with open(caminho_json, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        with self._lock:
+            self._sincronizar()
+            novos = {chave: vetor for chave, vetor in dados.items() if chave not in self._indice}
+            self.put_many(novos)
+        os.replace(caminho_json, caminho_json.with_name(caminho_json.name + ".migrado"))
+        logger.info(f"Embeddings migrados de {caminho_json.name}: {len(novos)} vetores")
+        return len(novos)
+
+
+# === STORE COMPARTILHADO ===
+
+_store: Optional[EmbeddingStore] = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """Store padrão (data/embeddings), com migração única do JSON legado na primeira abertura"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmbeddingStore()
+            _store.migrar_json(_store.dir.parent / "embeddings_cache.json")
+        return _store
@@ -0,0 +1,301 @@
+"""
+Métricas operacionais no formato de exposição do Prometheus (texto 0.0.4)
+Contadores e histogramas em memória, por processo. A API serve os seus em
+GET /metrics; o scheduler (coletas agendadas, rescore, enriquecimento) serve os
+dele em uma porta própria (servir_metricas, SCHEDULER_METRICS_PORT): o
+Prometheus raspa os dois alvos. Implementação própria e sem dependências: cobre
+só o necessário (labels, buckets cumulativos, _sum/_count) para o scrape.
+
+Uso:
+    from modules.utils.metrics import PNCP_REQUEST_SECONDS
+    PNCP_REQUEST_SECONDS.observe(0.42, endpoint="publicacao")
+    with PIPELINE_STAGE_SECONDS.time(etapa="coleta"):
+        ...
+"""
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets padrão (segundos), iguais aos do prometheus_client
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _escape(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_labels(nomes: Tuple[str, ...], valores: Tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{n}="{_escape(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class _Metric:
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _chave(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.nome}: labels esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _cabecalho(self) -> List[str]:
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico com labels"""
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        super().__init__(nome, descricao, labels)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, valor: float = 1.0, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._valores.get(self._chave(labels), 0.0)
+
+    def render(self) -> List[str]:
+        linhas = self._cabecalho()
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            linhas.append(f"{self.nome}{_formatar_labels(self.labelnames, chave)} {_formatar_numero(valor)}")
+        return linhas
+
+
+class Histogram(_Metric):
+    """Histograma com buckets cumulativos, _sum e _count"""
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(nome, descricao, labels)
+        self.buckets = tuple(sorted(buckets))
+        # chave -> [contagens por bucket (não cumulativas), soma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, valor: float, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa a duração (segundos) do bloco, mesmo se ele levantar exceção"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            serie = self._series.get(self._chave(labels))
+            return serie[2] if serie else 0
+
+    def render(self) -> List[str]:
+        linhas = self._cabecalho()
+        with self._lock:
+            itens = sorted((chave, (list(s[0]), s[1], s[2])) for chave, s in self._series.items())
+        for chave, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, qtd in zip(self.buckets, contagens):
+                acumulado += qtd
+                le = f'le="{_formatar_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_labels(self.labelnames, chave, le)} {acumulado}")
+            inf = 'le="+Inf"'
+            linhas.append(f"{self.nome}_bucket{_formatar_labels(self.labelnames, chave, inf)} {total}")
+            linhas.append(f"{self.nome}_sum{_formatar_labels(self.labelnames, chave)} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{_formatar_labels(self.labelnames, chave)} {total}")
+        return linhas
+
+
+class MetricsRegistry:
+    """Registro das métricas do processo (uma instância global)"""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica: _Metric) -> _Metric:
+        with self._lock:
+            existente = self._metricas.get(metrica.nome)
+            if existente is not None:
+                return existente
+            self._metricas[metrica.nome] = metrica
+            return metrica
+
+    def counter(self, nome: str, descricao: str, labels: Iterable[str] = ()) -> Counter:
+        return self._registrar(Counter(nome, descricao, labels))
+
+    def histogram(self, nome: str, descricao: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._registrar(Histogram(nome, descricao, labels, buckets))
+
+    def get(self, nome: str) -> Optional[_Metric]:
+        return self._metricas.get(nome)
+
+    def render(self) -> str:
+        with self._lock:
+            metricas = list(self._metricas.values())
+        linhas: List[str] = []
+        for metrica in metricas:
+            linhas.extend(metrica.render())
+        return "\n".join(linhas) + "\n"
+
+
+# Instância global
+registry = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE_LATEST)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass  # um scrape a cada 15s não precisa ir para o log
+
+
+def servir_metricas(porta: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics deste processo em uma thread daemon (processos sem a
+    API, como o scheduler).
+    """
+    servidor = ThreadingHTTPServer((host, porta), _MetricsHandler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="metrics-http", daemon=True).start()
+    return servidor
+
+
+# === MÉTRICAS DO SISTEMA ===
+
+# Coleta (PNCP)
+PNCP_REQUEST_SECONDS = registry.histogram(
+    "medcal_pncp_request_duration_seconds",
+    "Latência das requisições à API do PNCP",
+    ["endpoint"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 45.0),
+)
+PNCP_REQUESTS = registry.counter(
+    "medcal_pncp_requests_total",
+    "Requisições à API do PNCP por endpoint e status HTTP",
+    ["endpoint", "status"],
+)
+PNCP_PAGINAS_POR_COMBO = registry.histogram(
+    "medcal_pncp_paginas_por_combo",
+    "Páginas lidas por combinação modalidade/UF",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+# Coleta (scrapers de fontes externas, runtime comum)
+SCRAPER_REQUEST_SECONDS = registry.histogram(
+    "medcal_scraper_request_duration_seconds",
+    "Latência das requisições dos scrapers por fonte (inclui o corpo da resposta)",
+    ["fonte"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 90.0),
+)
+SCRAPER_REQUESTS = registry.counter(
+    "medcal_scraper_requests_total",
+    "Requisições dos scrapers por fonte e status HTTP",
+    ["fonte", "status"],
+)
+SCRAPER_BYTES = registry.counter(
+    "medcal_scraper_bytes_total",
+    "Bytes baixados pelos scrapers por fonte",
+    ["fonte"],
+)
+SCRAPER_ITEMS = registry.counter(
+    "medcal_scraper_items_total",
+    "Itens por fonte e resultado (coletado, filtrado, duplicado, erro)",
+    ["fonte", "resultado"],
+)
+SCRAPER_RUNS = registry.counter(
+    "medcal_scraper_runs_total",
+    "Execuções de fontes por status (ok, erro, cancelada, tempo, bytes)",
+    ["fonte", "status"],
+)
+
+# Caches (resultados PNCP, itens, respostas da API)
+CACHE_REQUESTS = registry.counter(
+    "medcal_cache_requests_total",
+    "Consultas a caches por cache e resultado (hit/miss)",
+    ["cache", "resultado"],
+)
+
+# Pipeline de busca
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "medcal_pipeline_stage_duration_seconds",
+    "Duração das etapas da busca (coleta, filtro, novos, itens, persistencia)",
+    ["etapa"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+
+# Banco de dados
+DB_WRITE_BATCH_ROWS = registry.histogram(
+    "medcal_db_write_batch_rows",
+    "Linhas escritas por flush da sessão (inserções + alterações + remoções)",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+# LLM (OpenRouter)
+LLM_REQUESTS = registry.counter(
+    "medcal_llm_requests_total",
+    "Chamadas a LLM por modelo e resultado (ok, rate_limit, erro_http, excecao)",
+    ["modelo", "resultado"],
+)
+LLM_REQUEST_SECONDS = registry.histogram(
+    "medcal_llm_request_duration_seconds",
+    "Latência das chamadas a LLM por modelo",
+    ["modelo"],
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+
+# Alertas
+ALERT_DISPATCH = registry.counter(
+    "medcal_alert_dispatch_total",
+    "Alertas por canal e resultado (enviado, falha, duplicado)",
+    ["canal", "resultado"],
+)
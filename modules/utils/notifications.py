@@ -1,6 +1,8 @@
 import requests
 import urllib.parse
 
+from modules.utils.metrics import ALERT_DISPATCH
+
 class WhatsAppNotifier:
     def __init__(self, phone_number, api_key):
         """
@@ -14,6 +16,11 @@ class WhatsAppNotifier:
         self.ultimo_erro = None  # Armazena a última mensagem de erro
 
     def enviar_mensagem(self, mensagem):
+        enviado = self._enviar_mensagem(mensagem)
+        ALERT_DISPATCH.inc(canal="whatsapp", resultado="enviado" if enviado else "falha")
+        return enviado
+
+    def _enviar_mensagem(self, mensagem):
         self.ultimo_erro = None  # Limpa erro anterior
 
         if not self.phone_number or not self.api_key:
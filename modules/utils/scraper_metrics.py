@@ -5,6 +5,7 @@ Registra estatísticas de execução para monitoramento e otimização
 
 import json
 import os
+import threading
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from typing import Optional, List, Dict
@@ -34,6 +35,11 @@ class ScraperRunMetrics:
     total_filtrados: int = 0
     total_erros: int = 0
     total_retries: int = 0
+
+    # Transporte (runtime de scrapers)
+    total_requisicoes: int = 0
+    total_bytes: int = 0
+    latencia_media_ms: Optional[float] = None
     
     # Detalhes de erro
     erros: List[str] = None
@@ -48,11 +54,26 @@ class ScraperRunMetrics:
 
 
 class ScraperMetricsCollector:
-    """Coletor de métricas para scrapers"""
+    """
+    Coletor de métricas para scrapers (thread-safe).
+    Várias fontes rodam ao mesmo tempo na coleta: cada execução é identificada
+    pelo run_id devolvido por start_run. Sem run_id, os métodos usam a última
+    execução iniciada (uso sequencial).
+    """
     
     def __init__(self):
-        self._current_run: Optional[ScraperRunMetrics] = None
+        self._runs: Dict[str, ScraperRunMetrics] = {}
+        self._current_run_id: Optional[str] = None
+        self._tempo_requisicoes: Dict[str, float] = {}
+        self._lock = threading.RLock()
         self._ensure_data_dir()
+
+    @property
+    def _current_run(self) -> Optional[ScraperRunMetrics]:
+        return self._runs.get(self._current_run_id) if self._current_run_id else None
+
+    def _run(self, run_id: Optional[str]) -> Optional[ScraperRunMetrics]:
+        return self._runs.get(run_id) if run_id else self._current_run
     
     def _ensure_data_dir(self):
         """Garante que o diretório data existe"""
@@ -60,85 +81,118 @@ class ScraperMetricsCollector:
     
     def start_run(self, fonte: str) -> str:
         """Inicia uma nova execução e retorna o run_id"""
-        run_id = f"{fonte}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        self._current_run = ScraperRunMetrics(
-            run_id=run_id,
-            fonte=fonte,
-            inicio=datetime.now().isoformat()
-        )
+        with self._lock:
+            run_id = f"{fonte}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            if run_id in self._runs:
+                run_id = f"{run_id}_{len(self._runs)}"
+            self._runs[run_id] = ScraperRunMetrics(
+                run_id=run_id,
+                fonte=fonte,
+                inicio=datetime.now().isoformat()
+            )
+            self._current_run_id = run_id
         logger.info(f"Iniciando run de scraper: {run_id}")
         return run_id
     
-    def record_collected(self, count: int = 1):
+    def record_collected(self, count: int = 1, run_id: Optional[str] = None):
         """Registra itens coletados"""
-        if self._current_run:
-            self._current_run.total_coletado += count
+        with self._lock:
+            run = self._run(run_id)
+            if run:
+                run.total_coletado += count
     
-    def record_duplicate(self, count: int = 1):
+    def record_duplicate(self, count: int = 1, run_id: Optional[str] = None):
         """Registra itens duplicados (já existentes)"""
-        if self._current_run:
-            self._current_run.total_duplicados += count
+        with self._lock:
+            run = self._run(run_id)
+            if run:
+                run.total_duplicados += count
     
-    def record_filtered(self, count: int = 1):
+    def record_filtered(self, count: int = 1, run_id: Optional[str] = None):
         """Registra itens filtrados (removidos por regra)"""
-        if self._current_run:
-            self._current_run.total_filtrados += count
+        with self._lock:
+            run = self._run(run_id)
+            if run:
+                run.total_filtrados += count
     
-    def record_error(self, error_msg: str):
+    def record_error(self, error_msg: str, run_id: Optional[str] = None):
         """Registra um erro"""
-        if self._current_run:
-            self._current_run.total_erros += 1
-            self._current_run.erros.append(error_msg[:200])  # Limita tamanho
-            logger.warning(f"Erro registrado: {error_msg[:100]}")
+        with self._lock:
+            run = self._run(run_id)
+            if run:
+                run.total_erros += 1
+                run.erros.append(error_msg[:200])  # Limita tamanho
+                logger.warning(f"Erro registrado: {error_msg[:100]}")
     
-    def record_retry(self):
+    def record_retry(self, run_id: Optional[str] = None):
         """Registra uma tentativa de retry"""
-        if self._current_run:
-            self._current_run.total_retries += 1
+        with self._lock:
+            run = self._run(run_id)
+            if run:
+                run.total_retries += 1
+
+    def record_request(self, bytes_baixados: int, segundos: float, run_id: Optional[str] = None):
+        """Registra uma requisição HTTP (tamanho do corpo e latência)"""
+        with self._lock:
+            run = self._run(run_id)
+            if run:
+                run.total_requisicoes += 1
+                run.total_bytes += bytes_baixados
+                self._tempo_requisicoes[run.run_id] = self._tempo_requisicoes.get(run.run_id, 0.0) + segundos
     
-    def end_run(self, sucesso: bool = True, mensagem: str = None) -> Optional[ScraperRunMetrics]:
+    def end_run(self, sucesso: bool = True, mensagem: str = None,
+                run_id: Optional[str] = None) -> Optional[ScraperRunMetrics]:
         """Finaliza a execução e salva métricas"""
-        if not self._current_run:
-            return None
+        with self._lock:
+            run = self._run(run_id)
+            if not run:
+                return None
+            self._runs.pop(run.run_id, None)
+            if self._current_run_id == run.run_id:
+                self._current_run_id = None
+            tempo_requisicoes = self._tempo_requisicoes.pop(run.run_id, 0.0)
         
         fim = datetime.now()
-        inicio = datetime.fromisoformat(self._current_run.inicio)
+        inicio = datetime.fromisoformat(run.inicio)
         
-        self._current_run.fim = fim.isoformat()
-        self._current_run.duracao_segundos = (fim - inicio).total_seconds()
-        self._current_run.sucesso = sucesso
-        self._current_run.mensagem = mensagem
+        run.fim = fim.isoformat()
+        run.duracao_segundos = (fim - inicio).total_seconds()
+        run.sucesso = sucesso
+        run.mensagem = mensagem
+        if run.total_requisicoes:
+            run.latencia_media_ms = round(tempo_requisicoes / run.total_requisicoes * 1000, 1)
         
         # Salva no arquivo
-        self._save_metrics(self._current_run)
+        self._save_metrics(run)
         
         logger.info(
-            f"Run {self._current_run.run_id} finalizado: "
-            f"coletados={self._current_run.total_coletado}, "
-            f"dupes={self._current_run.total_duplicados}, "
-            f"erros={self._current_run.total_erros}, "
-            f"duracao={self._current_run.duracao_segundos:.1f}s"
+            f"Run {run.run_id} finalizado: "
+            f"coletados={run.total_coletado}, "
+            f"dupes={run.total_duplicados}, "
+            f"erros={run.total_erros}, "
+            f"duracao={run.duracao_segundos:.1f}s"
         )
         
-        result = self._current_run
-        self._current_run = None
-        return result
+        return run
     
     def _save_metrics(self, metrics: ScraperRunMetrics):
         """Salva métricas no arquivo JSON"""
         try:
-            # Carrega histórico existente
-            history = self._load_history()
-            
-            # Adiciona nova métrica
-            history.append(asdict(metrics))
-            
-            # Mantém apenas últimas 100 execuções
-            history = history[-100:]
-            
-            # Salva
-            with open(METRICS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
+            with self._lock:
+                # Carrega histórico existente
+                history = self._load_history()
+                
+                # Adiciona nova métrica
+                history.append(asdict(metrics))
+                
+                # Mantém apenas últimas 100 execuções
+                history = history[-100:]
+                
+                # Salva (atômico: leitores nunca veem o arquivo pela metade)
+                tmp = METRICS_FILE.with_suffix('.json.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(history, f, indent=2, ensure_ascii=False)
+                os.replace(tmp, METRICS_FILE)
         
         except Exception as e:
             logger.error(f"Erro ao salvar métricas: {e}")
@@ -0,0 +1,109 @@
+"""
+Progresso em memória da busca em andamento
+Contadores por etapa (páginas lidas, aprovadas, itens buscados, persistidas,
+com match, alertas enviados) atualizados pelo coletor e pelo pipeline, lidos
+pelo stream de progresso da API sem nenhuma consulta ao banco.
+"""
+import threading
+from datetime import datetime
+from typing import Optional
+
+from modules.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CONTADORES = ("paginas", "aprovados", "itens_buscados", "persistidos", "matches", "alertas")
+
+
+class SearchProgress:
+    """Snapshot thread-safe do progresso da busca atual (singleton)"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._state_lock = threading.Lock()
+        self._versao = 0
+        self._reset(run_id=None, status="idle")
+
+    def _reset(self, run_id: Optional[int], status: str):
+        self._run_id = run_id
+        self._status = status
+        self._etapa = None
+        self._mensagem = None
+        self._inicio = None
+        self._fim = None
+        self._contadores = dict.fromkeys(CONTADORES, 0)
+
+    def _tocar(self):
+        self._versao += 1
+
+    def start(self, run_id: Optional[int] = None):
+        """Zera os contadores para uma nova execução"""
+        with self._state_lock:
+            self._reset(run_id=run_id, status="running")
+            self._inicio = datetime.now()
+            self._etapa = "coleta"
+            self._tocar()
+
+    def set_stage(self, etapa: str, mensagem: Optional[str] = None):
+        with self._state_lock:
+            self._etapa = etapa
+            if mensagem is not None:
+                self._mensagem = mensagem
+            self._tocar()
+
+    def incr(self, contador: str, n: int = 1):
+        """Soma `n` ao contador (ignorado fora de uma execução)"""
+        if n <= 0 or self._status != "running":
+            return
+        with self._state_lock:
+            self._contadores[contador] += n
+            self._tocar()
+
+    def finish(self, status: str = "completed", mensagem: Optional[str] = None):
+        with self._state_lock:
+            self._status = status
+            self._etapa = "fim"
+            self._fim = datetime.now()
+            if mensagem is not None:
+                self._mensagem = mensagem
+            self._tocar()
+
+    @property
+    def versao(self) -> int:
+        """Muda a cada atualização (leitura sem lock, só para detectar mudança)"""
+        return self._versao
+
+    def is_running(self) -> bool:
+        return self._status == "running"
+
+    def snapshot(self) -> dict:
+        with self._state_lock:
+            fim = self._fim or (datetime.now() if self._inicio else None)
+            return {
+                "run_id": self._run_id,
+                "status": self._status,
+                "etapa": self._etapa,
+                "message": self._mensagem,
+                "started_at": self._inicio.isoformat() if self._inicio else None,
+                "finished_at": self._fim.isoformat() if self._fim else None,
+                "elapsed_seconds": round((fim - self._inicio).total_seconds(), 1) if self._inicio else None,
+                "versao": self._versao,
+                **self._contadores,
+            }
+
+
+# Instância global
+search_progress = SearchProgress()
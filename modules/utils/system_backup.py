@@ -21,12 +21,24 @@ class SystemBackup:
         "data/medcal.db",
         "data/financeiro.db", 
         "data/financeiro_historico.db",
+        "data/medcal_archive.db",
         "data/catalogo_produtos.json",
         "data/whatsapp_notifications_sent.json",
         "data/distance_cache.json",
-        "data/embeddings_cache.json",
     ]
     
+    # Diretórios incluídos por inteiro (exceto temporários)
+    DIRS_TO_BACKUP = [
+        "data/embeddings",  # EmbeddingStore: keys.jsonl + vectors-<N>.npy
+    ]
+    
+    # Cache JSON legado de embeddings: migrado para data/embeddings antes de exportar
+    # (e ao restaurar um backup antigo que ainda o traga)
+    LEGACY_EMBEDDINGS = "data/embeddings_cache.json"
+    
+    # Binários de float que o deflate quase não reduz: vão sem compressão
+    STORED_SUFFIXES = (".npy",)
+    
     def __init__(self, base_dir: str = None):
         """
         Inicializa o gerenciador de backup.
@@ -59,6 +71,7 @@ class SystemBackup:
         try:
             # Força checkpoint dos bancos SQLite (WAL mode)
             self._checkpoint_databases()
+            self._migrar_embeddings_legados()
             
             with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                 files_included = []
@@ -78,6 +91,18 @@ class SystemBackup:
                                 if extra.exists():
                                     zipf.write(extra, file_rel + suffix)
                 
+                for dir_rel in self.DIRS_TO_BACKUP:
+                    dir_path = self.base_dir / dir_rel
+                    if not dir_path.is_dir():
+                        continue
+                    for file_path in sorted(dir_path.iterdir()):
+                        if not file_path.is_file() or file_path.suffix == ".tmp":
+                            continue
+                        file_rel = f"{dir_rel}/{file_path.name}"
+                        compress = zipfile.ZIP_STORED if file_path.suffix in self.STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                        zipf.write(file_path, file_rel, compress_type=compress)
+                        files_included.append(file_rel)
+                
                 # Adiciona metadados
                 metadata = {
                     "timestamp": timestamp,
@@ -151,6 +176,9 @@ class SystemBackup:
                     
                     files_restored.append(file_name)
             
+            if self.LEGACY_EMBEDDINGS in files_restored:
+                self._migrar_embeddings_legados()
+            
             return {
                 "sucesso": True,
                 "arquivos_restaurados": files_restored,
@@ -198,6 +226,14 @@ class SystemBackup:
             return backup_path.read_bytes()
         return None
     
+    def _migrar_embeddings_legados(self):
+        """Converte data/embeddings_cache.json no EmbeddingStore (uma vez: o JSON vira .migrado)"""
+        legado = self.base_dir / self.LEGACY_EMBEDDINGS
+        if not legado.exists():
+            return
+        from modules.utils.embedding_store import EmbeddingStore
+        EmbeddingStore(str(self.base_dir / "data" / "embeddings")).migrar_json(legado)
+    
     def _checkpoint_databases(self):
         """Força checkpoint dos bancos SQLite (WAL mode) para garantir dados atualizados."""
         import sqlite3
@@ -102,3 +102,14 @@ with st.expander("Limpeza do banco de dados"):
         session.close()
         time.sleep(1)
         st.rerun()
+
+    st.divider()
+    st.caption("Arquivar move licitações com prazo encerrado para o banco de arquivo (data/medcal_archive.db, ou o próprio banco Turso), mantendo o histórico consultável.")
+    dias_arquivo = st.number_input("Arquivar com prazo encerrado há mais de (dias)", min_value=0, value=30, step=5)
+    if st.button("Arquivar Licitações Expiradas"):
+        from modules.database.archive import arquivar_licitacoes_expiradas
+        with st.spinner("Arquivando..."):
+            resultado = arquivar_licitacoes_expiradas(dias_apos_prazo=int(dias_arquivo))
+        st.success(f"✅ {resultado['arquivadas']} licitações ({resultado['itens']} itens) movidas para o arquivo.")
+        time.sleep(1)
+        st.rerun()
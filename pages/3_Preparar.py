@@ -3,7 +3,7 @@ import time
 from datetime import datetime
 from components.config import init_page_config
 from components.sidebar import render_sidebar
-from modules.database.database import get_session, Licitacao
+from modules.database.database import get_read_session, Licitacao
 from modules.core.deep_analyzer import deep_analyzer
 
 # Configuração da página e CSS
@@ -15,7 +15,7 @@ render_sidebar()
 st.header("🎯 Preparar para Competir")
 st.info("Selecione licitações **fixadas** (⭐) para análise profunda. A IA lerá todos os anexos e preparará um relatório completo.")
 
-session = get_session()
+session = get_read_session()
 licitacoes_salvas = session.query(Licitacao).filter_by(status='Salva').order_by(Licitacao.data_sessao.asc()).all()
 
 if not licitacoes_salvas:
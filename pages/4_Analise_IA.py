@@ -1,7 +1,7 @@
 import streamlit as st
 from components.config import init_page_config
 from components.sidebar import render_sidebar
-from modules.database.database import get_session, Licitacao
+from modules.database.database import get_read_session, Licitacao
 from modules.ai.smart_analyzer import SmartAnalyzer
 from modules.ai.eligibility_checker import EligibilityChecker
 from modules.scrapers.pncp_client import PNCPClient
@@ -16,7 +16,7 @@ render_sidebar()
 st.header("🧠 Análise Inteligente de Licitações")
 st.info("Use a Inteligência Artificial para analisar a viabilidade, riscos e elegibilidade dos editais.")
 
-session = get_session()
+session = get_read_session()
 # Lista licitações para análise (apenas as que não foram ignoradas/perdidas)
 licitacoes = session.query(Licitacao).filter(Licitacao.status.in_(['Nova', 'Em Análise', 'Participar', 'Salva'])).order_by(Licitacao.data_publicacao.desc()).all()
 
@@ -3,7 +3,7 @@ import pandas as pd
 from components.config import init_page_config
 from components.sidebar import render_sidebar
 from components.utils import salvar_produtos
-from modules.database.database import get_session, Produto
+from modules.database.database import get_read_session, Produto
 
 # Configuração da página e CSS
 init_page_config(page_title="Medcal - Catálogo")
@@ -14,7 +14,7 @@ render_sidebar()
 st.header("📦 Catálogo de Produtos")
 st.info("Cadastro dos produtos. O sistema usará as 'Palavras-Chave' para encontrar as Licitações.")
 
-session = get_session()
+session = get_read_session()
 produtos = session.query(Produto).all()
 session.close()
 
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Backfill histórico dos diários oficiais
+Processa as edições passadas de um intervalo de datas e grava os avisos no
+banco (sem alertas). O progresso fica em data/cache/diarios/backfill.json:
+rodar de novo o mesmo comando continua de onde parou.
+
+Cada fonte precisa do padrão da página de uma edição passada, conferido no
+portal: DIARIO_EDICAO_URL_<FONTE> (ou DIARIO_EDICAO_URL para todas), com
+{base} = URL da fonte e {data} = data da edição. Fonte sem padrão é recusada.
+
+Uso:
+    DIARIO_EDICAO_URL_FEMURN="{base}?data={data:%d/%m/%Y}" \
+        python scripts/backfill_diarios.py --inicio 2025-01-01 --fim 2025-01-31 --fontes femurn
+    python scripts/backfill_diarios.py --inicio 2025-01-01 --fontes femurn,famup --max-mb 200 --conexoes 2
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from modules.core.diario_backfill import (
+    BACKFILL_CONEXOES,
+    BACKFILL_MAX_MB,
+    executar_backfill,
+    fontes_diario,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill histórico dos diários oficiais")
+    parser.add_argument("--inicio", required=True, type=date.fromisoformat, help="Primeira edição (AAAA-MM-DD)")
+    parser.add_argument("--fim", type=date.fromisoformat, default=date.today(), help="Última edição (padrão: hoje)")
+    parser.add_argument("--fontes", default=",".join(fontes_diario()),
+                        help=f"Fontes separadas por vírgula (padrão: {','.join(fontes_diario())})")
+    parser.add_argument("--max-mb", type=int, default=BACKFILL_MAX_MB, help="Orçamento de download da execução (MB)")
+    parser.add_argument("--conexoes", type=int, default=BACKFILL_CONEXOES, help="Edições processadas ao mesmo tempo")
+    parser.add_argument("--sem-ia", action="store_true", help="Não enriquece os avisos com IA")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignora o progresso salvo e reprocessa o intervalo")
+    args = parser.parse_args()
+
+    fontes = [f.strip().lower() for f in args.fontes.split(",") if f.strip()]
+    try:
+        resumo = executar_backfill(
+            fontes, args.inicio, args.fim,
+            max_bytes=args.max_mb * 1024 * 1024,
+            conexoes=args.conexoes,
+            enriquecer=not args.sem_ia,
+            reiniciar=args.reiniciar,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print("\nInterrompido: o progresso salvo é retomado na próxima execução")
+        sys.exit(130)
+
+    print("=" * 60)
+    print(f"Backfill {args.inicio} a {args.fim} ({', '.join(fontes)})")
+    print(f"  Edições processadas: {resumo['ok']}  (sem edição: {resumo['sem_edicao']}, "
+          f"repetidas: {resumo['repetida']}, já concluídas: {resumo['ja_concluida']})")
+    if resumo['atual']:
+        print(f"  Edição atual:        {resumo['atual']} datas devolveram o PDF da página inicial "
+              f"(não gravadas; ver DIARIO_EDICAO_URL)")
+    print(f"  Avisos gravados:     {resumo['avisos']}")
+    print(f"  Baixado:             {resumo['bytes'] / (1024 * 1024):.1f} MB")
+    if resumo['falha'] or resumo['adiada']:
+        print(f"  Pendentes:           {resumo['falha']} com falha, {resumo['adiada']} adiadas (orçamento)")
+        print("  Rode o mesmo comando de novo para continuar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Teste de carga local da API (vazão x clientes concorrentes)
+Sobe a API (uvicorn, N processos worker) em um banco SQLite temporário e mede,
+com 1, 2, 4, 8... clientes simultâneos:
+  - requisições/s em GET /licitacoes/{id}        (endpoint síncrono, thread pool)
+  - requisições/s em GET /_bench/bloqueante/{id} (mesma consulta dentro de
+    `async def`, como era antes: bloqueia o event loop)
+  - p95 de GET /health durante a carga (responsividade do event loop)
+
+Não toca em data/medcal.db.
+
+Uso:
+    python scripts/benchmark_api_concurrency.py
+    python scripts/benchmark_api_concurrency.py --workers 4 --clientes 1,4,16 --duracao 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+# Banco local temporário: ignora o Turso do .env
+os.environ["TURSO_DATABASE_URL"] = ""
+# Mede a consulta em si, não o cache de respostas
+os.environ["API_RESPONSE_CACHE_SIZE"] = "0"
+
+import uvicorn
+
+import modules.database.database as database
+from modules.database.database import Base, ItemLicitacao, Licitacao
+
+
+def _popular(total: int, itens_por_lic: int):
+    session = database.get_session()
+    agora = datetime.now()
+    for i in range(total):
+        lic = Licitacao(
+            pncp_id=f"BENCH-{i}",
+            orgao=f"Prefeitura Municipal {i % 300}",
+            uf=random.choice(["RN", "PB", "PE", "AL"]),
+            modalidade="Pregão",
+            data_publicacao=agora - timedelta(minutes=i),
+            objeto=f"Aquisição de reagentes laboratoriais lote {i}",
+            link="https://pncp.gov.br",
+        )
+        lic.itens = [
+            ItemLicitacao(numero_item=n, descricao=f"Reagente item {n}", quantidade=10, unidade="UN")
+            for n in range(itens_por_lic)
+        ]
+        session.add(lic)
+        if i % 500 == 0:
+            session.commit()
+    session.commit()
+    session.close()
+
+
+def _servir(sock: socket.socket):
+    """Processo worker: mesma app de api/main.py + rota de comparação."""
+    from api.main import app
+    from api.routers.licitacoes import _obter_licitacao
+
+    @app.get("/_bench/bloqueante/{licitacao_id}")
+    async def bloqueante(licitacao_id: int):
+        # Comportamento anterior: consulta síncrona dentro de async def
+        return _obter_licitacao(licitacao_id)
+
+    config = uvicorn.Config(app, log_level="warning")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _aguardar(url: str, timeout: float = 30.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            with urllib.request.urlopen(url) as resp:
+                resp.read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"API não respondeu em {url}")
+
+
+def _medir(base: str, rota: str, total_ids: int, clientes: int, duracao: float) -> tuple:
+    parar = threading.Event()
+    contagens = [0] * clientes
+    latencias_health: list = []
+
+    def _cliente(idx: int):
+        while not parar.is_set():
+            licitacao_id = random.randint(1, total_ids)
+            with urllib.request.urlopen(f"{base}{rota}/{licitacao_id}") as resp:
+                resp.read()
+            contagens[idx] += 1
+
+    def _sonda():
+        while not parar.is_set():
+            t0 = time.perf_counter()
+            with urllib.request.urlopen(f"{base}/health") as resp:
+                resp.read()
+            latencias_health.append(time.perf_counter() - t0)
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=_cliente, args=(i,)) for i in range(clientes)]
+    threads.append(threading.Thread(target=_sonda))
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duracao)
+    parar.set()
+    for t in threads:
+        t.join()
+    vazao = sum(contagens) / (time.perf_counter() - inicio)
+
+    if len(latencias_health) >= 2:
+        p95 = statistics.quantiles(latencias_health, n=100)[94]
+    else:
+        p95 = latencias_health[0] if latencias_health else 0.0
+    return vazao, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão da API com clientes concorrentes")
+    parser.add_argument("--licitacoes", type=int, default=1000, help="Licitações no banco temporário")
+    parser.add_argument("--itens", type=int, default=20, help="Itens por licitação")
+    parser.add_argument("--workers", type=int, default=1, help="Processos uvicorn (API_WORKERS)")
+    parser.add_argument("--clientes", default="1,2,4,8,16", help="Níveis de concorrência")
+    parser.add_argument("--duracao", type=float, default=3.0, help="Segundos por medição")
+    args = parser.parse_args()
+
+    niveis = [int(c) for c in args.clientes.split(",") if c.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        database.get_database_url = lambda db_name="medcal": url
+        Base.metadata.create_all(database.get_engine())
+        _popular(args.licitacoes, args.itens)
+        # Conexões não devem atravessar o fork
+        database.get_engine().dispose()
+
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(512)
+        porta = sock.getsockname()[1]
+        base = f"http://127.0.0.1:{porta}"
+
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_servir, args=(sock,), daemon=True) for _ in range(args.workers)]
+        for w in workers:
+            w.start()
+
+        try:
+            _aguardar(f"{base}/health")
+
+            print("=" * 86)
+            print("TESTE DE CARGA: GET de licitação por id")
+            print(f"licitacoes={args.licitacoes} itens={args.itens} workers={args.workers} duracao={args.duracao}s")
+            print("=" * 86)
+            print(f"{'clientes':>9}{'pool (req/s)':>16}{'bloqueante (req/s)':>21}"
+                  f"{'/health p95 pool':>20}{'/health p95 bloq.':>20}")
+            for n in niveis:
+                pool, health_pool = _medir(base, "/licitacoes", args.licitacoes, n, args.duracao)
+                bloq, health_bloq = _medir(base, "/_bench/bloqueante", args.licitacoes, n, args.duracao)
+                print(f"{n:>9}{pool:>16.1f}{bloq:>21.1f}{health_pool:>17.1f} ms{health_bloq:>17.1f} ms")
+            print("=" * 86)
+        finally:
+            for w in workers:
+                w.terminate()
+            for w in workers:
+                w.join(timeout=5)
+            sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos filtros de avisos dos diários oficiais
+Roda o filtro de uma edição inteira (sem IA) de duas formas e confere que as
+decisões são as mesmas:
+  legado    listas reconstruídas/renormalizadas e regex recompilados a cada aviso
+  regras    RegrasDiario (modules/scrapers/diario_rules.py), compilado uma vez
+
+Edição:
+  --fonte femurn     baixa a edição do dia (cache de diários: baixa uma vez só)
+  --pdf arquivo.pdf  PDF local (ex.: uma edição de centenas de páginas já baixada)
+  --sintetico 300    edição sintética com N páginas (sem rede)
+
+Uso:
+    python scripts/benchmark_diario_filtros.py --fonte femurn
+    python scripts/benchmark_diario_filtros.py --pdf /tmp/diario.pdf --repeticoes 5
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from modules.scrapers.diario_rules import RegrasDiario, normalizar
+from modules.scrapers.pncp_client import PNCPClient
+from modules.scrapers.pdf_text import extrair_paginas
+
+
+def _normalize_text(txt: str) -> str:
+    if not txt:
+        return ""
+    return unicodedata.normalize('NFKD', txt).encode('ASCII', 'ignore').decode('ASCII').upper()
+
+
+def _filtrar_legado(text_normalized, termos_busca, termos_negativos):
+    """Reprodução do laço anterior de DiarioMunicipalScraper.buscar_oportunidades (só o filtro)"""
+    terms_to_search_norm = [_normalize_text(t) for t in termos_busca if t and t.strip()]
+    termos_licitacao_valida = ["AVISO DE LICITACAO", "PREGAO ELETRONICO", "PREGAO PRESENCIAL",
+                               "DISPENSA ELETRONICA", "SETOR DE LICITAÇOES"]
+
+    def tem_termo_positivo(txt_norm):
+        for termo in terms_to_search_norm:
+            if termo in txt_norm:
+                return True
+        contexto_saude = ["HOSPITAL", "SAUDE", "UBS", "UNIDADE BASICA", "SECRETARIA DE SAUDE",
+                          "FUNDO MUNICIPAL DE SAUDE", "ATENCAO PRIMARIA", "AMBULATORIO", "PRONTO SOCORRO"]
+        if "EQUIPAMENTO" in txt_norm:
+            for ctx in contexto_saude:
+                if ctx in txt_norm:
+                    return True
+        return False
+
+    def eh_publicacao_com_vencedor_ou_resultado(txt_norm):
+        if not txt_norm:
+            return False
+        marcadores_fortes = [
+            "AVISO DE RESULTADO", "AVISO DO RESULTADO", "RESULTADO DO PREGAO", "RESULTADO DO PREGÃO",
+            "RESULTADO DE JULGAMENTO", "HOMOLOGACAO", "HOMOLOGAÇÃO", "ADJUDICACAO", "ADJUDICAÇÃO",
+            "TERMO DE HOMOLOGACAO", "TERMO DE HOMOLOGAÇÃO", "TERMO DE ADJUDICACAO", "TERMO DE ADJUDICAÇÃO",
+            "EMPRESA VENCEDORA", "EMPRESAS VENCEDORAS", "EMPRESA(S) VENCEDORA(S)", "VENCEDOR", "VENCEDORES",
+            "ATA DE REGISTRO DE PRECO", "ATA DE REGISTRO DE PREÇO", "EXTRATO DE CONTRATO", "EXTRATO DO CONTRATO",
+        ]
+        if any(m in txt_norm for m in marcadores_fortes):
+            return True
+        padroes = [
+            r"\bVENCEDOR(?:A|ES)?\b\s*[:\-]",
+            r"\bEMPRESAS?\s+VENCEDORAS?\b\s*[:\-]",
+            r"\bVALOR\s+TOTAL\b",
+            r"\bCNPJ\b\s*[:\-]?\s*\d{2}\.?\d{3}\.?\d{3}/?\d{4}\-?\d{2}",
+        ]
+        return any(re.search(p, txt_norm, re.IGNORECASE) for p in padroes)
+
+    separadores = [
+        r'(CODIGO IDENTIFICADOR:\s*[\w\d]+)',
+        r'(Código Identificador:\s*[\w\d]+)',
+        r'(PREFEITURA MUNICIPAL (?:DE|DA|DO)\s+[A-Z]+)',
+    ]
+    chunks = [text_normalized]
+    for sep in separadores:
+        test_chunks = re.split(sep, text_normalized, flags=re.IGNORECASE)
+        if len(test_chunks) > 2:
+            chunks = test_chunks
+            break
+    if len(chunks) <= 2:
+        aviso_chunks = re.split(r'(AVISO DE LICITAC[AÃ]O)', text_normalized, flags=re.IGNORECASE)
+        if len(aviso_chunks) > 2:
+            chunks = aviso_chunks
+
+    aprovados, bloqueados = [], 0
+    for i in range(0, len(chunks) - 1, 2):
+        full_notice_clean = re.sub(r'\n+', '\n', chunks[i] + "\n" + chunks[i + 1]).strip()
+        full_notice_norm = _normalize_text(full_notice_clean)
+        if not any(t in full_notice_norm for t in termos_licitacao_valida):
+            continue
+        if eh_publicacao_com_vencedor_ou_resultado(full_notice_norm):
+            continue
+        if not tem_termo_positivo(full_notice_norm):
+            continue
+        termos_negativos_diario = list(termos_negativos or PNCPClient.TERMOS_NEGATIVOS_PADRAO)
+        termos_negativos_diario.extend([
+            "CONSULTORIA", "ASSESSORIA", "VIAGEM", "HOSPEDAGEM", "PASSAGEM", "SHOW", "FESTA", "EVENTO",
+            "PALCO", "SONORIZACAO", "PAPELARIA", "RESMA DE PAPEL", "CANETA", "LAPIS", "BLOCO DE ANOTACOES",
+            "CADERNO", "GRAMPEADOR", "PERFURADOR", "CLIPE", "PASTA ARQUIVO",
+        ])
+        termos_negativos_diario_norm = [_normalize_text(t) for t in termos_negativos_diario]
+        if any(termo in full_notice_norm for termo in termos_negativos_diario_norm):
+            bloqueados += 1
+            continue
+        code_match = re.search(r'CODIGO IDENTIFICADOR:\s*([\w\d]+)', full_notice_norm)
+        code_id = code_match.group(1) if code_match else f"UNK-{i}"
+        orgao_name = None
+        for pat in [r'(PREFEITURA MUNICIPAL (?:DE|DA|DO) [^\n]+)', r'(CAMARA MUNICIPAL (?:DE|DA|DO) [^\n]+)',
+                    r'(FUNDO MUNICIPAL (?:DE|DA|DO) [^\n]+)', r'(CONSORCIO INTERMUNICIPAL [^\n]+)',
+                    r'(SERVICO AUTONOMO [^\n]+)']:
+            match = re.search(pat, full_notice_clean, re.IGNORECASE)
+            if match:
+                orgao_name = match.group(1).strip()
+                break
+        if "INEXIGIBILIDADE" in full_notice_norm:
+            continue
+        termos_documento_invalido = [
+            "NOTIFICACAO", "ATRASO NA ENTREGA", "ATRASO DE ENTREGA", "PENALIDADE", "PENALIDADES", "MULTA",
+            "ADVERTENCIA", "RESCISAO", "RESCISAO DE CONTRATO", "EXTRATO DE CONTRATO", "EXTRATO DO CONTRATO",
+            "EXTRATO DE TERMO ADITIVO", "TERMO ADITIVO", "RATIFICACAO", "HOMOLOGACAO", "ADJUDICACAO",
+            "RESULTADO DE JULGAMENTO", "ATA DE REGISTRO DE PRECO", "PUBLICACAO DE ATA", "ERRATA", "RETIFICACAO",
+            "CONVOCACAO PARA ASSINATURA", "ORDEM DE FORNECIMENTO", "ORDEM DE SERVICO", "DESPACHO", "PARECER",
+            "PORTARIA",
+        ]
+        if any(termo in full_notice_norm for termo in termos_documento_invalido):
+            continue
+        skip_patterns = [r'CONTRATAD[OA]\s*:\s*[A-Z]', r'CONTRATAD[OA]\s*\([Aa]\)\s*:\s*[A-Z]',
+                         r'VENCEDOR\s*:\s*[A-Z]', r'EMPRESA\s+VENCEDORA\s*:\s*[A-Z]']
+        if any(re.search(pat, full_notice_clean, re.IGNORECASE) for pat in skip_patterns):
+            continue
+        aprovados.append((code_id, orgao_name))
+    return aprovados, bloqueados, len(chunks) // 2
+
+
+def _filtrar_regras(text_normalized, termos_busca, termos_negativos):
+    """Mesmo filtro com RegrasDiario (compilação incluída no tempo)"""
+    regras = RegrasDiario(termos_busca, termos_negativos)
+    chunks, _ = regras.dividir_avisos(text_normalized)
+    aprovados, bloqueados = [], 0
+    for i in range(0, len(chunks) - 1, 2):
+        full_notice_clean = regras.limpar_aviso(chunks[i] + "\n" + chunks[i + 1])
+        full_notice_norm = normalizar(full_notice_clean)
+        if not regras.eh_licitacao_aberta(full_notice_norm):
+            continue
+        if regras.eh_publicacao_com_vencedor_ou_resultado(full_notice_norm):
+            continue
+        if not regras.tem_termo_positivo(full_notice_norm):
+            continue
+        if regras.termo_negativo_diario(full_notice_norm):
+            bloqueados += 1
+            continue
+        code_id = regras.codigo_identificador(full_notice_norm) or f"UNK-{i}"
+        orgao_name = regras.orgao(full_notice_clean)
+        if "INEXIGIBILIDADE" in full_notice_norm:
+            continue
+        if regras.eh_documento_invalido(full_notice_norm):
+            continue
+        if regras.tem_contratado_definido(full_notice_clean):
+            continue
+        aprovados.append((code_id, orgao_name))
+    return aprovados, bloqueados, len(chunks) // 2
+
+
+def _edicao_sintetica(paginas: int, seed: int = 42) -> str:
+    """Avisos no formato do diariomunicipal.com.br: ~4 por página, com código identificador"""
+    rng = random.Random(seed)
+    positivos = PNCPClient.TERMOS_PRIORITARIOS
+    negativos = PNCPClient.TERMOS_NEGATIVOS_PADRAO
+    cidades = [f"CIDADE{i}" for i in range(160)]
+    gerais = ["MATERIAL DE EXPEDIENTE", "MERENDA ESCOLAR", "PAVIMENTACAO", "COMBUSTIVEL", "LOCACAO DE VEICULOS"]
+    atos = ["AVISO DE LICITACAO\nPREGAO ELETRONICO N {n}/2025", "DISPENSA ELETRONICA N {n}/2025",
+            "AVISO DE RESULTADO\nPREGAO ELETRONICO N {n}/2025", "EXTRATO DE CONTRATO N {n}/2025",
+            "PORTARIA N {n}/2025"]
+    blocos = []
+    for n in range(paginas * 4):
+        sorteio = rng.random()
+        if sorteio < 0.25:
+            objeto = f"AQUISICAO DE {rng.choice(positivos)} PARA A SECRETARIA MUNICIPAL DE SAUDE"
+        elif sorteio < 0.35:
+            objeto = f"AQUISICAO DE {rng.choice(positivos)} E {rng.choice(negativos)}"
+        else:
+            objeto = f"CONTRATACAO DE EMPRESA PARA {rng.choice(gerais)}"
+        blocos.append(
+            f"ESTADO DO RIO GRANDE DO NORTE\nPREFEITURA MUNICIPAL DE {rng.choice(cidades)}\n"
+            f"{rng.choice(atos).format(n=n)}\n\nOBJETO: {objeto}.\n"
+            f"ABERTURA: {rng.randint(1, 28):02d}/11/2025 AS 09:00. EDITAL DISPONIVEL NO PORTAL.\n"
+            + "TEXTO DO AVISO COM CONDICOES DE PARTICIPACAO E HABILITACAO.\n" * rng.randint(5, 25)
+            + f"Código Identificador:{rng.randrange(16**8):08X}\n"
+        )
+    return "".join(blocos)
+
+
+def _medir(funcao, texto, termos_busca, termos_negativos, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao(texto, termos_busca, termos_negativos)
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos filtros de avisos de diários oficiais")
+    origem = parser.add_mutually_exclusive_group()
+    origem.add_argument("--fonte", help="Diário a baixar (femurn, famup, amupe, ama, maceio...)")
+    origem.add_argument("--pdf", help="PDF local de uma edição")
+    origem.add_argument("--sintetico", type=int, metavar="PAGINAS", help="Edição sintética com N páginas")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções por variante (vale a melhor)")
+    args = parser.parse_args()
+
+    if args.pdf:
+        paginas = extrair_paginas(Path(args.pdf).read_bytes())
+        texto, descricao = "".join(p + "\n" for p in paginas), f"{args.pdf} ({len(paginas)} páginas)"
+    elif args.sintetico:
+        texto, descricao = _edicao_sintetica(args.sintetico), f"sintética ({args.sintetico} páginas)"
+    else:
+        from modules.core.opportunity_collector import SCRAPERS_MAP
+        from modules.scrapers.diario_cache import diario_pdf_cache
+        fonte = (args.fonte or "femurn").lower()
+        scraper = SCRAPERS_MAP[fonte][0]()
+        resposta = scraper.session.get(scraper.BASE_URL, timeout=30, verify=False)
+        from bs4 import BeautifulSoup
+        pdf_url = scraper._get_pdf_url(BeautifulSoup(resposta.text, "html.parser"))
+        if not pdf_url:
+            sys.exit(f"PDF do dia não encontrado em {scraper.BASE_URL}")
+        paginas, _ = diario_pdf_cache.obter_paginas(scraper.session, pdf_url, timeout=90, verify=False)
+        texto, descricao = "".join(p + "\n" for p in paginas), f"{fonte} {pdf_url} ({len(paginas)} páginas)"
+
+    texto_norm = normalizar(texto)
+    termos_busca = PNCPClient.TERMOS_PRIORITARIOS
+    termos_negativos = PNCPClient.TERMOS_NEGATIVOS_PADRAO
+
+    print(f"Edição: {descricao}, {len(texto_norm):,} caracteres")
+    print(f"Termos: {len(termos_busca)} positivos, {len(termos_negativos)} negativos\n")
+
+    t_legado, (aprov_l, bloq_l, avisos) = _medir(_filtrar_legado, texto_norm, termos_busca, termos_negativos,
+                                                 args.repeticoes)
+    t_regras, (aprov_r, bloq_r, _) = _medir(_filtrar_regras, texto_norm, termos_busca, termos_negativos,
+                                            args.repeticoes)
+
+    print(f"{'variante':<10} {'tempo (s)':>10} {'ms/aviso':>10} {'aprovados':>10} {'bloqueados':>11}")
+    for nome, tempo, aprovados, bloqueados in [("legado", t_legado, aprov_l, bloq_l),
+                                               ("regras", t_regras, aprov_r, bloq_r)]:
+        print(f"{nome:<10} {tempo:>10.3f} {tempo * 1000 / max(avisos, 1):>10.3f} "
+              f"{len(aprovados):>10} {bloqueados:>11}")
+    print(f"\n{avisos} avisos | speedup {t_legado / t_regras:.1f}x | "
+          f"decisões idênticas: {'sim' if (aprov_l, bloq_l) == (aprov_r, bloq_r) else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
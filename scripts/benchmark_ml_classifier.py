@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark do classificador de relevância (features densas x esparsas)
+Treina em licitações sintéticas de N linhas e mede, por variante:
+  - tempo de treino (LicitacaoClassifier.train, inclui vetorização e avaliação)
+  - latência de inferência (predict_proba_batch de 1000 linhas e predict_proba unitário)
+  - pico de memória (VmHWM do processo) durante o treino, acima do já alocado
+
+Variantes:
+  denso/random_forest    comportamento anterior (.toarray() + np.hstack)
+  esparso/random_forest  scipy.sparse.hstack de ponta a ponta
+  esparso/linear         regressão logística sobre a matriz esparsa
+
+Cada medição roda em um processo filho (fork) para o pico de memória não
+vazar entre variantes. Não toca em data/models.
+
+Uso:
+    python scripts/benchmark_ml_classifier.py
+    python scripts/benchmark_ml_classifier.py --tamanhos 10000 --max-features 5000
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Adiciona o diretório raiz ao path
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from modules.ml.classifier import LicitacaoClassifier
+from modules.ml.preprocessor import FeatureExtractor
+
+VARIANTES = [
+    ("denso", "random_forest"),
+    ("esparso", "random_forest"),
+    ("esparso", "linear"),
+]
+
+TERMOS_RELEVANTES = ["reagentes", "hematologia", "bioquimica", "laboratorio", "analisador", "kit diagnostico"]
+TERMOS_GERAIS = ["aquisicao", "servicos", "material", "contratacao", "fornecimento", "manutencao", "pavimentacao",
+                 "limpeza", "merenda", "combustivel", "medicamentos", "informatica", "mobiliario", "obras"]
+
+
+class _ClassificadorDenso(LicitacaoClassifier):
+    """Reproduz o pipeline anterior: TF-IDF densificado + np.hstack"""
+
+    @staticmethod
+    def _features(vectorizer, textos, licitacoes, fit=False):
+        X_text = (vectorizer.fit_transform(textos) if fit else vectorizer.transform(textos)).toarray()
+        X_numerical = np.array([FeatureExtractor.extract_numerical_features(lic) for lic in licitacoes])
+        return np.hstack([X_text, X_numerical])
+
+
+def _gerar(total: int, vocabulario: int, seed: int = 42):
+    """Licitações sintéticas com vocabulário de cauda longa (nomes de órgãos, marcas, códigos)"""
+    rng = random.Random(seed)
+    cauda = [f"termo{i}" for i in range(vocabulario)]
+    licitacoes, labels = [], []
+    for _ in range(total):
+        relevante = rng.random() < 0.3
+        palavras = rng.sample(TERMOS_GERAIS, 3) + rng.sample(cauda, 8)
+        if relevante:
+            palavras += rng.sample(TERMOS_RELEVANTES, 2)
+        elif rng.random() < 0.05:
+            palavras.append(rng.choice(TERMOS_RELEVANTES))  # ruído
+        rng.shuffle(palavras)
+        licitacoes.append({
+            'orgao': f"Prefeitura Municipal de {rng.choice(cauda)}",
+            'uf': rng.choice(["RN", "PB", "PE", "AL"]),
+            'modalidade': rng.choice(["Pregão", "Dispensa"]),
+            'objeto': " ".join(palavras),
+            'itens': [{'descricao': " ".join(rng.sample(cauda, 3))} for _ in range(rng.randint(0, 5))],
+        })
+        labels.append(1 if relevante else 0)
+    return licitacoes, labels
+
+
+def _memoria_kb(campo: str) -> int:
+    with open("/proc/self/status") as f:
+        for linha in f:
+            if linha.startswith(campo + ":"):
+                return int(linha.split()[1])
+    return 0
+
+
+def _resetar_pico():
+    """Zera o VmHWM do processo (Linux >= 4.0); sem suporte, o pico inclui a geração dos dados"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _medir(total: int, modo: str, algoritmo: str, max_features: int, vocabulario: int, conn):
+    licitacoes, labels = _gerar(total, vocabulario)
+    amostra = licitacoes[:1000]
+
+    cls = _ClassificadorDenso if modo == "denso" else LicitacaoClassifier
+    with tempfile.TemporaryDirectory() as tmp:
+        clf = cls(model_path=str(Path(tmp) / "modelo.pkl"), algoritmo=algoritmo, max_features=max_features)
+
+        _resetar_pico()
+        base_kb = _memoria_kb("VmRSS")
+        t0 = time.perf_counter()
+        metricas = clf.train(licitacoes, labels)
+        treino = time.perf_counter() - t0
+        pico_mb = (_memoria_kb("VmHWM") - base_kb) / 1024
+
+        t0 = time.perf_counter()
+        clf.predict_proba_batch(amostra)
+        lote_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for lic in amostra[:200]:
+            clf.predict_proba(lic)
+        unitario_ms = (time.perf_counter() - t0) * 1000 / 200
+
+    conn.send({
+        "treino": treino,
+        "lote_ms": lote_ms,
+        "unitario_ms": unitario_ms,
+        "pico_mb": pico_mb,
+        "f1": metricas["f1_score"],
+        "features": metricas["n_features"],
+    })
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do classificador (denso x esparso)")
+    parser.add_argument("--tamanhos", default="10000,100000", help="Linhas de treino, separadas por vírgula")
+    parser.add_argument("--max-features", type=int, default=500, help="Vocabulário máximo do TF-IDF")
+    parser.add_argument("--vocabulario", type=int, default=20000, help="Termos distintos nos dados sintéticos")
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.tamanhos.split(",") if t.strip()]
+    ctx = multiprocessing.get_context("fork")
+
+    print("=" * 96)
+    print("BENCHMARK: LicitacaoClassifier (features densas x esparsas)")
+    print(f"max_features={args.max_features} vocabulario_sintetico={args.vocabulario}")
+    print("=" * 96)
+    print(f"{'linhas':>8}  {'variante':<24}{'treino (s)':>11}{'lote 1000 (ms)':>16}"
+          f"{'unitário (ms)':>15}{'pico mem (MB)':>15}{'F1':>7}")
+    for total in tamanhos:
+        for modo, algoritmo in VARIANTES:
+            recv, send = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_medir, args=(total, modo, algoritmo, args.max_features, args.vocabulario, send))
+            proc.start()
+            send.close()
+            try:
+                r = recv.recv()
+            except EOFError:
+                print(f"{total:>8}  {modo + '/' + algoritmo:<24}{'falhou (memória?)':>11}")
+                proc.join()
+                continue
+            proc.join()
+            print(f"{total:>8}  {modo + '/' + algoritmo:<24}{r['treino']:>11.2f}{r['lote_ms']:>16.1f}"
+                  f"{r['unitario_ms']:>15.2f}{r['pico_mb']:>15.1f}{r['f1']:>7.2f}")
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
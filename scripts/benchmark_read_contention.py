@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência leitura x escrita
+Mede a latência p95 das leituras do dashboard/API enquanto uma importação
+completa grava licitações e itens, comparando:
+  - engine compartilhada (leitores usam a engine de escrita)
+  - engines separadas (leitores usam a engine somente leitura)
+
+Roda em um banco SQLite temporário; não toca em data/medcal.db.
+
+Uso:
+    python scripts/benchmark_read_contention.py
+    python scripts/benchmark_read_contention.py --base 5000 --importar 2000 --leitores 8 --lote 50
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from modules.database.database import Base, Licitacao, ItemLicitacao, create_db_engine
+
+
+def _nova_licitacao(prefixo: str, idx: int, itens_por_lic: int) -> Licitacao:
+    agora = datetime.now()
+    lic = Licitacao(
+        pncp_id=f"{prefixo}-{idx}",
+        orgao=f"Prefeitura Municipal {idx % 300}",
+        uf=random.choice(["RN", "PB", "PE", "AL"]),
+        modalidade="Pregão",
+        data_publicacao=agora - timedelta(minutes=idx),
+        data_encerramento_proposta=agora + timedelta(days=idx % 30),
+        objeto=f"Aquisição de reagentes laboratoriais para hematologia lote {idx}",
+        link="https://pncp.gov.br",
+    )
+    lic.itens = [
+        ItemLicitacao(
+            numero_item=n,
+            descricao=f"Reagente hematologia item {n} do lote {idx}",
+            quantidade=10,
+            unidade="UN",
+            produto_match_id=1 if n % 7 == 0 else None,
+        )
+        for n in range(itens_por_lic)
+    ]
+    return lic
+
+
+def _popular(engine, total: int, itens_por_lic: int):
+    SessionW = sessionmaker(bind=engine)
+    session = SessionW()
+    for i in range(total):
+        session.add(_nova_licitacao("BASE", i, itens_por_lic))
+        if i % 500 == 0:
+            session.commit()
+    session.commit()
+    session.close()
+
+
+def _importacao(engine, total: int, itens_por_lic: int, lote: int, resultado: dict):
+    """Simula o pipeline: grava licitação + itens e comita a cada `lote` registros."""
+    SessionW = sessionmaker(bind=engine)
+    session = SessionW()
+    inicio = time.perf_counter()
+    for i in range(total):
+        session.add(_nova_licitacao("IMPORT", i, itens_por_lic))
+        session.flush()
+        if (i + 1) % lote == 0:
+            session.commit()
+    session.commit()
+    session.close()
+    resultado["duracao"] = time.perf_counter() - inicio
+
+
+def _leitor(engine, parar: threading.Event, latencias: list, lock: threading.Lock):
+    """Consulta típica do dashboard: últimas 100 licitações + contagem de matches."""
+    SessionR = sessionmaker(bind=engine)
+    locais = []
+    while not parar.is_set():
+        t0 = time.perf_counter()
+        session = SessionR()
+        try:
+            ids = [
+                row.id
+                for row in session.query(Licitacao.id)
+                .order_by(Licitacao.data_publicacao.desc())
+                .limit(100)
+            ]
+            session.query(ItemLicitacao.licitacao_id, func.count(ItemLicitacao.id)).filter(
+                ItemLicitacao.licitacao_id.in_(ids),
+                ItemLicitacao.produto_match_id.isnot(None),
+            ).group_by(ItemLicitacao.licitacao_id).all()
+        finally:
+            session.close()
+        locais.append(time.perf_counter() - t0)
+    with lock:
+        latencias.extend(locais)
+
+
+def _percentil(valores, p):
+    if len(valores) < 2:
+        return valores[0] if valores else 0.0
+    return statistics.quantiles(valores, n=100)[p - 1]
+
+
+def executar_cenario(nome: str, separar: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        writer = create_db_engine(url)
+        Base.metadata.create_all(writer)
+        _popular(writer, args.base, args.itens)
+
+        reader = create_db_engine(url, read_only=True) if separar else writer
+
+        parar = threading.Event()
+        latencias: list = []
+        lock = threading.Lock()
+        leitores = [
+            threading.Thread(target=_leitor, args=(reader, parar, latencias, lock))
+            for _ in range(args.leitores)
+        ]
+        for t in leitores:
+            t.start()
+
+        resultado_import: dict = {}
+        _importacao(writer, args.importar, args.itens, args.lote, resultado_import)
+
+        parar.set()
+        for t in leitores:
+            t.join()
+        if reader is not writer:
+            reader.dispose()
+        writer.dispose()
+
+    return {
+        "cenario": nome,
+        "leituras": len(latencias),
+        "p50_ms": _percentil(latencias, 50) * 1000,
+        "p95_ms": _percentil(latencias, 95) * 1000,
+        "max_ms": (max(latencias) if latencias else 0.0) * 1000,
+        "importacao_s": resultado_import.get("duracao", 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência de leitura durante importação")
+    parser.add_argument("--base", type=int, default=3000, help="Licitações pré-existentes")
+    parser.add_argument("--importar", type=int, default=1500, help="Licitações gravadas durante o teste")
+    parser.add_argument("--itens", type=int, default=20, help="Itens por licitação")
+    parser.add_argument("--leitores", type=int, default=6, help="Threads leitoras concorrentes")
+    parser.add_argument("--lote", type=int, default=1, help="Licitações por commit na importação")
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print("BENCHMARK: LEITURAS DURANTE IMPORTAÇÃO COMPLETA")
+    print(f"base={args.base} importar={args.importar} itens={args.itens} "
+          f"leitores={args.leitores} lote={args.lote}")
+    print("=" * 78)
+
+    resultados = [
+        executar_cenario("engine compartilhada", False, args),
+        executar_cenario("engines leitura/escrita", True, args),
+    ]
+
+    print(f"{'Cenário':<26}{'leituras':>10}{'p50 (ms)':>11}{'p95 (ms)':>11}{'max (ms)':>11}{'import (s)':>12}")
+    for r in resultados:
+        print(
+            f"{r['cenario']:<26}{r['leituras']:>10}{r['p50_ms']:>11.2f}"
+            f"{r['p95_ms']:>11.2f}{r['max_ms']:>11.2f}{r['importacao_s']:>12.2f}"
+        )
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tempo de startup
+Mede, em processos Python novos, o custo de importar os pontos de entrada
+(app.py, api.main e scripts/scheduler.py) e o custo da primeira sessão do banco.
+
+Uso:
+    python scripts/benchmark_startup.py            # 5 execuções por alvo
+    python scripts/benchmark_startup.py --runs 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+
+# Cada alvo roda em um processo limpo; o import é medido separadamente da
+# primeira sessão para mostrar o que foi adiado para o primeiro uso do banco.
+_PROBE = r"""
+import json, sys, time, runpy, importlib
+sys.path.insert(0, {base!r})
+alvo = {alvo!r}
+t0 = time.perf_counter()
+if alvo.endswith(".py"):
+    runpy.run_path(alvo, run_name="__benchmark__")
+else:
+    importlib.import_module(alvo)
+t_import = time.perf_counter() - t0
+t1 = time.perf_counter()
+from modules.database.database import get_session
+s = get_session()
+s.connection().exec_driver_sql("SELECT 1")
+s.close()
+t_sessao = time.perf_counter() - t1
+print(json.dumps({{"import": t_import, "primeira_sessao": t_sessao}}))
+"""
+
+ALVOS = {
+    "app.py": str(BASE_DIR / "app.py"),
+    "api.main": "api.main",
+    "scripts/scheduler.py": str(BASE_DIR / "scripts" / "scheduler.py"),
+}
+
+
+def medir(alvo: str) -> dict:
+    codigo = _PROBE.format(base=str(BASE_DIR), alvo=alvo)
+    proc = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=str(BASE_DIR),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    linhas = [l for l in proc.stdout.strip().splitlines() if l.startswith("{")]
+    if proc.returncode != 0 or not linhas:
+        raise RuntimeError((proc.stderr or proc.stdout).strip()[-500:])
+    return json.loads(linhas[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de startup dos pontos de entrada")
+    parser.add_argument("--runs", type=int, default=5, help="Execuções por alvo")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK DE STARTUP")
+    print("=" * 70)
+    print(f"{'Alvo':<24}{'import (med)':>14}{'import (min)':>14}{'1a sessão (med)':>18}")
+
+    for nome, alvo in ALVOS.items():
+        imports, sessoes = [], []
+        try:
+            for _ in range(args.runs):
+                r = medir(alvo)
+                imports.append(r["import"])
+                sessoes.append(r["primeira_sessao"])
+        except Exception as e:
+            print(f"{nome:<24}[ERRO] {e}")
+            continue
+        print(
+            f"{nome:<24}"
+            f"{statistics.median(imports):>13.3f}s"
+            f"{min(imports):>13.3f}s"
+            f"{statistics.median(sessoes):>17.3f}s"
+        )
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
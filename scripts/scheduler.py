@@ -17,10 +17,13 @@ from datetime import datetime
 # Adiciona raiz do projeto ao path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from dotenv import load_dotenv
+load_dotenv()  # antes dos módulos que leem o ambiente no import (ai_config, logging_config)
+
 from modules.database.database import init_db, get_session, Configuracao
 from modules.finance import init_finance_db, init_finance_historico_db
 from modules.core.search_engine import SearchEngine
-from modules.core.opportunity_collector import coletar_todas_oportunidades
+from modules.core.opportunity_collector import collect_opportunities
 from modules.utils.deadline_alerts import executar_verificacao_diaria
 from modules.utils.logging_config import get_logger
 
@@ -32,6 +35,18 @@ HORARIOS_BUSCA = ["08:00", "14:00"]
 # Horário de verificação de prazos
 HORARIO_VERIFICACAO_PRAZO = "09:00"
 
+# Horário do arquivamento de licitações expiradas
+HORARIO_ARQUIVAMENTO = "03:00"
+
+# Porta do GET /metrics deste processo (coletas agendadas, rescore, IA); 0 desliga
+SCHEDULER_METRICS_PORT = int(os.getenv("SCHEDULER_METRICS_PORT", "9101"))
+
+# Intervalo (segundos) da checagem de scores ML desatualizados (modelo novo)
+INTERVALO_RESCORE_ML = 300
+
+# Intervalo (segundos) da passada de IA nos avisos de diário que ficaram pendentes
+INTERVALO_ENRIQUECIMENTO = 1800
+
 
 def executar_busca_completa():
     """Executa busca completa em todas as fontes"""
@@ -54,17 +69,20 @@ def executar_busca_completa():
         
         # Coleta oportunidades
         logger.info(f"Buscando licitações dos últimos {dias_busca} dias...")
-        resultados = coletar_todas_oportunidades(
-            dias_busca=dias_busca,
+        engine = SearchEngine()
+        resultados = collect_opportunities(
+            dias=dias_busca,
             estados=['RN', 'PB', 'PE', 'AL'],
-            fontes=['pncp', 'femurn', 'famup', 'amupe', 'ama']
+            fontes=['pncp', 'femurn', 'famup', 'amupe', 'ama'],
+            termos_positivos=engine.client.TERMOS_POSITIVOS_PADRAO,
+            termos_negativos=engine.client.TERMOS_NEGATIVOS_PADRAO,
+            apenas_abertas=True,
         )
         
         logger.info(f"Total de {len(resultados)} licitações encontradas")
         
         # Processa e salva
         if resultados:
-            engine = SearchEngine()
             details = engine.run_search_pipeline(
                 resultados, 
                 return_details=True, 
@@ -83,6 +101,62 @@ def executar_busca_completa():
         return False
 
 
+def executar_enriquecimento_pendente():
+    """Enriquece (IA) os avisos de diário pendentes e atualiza as licitações gravadas"""
+    from modules.scrapers.diario_enrichment import diario_enriquecedor
+
+    try:
+        resultado = diario_enriquecedor.drenar_pendentes()
+        if resultado['enriquecidos'] or resultado['restantes']:
+            logger.info(f"IA diários: {resultado['enriquecidos']} avisos enriquecidos, "
+                        f"{resultado['atualizadas']} licitações atualizadas, {resultado['restantes']} pendentes")
+        return True
+    except Exception as e:
+        logger.error(f"Erro no enriquecimento pendente: {e}")
+        return False
+
+
+def executar_arquivamento():
+    """Move licitações com prazo encerrado há mais de N dias para o banco de arquivo"""
+    from modules.database.archive import arquivar_licitacoes_expiradas
+
+    try:
+        session = get_session()
+        config = session.query(Configuracao).filter_by(chave='dias_arquivamento').first()
+        dias = int(config.valor) if config and config.valor else 30
+        session.close()
+
+        resultado = arquivar_licitacoes_expiradas(dias_apos_prazo=dias)
+        logger.info(f"Arquivamento: {resultado['arquivadas']} licitações movidas (prazo + {dias} dias)")
+        return True
+    except Exception as e:
+        logger.error(f"Erro no arquivamento: {e}")
+        return False
+
+
+def executar_rescore_ml():
+    """Repontua licitações sem score ou com score de uma versão anterior do modelo"""
+    from modules.ml.classifier import ML_MODO
+    from modules.ml.scoring import repontuar_licitacoes
+
+    try:
+        if ML_MODO == "online":
+            # Aplica os rótulos novos antes. A versão só muda a cada
+            # ML_ONLINE_EVENTOS_POR_VERSAO eventos (aí o rescore abaixo pega a
+            # tabela toda); entre versões, só as licitações rotuladas agora
+            from modules.ml.online import atualizar_modelo_online
+            online = atualizar_modelo_online()
+            if online['ids']:
+                repontuar_licitacoes(ids=online['ids'])
+        resultado = repontuar_licitacoes()
+        if resultado['pontuadas']:
+            logger.info(f"Scores ML: {resultado['pontuadas']} licitações (modelo {resultado['versao']})")
+        return True
+    except Exception as e:
+        logger.error(f"Erro ao atualizar scores ML: {e}")
+        return False
+
+
 def verificar_horario(horario_alvo: str) -> bool:
     """Verifica se o horário atual corresponde ao alvo (com tolerância de 1 minuto)"""
     agora = datetime.now().strftime("%H:%M")
@@ -94,9 +168,22 @@ def modo_daemon():
     logger.info("Scheduler iniciado em modo DAEMON")
     logger.info(f"Horários de busca: {', '.join(HORARIOS_BUSCA)}")
     logger.info(f"Horário de verificação de prazo: {HORARIO_VERIFICACAO_PRAZO}")
+    logger.info(f"Horário de arquivamento: {HORARIO_ARQUIVAMENTO}")
+    
+    # As métricas são por processo: as do scheduler não aparecem no /metrics da API
+    if SCHEDULER_METRICS_PORT:
+        from modules.utils.metrics import servir_metricas
+        try:
+            servir_metricas(SCHEDULER_METRICS_PORT)
+            logger.info(f"Métricas em http://0.0.0.0:{SCHEDULER_METRICS_PORT}/metrics")
+        except OSError as e:
+            logger.warning(f"Métricas do scheduler indisponíveis (porta {SCHEDULER_METRICS_PORT}): {e}")
     
     ultima_busca = None
     ultima_verificacao = None
+    ultimo_arquivamento = None
+    ultimo_rescore = None
+    ultimo_enriquecimento = datetime.now()  # a coleta já gasta o orçamento de IA
     
     while True:
         agora = datetime.now()
@@ -115,6 +202,21 @@ def modo_daemon():
             executar_verificacao_diaria()
             ultima_verificacao = hora_atual
         
+        # Arquivamento diário das licitações expiradas
+        if hora_atual == HORARIO_ARQUIVAMENTO and ultimo_arquivamento != hora_atual:
+            executar_arquivamento()
+            ultimo_arquivamento = hora_atual
+        
+        # Scores ML: sem trabalho enquanto o modelo não muda (consulta vazia)
+        if ultimo_rescore is None or (agora - ultimo_rescore).total_seconds() >= INTERVALO_RESCORE_ML:
+            executar_rescore_ml()
+            ultimo_rescore = agora
+        
+        # Avisos de diário sem IA (orçamento/rate limit): sem pendências é só ler um arquivo
+        if (agora - ultimo_enriquecimento).total_seconds() >= INTERVALO_ENRIQUECIMENTO:
+            executar_enriquecimento_pendente()
+            ultimo_enriquecimento = agora
+        
         # Aguarda 30 segundos antes de verificar novamente
         time.sleep(30)
 
@@ -129,6 +231,15 @@ def modo_unico():
     # Verifica prazos
     executar_verificacao_diaria()
     
+    # Arquiva expiradas
+    executar_arquivamento()
+    
+    # Atualiza scores ML
+    executar_rescore_ml()
+    
+    # IA pendente dos diários (execuções anteriores)
+    executar_enriquecimento_pendente()
+    
     logger.info("Execução única concluída")
 
 
@@ -137,12 +248,21 @@ def main():
     parser.add_argument("--once", action="store_true", help="Executa uma vez e sai")
     parser.add_argument("--busca", action="store_true", help="Executa apenas a busca")
     parser.add_argument("--prazo", action="store_true", help="Executa apenas verificação de prazo")
+    parser.add_argument("--arquivar", action="store_true", help="Executa apenas o arquivamento de expiradas")
+    parser.add_argument("--rescore", action="store_true", help="Executa apenas a atualização dos scores ML")
+    parser.add_argument("--enriquecer", action="store_true", help="Executa apenas o enriquecimento IA pendente")
     args = parser.parse_args()
     
     if args.busca:
         executar_busca_completa()
     elif args.prazo:
         executar_verificacao_diaria()
+    elif args.arquivar:
+        executar_arquivamento()
+    elif args.rescore:
+        executar_rescore_ml()
+    elif args.enriquecer:
+        executar_enriquecimento_pendente()
     elif args.once:
         modo_unico()
     else: